@@ -8,6 +8,7 @@ NEWS_API_KEY = os.environ.get('NEWS_API_KEY', "a6b05e480d17418596c0b82b2a66de9e"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 AUDIO_DIR = os.path.join(BASE_DIR, 'static', 'audio')
 os.makedirs(AUDIO_DIR, exist_ok=True)
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
 
 # Expanded list of languages with ISO 639-1 codes
 SUPPORTED_LANGUAGES = {
@@ -53,8 +54,74 @@ NEWS_API_BACKUP = {
 # Summarizer settings
 MAX_SUMMARY_LENGTH = 150
 MIN_SUMMARY_LENGTH = 50
+SUMMARY_LENGTH_LIMIT = 512  # largest max_length a request may ask for, in tokens
 DEFAULT_LANGUAGE = 'en'
 
+# T5 model settings
+T5_MODEL_NAME = os.environ.get('T5_MODEL_NAME', 't5-small')
+
+# Inference backend: 'torch', 'onnx' or 'onnx-int8' (dynamic int8 quantization)
+T5_BACKEND = os.environ.get('T5_BACKEND', 'torch')
+ONNX_MODEL_DIR = os.path.join(BASE_DIR, 'models', 'onnx')
+
+# Pre-fork sharing: load memory-mapped, read-only weights once in the master
+# process so forked workers share the pages copy-on-write
+T5_SHARED_WEIGHTS = os.environ.get('T5_SHARED_WEIGHTS', '0') == '1'
+SHARED_WEIGHTS_DIR = os.path.join(BASE_DIR, 'models', 'shared')
+
+# Micro-batching settings for T5 inference
+T5_BATCHING_ENABLED = os.environ.get('T5_BATCHING_ENABLED', '1') == '1'
+T5_BATCH_MAX_SIZE = int(os.environ.get('T5_BATCH_MAX_SIZE', 8))
+T5_BATCH_MAX_WAIT_MS = float(os.environ.get('T5_BATCH_MAX_WAIT_MS', 10))
+
+# Multi-process inference pool (0 workers keeps inference in the web process).
+# INFERENCE_POOL_THREADS of 0 splits the available cores evenly between workers.
+INFERENCE_POOL_WORKERS = int(os.environ.get('INFERENCE_POOL_WORKERS', 0))
+INFERENCE_POOL_THREADS = int(os.environ.get('INFERENCE_POOL_THREADS', 0))
+INFERENCE_POOL_QUEUE_DEPTH = int(os.environ.get('INFERENCE_POOL_QUEUE_DEPTH', 64))
+INFERENCE_POOL_TIMEOUT = 120  # seconds
+
+# Long-document (map-reduce) summarization settings
+T5_MAX_INPUT_TOKENS = 1024
+LONG_DOC_ENABLED = os.environ.get('LONG_DOC_ENABLED', '1') == '1'
+LONG_DOC_CHUNK_TOKENS = 512
+LONG_DOC_MAX_CHUNKS = 12
+LONG_DOC_MAX_DEPTH = 2
+
+# Extractive pre-compression: inputs longer than this many tokens are cut down
+# to their most salient sentences before T5 sees them. With LONG_DOC_ENABLED
+# the budget is raised to what map-reduce covers (max_chunks x
+# LONG_DOC_CHUNK_TOKENS), so only text chunking would drop is cut and
+# LONG_DOC_MAX_CHUNKS / max_chunks keep their effect
+EXTRACTIVE_PRECOMPRESS_TOKENS = 2048
+
+# Decoding policy: default quality tier ('high', 'balanced', 'fast'), how many
+# queued requests trigger a step down to the next cheaper tier, and the cost
+# prior used before any generate call has been measured
+DECODING_DEFAULT_QUALITY = os.environ.get('DECODING_DEFAULT_QUALITY', 'high')
+DECODING_LOAD_STEP_DOWN = 8
+DECODING_DEFAULT_MS_PER_TOKEN = 8.0
+
+# Hedged summarization: start the secondary engine ('gpt', 'extractive' or a
+# 'module:function' path) when T5 runs past this percentile of its recent latency
+HEDGE_ENABLED = os.environ.get('HEDGE_ENABLED', '0') == '1'
+HEDGE_SECONDARY_ENGINE = os.environ.get('HEDGE_SECONDARY_ENGINE', 'gpt')
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY_MS = 5000
+
+# Bulk summarization (/summarize/batch)
+SUMMARIZE_BATCH_MAX_ITEMS = 32  # items accepted in one request
+SUMMARIZE_BATCH_MAX_TEXT_CHARS = 200000  # longer text items are rejected
+SUMMARIZE_BATCH_MAX_CONCURRENT = 2  # batch requests processed at once per worker
+SUMMARIZE_BATCH_FETCH_WORKERS = 8
+
+# Summary cache settings (set SUMMARY_CACHE_DB to an empty string to disable the disk tier)
+SUMMARY_CACHE_ENABLED = os.environ.get('SUMMARY_CACHE_ENABLED', '1') == '1'
+SUMMARY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+SUMMARY_CACHE_TTL = 6 * 3600  # seconds
+SUMMARY_CACHE_DB = os.environ.get('SUMMARY_CACHE_DB', os.path.join(CACHE_DIR, 'summaries.db'))
+
 # Available TTS voices
 TTS_VOICES = ['alloy', 'echo', 'fable', 'nova', 'onyx', 'shimmer']
 
@@ -82,10 +149,78 @@ for lang in SUPPORTED_LANGUAGES:
     if lang not in TTS_VOICE_MAPPING:
         TTS_VOICE_MAPPING[lang] = TTS_VOICES[hash(lang) % len(TTS_VOICES)]
 
+# Shared HTTP client (modules/utils/http.py)
+HTTP_MAX_CONNECTIONS = 100  # across all hosts
+HTTP_MAX_KEEPALIVE = 20  # idle connections kept open for reuse
+HTTP_KEEPALIVE_EXPIRY = 30  # seconds an idle connection is kept
+HTTP_TIMEOUT = 15  # seconds
+HTTP_DNS_TTL = 300  # seconds a resolved address is reused
+
+# Article extraction engine: 'lxml' (single-pass block scoring) or 'bs4' (original strategy chain)
+ARTICLE_EXTRACTOR = os.environ.get('ARTICLE_EXTRACTOR', 'lxml')
+# Article downloads are streamed: bytes read per page at most, chunk size, and
+# the paragraph text after which the rest of the page is not downloaded
+ARTICLE_MAX_BYTES = int(os.environ.get('ARTICLE_MAX_BYTES', 3 * 1024 * 1024))
+ARTICLE_CHUNK_BYTES = 64 * 1024
+ARTICLE_EARLY_STOP_CHARS = int(os.environ.get('ARTICLE_EARLY_STOP_CHARS', 50000))
+# Per-host extraction profiles: text shorter than EXTRACTION_MIN_CHARS doesn't
+# count as a good extraction, and a profile is relearned after this many misses
+EXTRACTION_MIN_CHARS = 500
+EXTRACTION_PROFILES_PATH = os.path.join(CACHE_DIR, 'extraction_profiles.json')
+EXTRACTION_PROFILE_MAX_MISSES = 3
+# Article response cache: server cache lifetimes are clamped to
+# [HTTP_CACHE_MIN_TTL, HTTP_CACHE_MAX_TTL]; responses without cache headers
+# live HTTP_CACHE_DEFAULT_TTL. Stale entries are revalidated with ETag/Last-Modified.
+HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', '1') == '1'
+HTTP_CACHE_DB = os.environ.get('HTTP_CACHE_DB', os.path.join(CACHE_DIR, 'http_cache.db'))
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HTTP_CACHE_DEFAULT_TTL = 600  # seconds
+HTTP_CACHE_MIN_TTL = 60  # seconds
+HTTP_CACHE_MAX_TTL = 24 * 3600  # seconds
+
 # API retry settings
 MAX_API_RETRIES = 3
 API_RETRY_DELAY = 2  # seconds
 
+# NewsAPI budget shared by all workers (the free plan allows 100 requests a day)
+NEWS_API_DAILY_QUOTA = int(os.environ.get('NEWS_API_DAILY_QUOTA', 100))
+NEWS_API_BURST = 10  # calls that may be made back to back
+NEWS_API_MIN_INTERVAL = 60  # seconds a response is reused before calling again
+NEWS_API_STALE_TTL = 24 * 3600  # seconds a response may be served once the budget is spent
+NEWS_API_QUOTA_DB = os.path.join(CACHE_DIR, 'newsapi_quota.db')
+
+# Circuit breakers around the primary and backup news providers
+NEWS_BREAKER_FAILURE_RATE = 0.5  # failure fraction over the window that opens the circuit
+NEWS_BREAKER_WINDOW = 10  # recent calls considered
+NEWS_BREAKER_MIN_CALLS = 3
+NEWS_BREAKER_OPEN_SECONDS = 30  # cool-down before a probe call is let through
+NEWS_BREAKER_HALF_OPEN_PROBES = 1
+
+# News fetch-and-summarize pipeline settings
+NEWS_FETCH_WORKERS = 8
+NEWS_SUMMARIZE_WORKERS = 4
+NEWS_PER_HOST_LIMIT = 2
+NEWS_FETCH_RETRIES = 1
+NEWS_PIPELINE_DEADLINE = 45  # seconds for a whole headline page
+# Threads that run model work for async routes, keeping it off the event loop
+ASYNC_MODEL_WORKERS = NEWS_SUMMARIZE_WORKERS
+
+# Headline store: summarized headlines per (language, category) served from
+# memory and refreshed in the background
+HEADLINE_REFRESH_INTERVAL = 300  # seconds
+HEADLINE_STORE_MAX_ENTRIES = 32
+HEADLINE_STORE_IDLE_TTL = 3600  # seconds without reads before an entry is dropped
+# Speculative next-page summaries run with their own small pools so they never
+# take fetch or model slots from pages users are waiting on
+HEADLINE_PREFETCH_FETCH_WORKERS = 1
+HEADLINE_PREFETCH_SUMMARIZE_WORKERS = 1
+
+# Near-duplicate detection: copies of the same wire story are summarized once
+NEWS_DEDUP_ENABLED = os.environ.get('NEWS_DEDUP_ENABLED', '1') == '1'
+NEWS_DEDUP_THRESHOLD = 0.5  # estimated Jaccard similarity of word shingles
+NEWS_DEDUP_INDEX_SIZE = 5000  # signatures kept between refreshes
+NEWS_DEDUP_MIN_SHINGLES = 3  # articles with less text than this are never merged
+
 # Helper function to get voice for any language
 def get_tts_voice(language_code):
     return TTS_VOICE_MAPPING.get(language_code, TTS_VOICE_MAPPING.get(DEFAULT_LANGUAGE))
\ No newline at end of file
@@ -0,0 +1,26 @@
+# gunicorn.conf.py - Pre-fork deployment with a shared T5 model
+#
+# Run with: T5_SHARED_WEIGHTS=1 gunicorn -c gunicorn.conf.py "app:create_app()"
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Import the app (and load the model) once in the master before forking
+preload_app = True
+
+
+def pre_fork(server, worker):
+    """Freeze the model and the heap in the master right before each fork"""
+    from modules.summarizer.prefork import prepare_for_fork
+    prepare_for_fork()
+
+
+def post_fork(server, worker):
+    """Give each worker its own slice of intra-op threads"""
+    try:
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    except ImportError:
+        pass
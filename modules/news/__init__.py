@@ -1,10 +1,17 @@
 # modules/news/__init__.py
+import asyncio
+import json
 import logging
-from flask import Blueprint, request, jsonify, render_template, abort
+from flask import Blueprint, request, jsonify, render_template, abort, Response, stream_with_context
 from config import SUPPORTED_LANGUAGES, NEWS_CATEGORIES
-from .service2 import get_news_from_news_api as get_news_from_api
-from ..utils.web import fetch_article_text, validate_url
-from modules.utils.shared import summarize_text
+from .service2 import get_news_from_news_api_async
+from .headlines import get_headline_store
+from .ratelimit import get_news_api_limiter
+from .breaker import get_breaker_stats
+from ..utils.web import fetch_article_text_async, validate_url
+from ..utils.http import run_on_io_loop
+from ..utils.singleflight import get_single_flight, url_key
+from modules.utils.shared import summarize_text_async
 from ..audio.service3 import text_to_speech_openai
 
 # Configure logging
@@ -16,10 +23,11 @@ logger = logging.getLogger(__name__)
 news_bp = Blueprint('news', __name__, url_prefix='/news')
 
 @news_bp.route('/test')
-def test_news():
-    """Test route to check news API directly"""
+@run_on_io_loop
+async def test_news():
+    """Test route to check news API directly, fetching and summarizing on one event loop"""
     try:
-        articles = get_news_from_api('en', 'general', 5)
+        articles = await get_news_from_news_api_async('en', 'general', 5)
         return jsonify({
             'success': True,
             'articles': articles,
@@ -40,42 +48,46 @@ def news_home():
                           languages=SUPPORTED_LANGUAGES, 
                           categories=NEWS_CATEGORIES)
 
+def _read_news_args():
+    """Read and validate the listing parameters shared by the news endpoints"""
+    language = request.args.get('language', 'en')
+    category = request.args.get('category', 'general')
+    count = int(request.args.get('count', 20))
+    page = int(request.args.get('page', 1))
+    
+    # Validate inputs
+    if language not in SUPPORTED_LANGUAGES:
+        logger.warning(f"Unsupported language requested: {language}")
+        language = 'en'  # Default to English
+        
+    if category not in NEWS_CATEGORIES:
+        logger.warning(f"Unsupported category requested: {category}")
+        category = 'general'  # Default to general news
+        
+    if count < 1 or count > 50:
+        logger.warning(f"Invalid count requested: {count}")
+        count = 20  # Default to 20 articles
+        
+    if page < 1:
+        logger.warning(f"Invalid page requested: {page}")
+        page = 1  # Default to first page
+    
+    return language, category, count, page, request.args.get('cursor')
+
 @news_bp.route('/get_articles')
 def get_news():
     """Get news articles with pagination"""
     try:
-        language = request.args.get('language', 'en')
-        category = request.args.get('category', 'general')
-        count = int(request.args.get('count', 20))
-        page = int(request.args.get('page', 1))
-        
-        # Validate inputs
-        if language not in SUPPORTED_LANGUAGES:
-            logger.warning(f"Unsupported language requested: {language}")
-            language = 'en'  # Default to English
-            
-        if category not in NEWS_CATEGORIES:
-            logger.warning(f"Unsupported category requested: {category}")
-            category = 'general'  # Default to general news
-            
-        if count < 1 or count > 50:
-            logger.warning(f"Invalid count requested: {count}")
-            count = 20  # Default to 20 articles
-            
-        if page < 1:
-            logger.warning(f"Invalid page requested: {page}")
-            page = 1  # Default to first page
+        language, category, count, page, cursor = _read_news_args()
         
-        # Fetch articles
+        # Serve headlines from the store and summarize only the requested page
+        page_size = max(1, count // 2)
         logger.info(f"Fetching news: language={language}, category={category}, count={count}, page={page}")
-        articles = get_news_from_api(language, category, count)
-        
-        # Handle pagination
-        start_idx = (page - 1) * (count // 2)
-        end_idx = start_idx + (count // 2)
+        result = get_headline_store().get_page(language, category, page_size, cursor=cursor,
+                                               offset=(page - 1) * page_size, count=count)
         
         # Check if we have any articles
-        if not articles:
+        if not result['articles']:
             logger.warning("No articles returned from API")
             return jsonify({
                 'articles': [{
@@ -88,23 +100,18 @@ def get_news():
                 }],
                 'total': 1,
                 'page': page,
-                'hasMore': False
+                'hasMore': False,
+                'next_cursor': None,
+                'freshness': result['freshness']
             })
         
-        # Ensure start_idx is within bounds
-        if start_idx >= len(articles):
-            logger.warning(f"Requested page {page} exceeds available articles ({len(articles)})")
-            start_idx = 0
-            page = 1
-            
-        # Get the paginated articles
-        paginated_articles = articles[start_idx:end_idx] if articles else []
-        
         return jsonify({
-            'articles': paginated_articles,
-            'total': len(articles),
-            'page': page,
-            'hasMore': end_idx < len(articles)
+            'articles': result['articles'],
+            'total': result['total'],
+            'page': result['offset'] // page_size + 1,
+            'hasMore': result['hasMore'],
+            'next_cursor': result['next_cursor'],
+            'freshness': result['freshness']
         })
     except Exception as e:
         logger.error(f"Error in get_news endpoint: {type(e).__name__}: {str(e)}")
@@ -116,8 +123,115 @@ def get_news():
             'hasMore': False
         }), 500
 
+@news_bp.route('/stream')
+def stream_news():
+    """
+    Stream a page of news: article metadata first, then each summary as
+    soon as it is ready, then totals. Sends NDJSON by default, or
+    server-sent events with format=sse or an event-stream Accept header.
+    Takes the same parameters as /news/get_articles.
+    """
+    try:
+        language, category, count, page, cursor = _read_news_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid count or page'}), 400
+    
+    use_sse = (request.args.get('format') == 'sse'
+               or 'text/event-stream' in request.headers.get('Accept', ''))
+    page_size = max(1, count // 2)
+    
+    def generate():
+        events = get_headline_store().stream_page(language, category, page_size, cursor=cursor,
+                                                  offset=(page - 1) * page_size, count=count)
+        try:
+            for event, data in events:
+                if use_sse:
+                    yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                else:
+                    yield json.dumps(dict(data, event=event)) + '\n'
+        except Exception as e:
+            logger.error(f"Error in news stream: {type(e).__name__}: {str(e)}")
+            error = {'error': 'An unexpected error occurred. Please try again later.'}
+            yield (f"event: error\ndata: {json.dumps(error)}\n\n" if use_sse
+                   else json.dumps(dict(error, event='error')) + '\n')
+    
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@news_bp.route('/headlines/status')
+def headline_status():
+    """Report the cached headline entries and their freshness"""
+    return jsonify(get_headline_store().get_stats())
+
+@news_bp.route('/quota')
+def news_quota():
+    """Report the remaining NewsAPI budget shared by all workers"""
+    return jsonify(get_news_api_limiter().get_stats())
+
+@news_bp.route('/providers')
+def news_providers():
+    """Report the circuit breaker state of each news provider"""
+    return jsonify(get_breaker_stats())
+
+async def _summarize_article(url, language, max_length):
+    """
+    Fetch, summarize and voice an article. The download and translation run
+    on the event loop; model and speech calls run in executors.
+    
+    Returns:
+        tuple: (response payload, HTTP status)
+    """
+    logger.info(f"Fetching article from URL: {url}")
+    article_text = await fetch_article_text_async(url)
+
+    if not article_text:
+        logger.warning(f"Failed to fetch article content from URL: {url}")
+        return {
+            'error': 'Failed to fetch article content. The URL might be inaccessible or blocked.',
+            'success': False,
+            'suggestions': [
+                'Check if the URL is correct',
+                'Try a different article',
+                'The website might be blocking our access'
+            ]
+        }, 404
+
+    # Summarize text
+    logger.info(f"Summarizing article (length: {len(article_text)} chars) in language: {language}")
+    summary, english_summary = await summarize_text_async(article_text, language, max_length)
+
+    if not summary:
+        logger.warning("Failed to generate summary")
+        return {
+            'error': 'Failed to generate summary. Please try again later.',
+            'success': False
+        }, 500
+
+    # Generate audio if requested
+    try:
+        # The OpenAI client blocks, so it runs in the default executor
+        audio_file = await asyncio.get_running_loop().run_in_executor(
+            None, text_to_speech_openai, summary, language
+        )
+        logger.info(f"Generated audio file: {audio_file}")
+    except Exception as e:
+        logger.error(f"Error generating audio: {type(e).__name__}: {str(e)}")
+        audio_file = None
+
+    return {
+        'summary': summary,
+        'audio_file': audio_file,
+        'language': SUPPORTED_LANGUAGES.get(language, language),
+        'engine': 'T5',
+        'success': True,
+        'article_length': len(article_text),
+        'summary_length': len(summary)
+    }, 200
+
 @news_bp.route('/summarize', methods=['POST'])
-def summarize_news():
+@run_on_io_loop
+async def summarize_news():
     """Endpoint to summarize a news article URL directly"""
     try:
         url = request.form.get('url')
@@ -142,49 +256,11 @@ def summarize_news():
             logger.warning(f"Invalid max_length requested: {max_length}")
             max_length = 150  # Default to 150
         
-        logger.info(f"Fetching article from URL: {url}")
-        article_text = fetch_article_text(url)
-        
-        if not article_text:
-            logger.warning(f"Failed to fetch article content from URL: {url}")
-            return jsonify({
-                'error': 'Failed to fetch article content. The URL might be inaccessible or blocked.',
-                'success': False,
-                'suggestions': [
-                    'Check if the URL is correct',
-                    'Try a different article',
-                    'The website might be blocking our access'
-                ]
-            }), 404
-        
-        # Summarize text
-        logger.info(f"Summarizing article (length: {len(article_text)} chars) in language: {language}")
-        summary, english_summary = summarize_text(article_text, language, max_length)
-        
-        if not summary:
-            logger.warning("Failed to generate summary")
-            return jsonify({
-                'error': 'Failed to generate summary. Please try again later.',
-                'success': False
-            }), 500
-        
-        # Generate audio if requested
-        try:
-            audio_file = text_to_speech_openai(summary, language)
-            logger.info(f"Generated audio file: {audio_file}")
-        except Exception as e:
-            logger.error(f"Error generating audio: {type(e).__name__}: {str(e)}")
-            audio_file = None
-        
-        return jsonify({
-            'summary': summary,
-            'audio_file': audio_file,
-            'language': SUPPORTED_LANGUAGES.get(language, language),
-            'engine': 'T5',
-            'success': True,
-            'article_length': len(article_text),
-            'summary_length': len(summary)
-        })
+        # Identical requests arriving together share one fetch, summary and audio file
+        payload, status = await get_single_flight('news_summarize').do_async(
+            url_key(url, language, max_length), _summarize_article, url, language, max_length
+        )
+        return jsonify(payload), status
     except Exception as e:
         logger.error(f"Error in summarize_news endpoint: {type(e).__name__}: {str(e)}")
         return jsonify({
@@ -0,0 +1,157 @@
+# modules/news/breaker.py
+"""
+Circuit breakers for the news providers.
+
+A breaker watches the outcome of recent calls to one provider. When the
+failure rate over the window passes the threshold the breaker opens and
+calls fail over at once instead of retrying with sleeps. After a cool-down
+it lets a few probe calls through (half-open); a successful probe closes it
+again and a failed one re-opens it.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker driven by the failure rate of recent calls
+
+    Args:
+        name (str): Provider name, used in logs and stats
+        failure_rate (float): Failure fraction over the window that opens the breaker
+        window (int): Number of recent calls considered
+        min_calls (int): Calls needed in the window before the rate is trusted
+        open_seconds (float): Cool-down before probe calls are allowed
+        half_open_probes (int): Concurrent probe calls allowed while half-open
+    """
+    def __init__(self, name, failure_rate=0.5, window=10, min_calls=3, open_seconds=30,
+                 half_open_probes=1):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._transitions = deque(maxlen=20)
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call may go to the provider now"""
+        with self._lock:
+            if self._state == OPEN:
+                if time.time() - self._opened_at < self.open_seconds:
+                    self._rejected += 1
+                    return False
+                self._transition(HALF_OPEN, 'cool-down elapsed')
+
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self._rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._outcomes.clear()
+                self._transition(CLOSED, 'probe succeeded')
+            self._outcomes.append(True)
+
+    def release(self):
+        """Give back a probe slot for a call that said nothing about provider health"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record_failure(self, reason=''):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._trip(f"probe failed: {reason}")
+                return
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if (self._state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._trip(f"{failures}/{len(self._outcomes)} recent calls failed, last: {reason}")
+
+    def _trip(self, reason):
+        # Called with the lock held
+        self._opened_at = time.time()
+        self._transition(OPEN, reason)
+
+    def _transition(self, state, reason):
+        # Called with the lock held
+        logger.warning(f"News provider '{self.name}' circuit {self._state} -> {state} ({reason})")
+        self._transitions.append({
+            'from': self._state,
+            'to': state,
+            'reason': reason,
+            'at': datetime.now(timezone.utc).isoformat(),
+        })
+        self._state = state
+        self._probes = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def get_stats(self):
+        """Return the current state, recent failure rate and transitions"""
+        with self._lock:
+            calls = len(self._outcomes)
+            failures = self._outcomes.count(False)
+            retry_in = (max(0.0, self.open_seconds - (time.time() - self._opened_at))
+                        if self._state == OPEN else 0.0)
+            return {
+                'state': self._state,
+                'recent_calls': calls,
+                'failure_rate': round(failures / calls, 3) if calls else 0.0,
+                'rejected': self._rejected,
+                'retry_in_seconds': round(retry_in, 1),
+                'transitions': list(self._transitions),
+            }
+
+
+# One breaker per provider, created on first use
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Return the shared breaker for a news provider"""
+    from config import (NEWS_BREAKER_FAILURE_RATE, NEWS_BREAKER_WINDOW, NEWS_BREAKER_MIN_CALLS,
+                        NEWS_BREAKER_OPEN_SECONDS, NEWS_BREAKER_HALF_OPEN_PROBES)
+
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_rate=NEWS_BREAKER_FAILURE_RATE,
+                window=NEWS_BREAKER_WINDOW,
+                min_calls=NEWS_BREAKER_MIN_CALLS,
+                open_seconds=NEWS_BREAKER_OPEN_SECONDS,
+                half_open_probes=NEWS_BREAKER_HALF_OPEN_PROBES
+            )
+        return _breakers[name]
+
+
+def get_breaker_stats():
+    """Return the stats of every provider breaker"""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.get_stats() for name, breaker in breakers.items()}
@@ -0,0 +1,193 @@
+# modules/news/dedup.py
+"""
+Near-duplicate detection for news articles.
+
+The same wire story often arrives from several outlets with small edits.
+Each article gets a MinHash signature over word shingles of its title,
+description and content snippet; locality-sensitive hashing over signature
+bands finds candidate pairs, and pairs whose estimated similarity passes a
+threshold are merged into clusters. Signatures are kept in an index keyed by
+URL, so a refresh only hashes articles it hasn't seen before.
+"""
+import hashlib
+import logging
+import re
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# 2**31 - 1 keeps a * x + b below 2**63 for 32-bit shingle hashes
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+class SignatureIndex:
+    """
+    MinHash signatures of articles, bounded and reused across refreshes
+
+    Args:
+        num_perm (int): Hash functions per signature
+        bands (int): LSH bands; num_perm must be divisible by it
+        threshold (float): Minimum estimated Jaccard similarity for duplicates
+        max_entries (int): Maximum number of signatures kept
+        shingle_size (int): Words per shingle
+        min_shingles (int): Texts with fewer distinct shingles are never
+            clustered; there isn't enough of them to tell stories apart
+    """
+    def __init__(self, num_perm=64, bands=16, threshold=0.5, max_entries=5000, shingle_size=3,
+                 min_shingles=3):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, (1 << 31) - 1, size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, (1 << 31) - 1, size=num_perm).astype(np.uint64)
+
+        self._signatures = OrderedDict()  # url -> (text digest, signature)
+        self._lock = threading.Lock()
+        self._hashed = 0
+        self._reused = 0
+
+    def _shingles(self, text):
+        words = _WORD.findall(text.lower())
+        n = min(self.shingle_size, len(words)) or 1
+        return {' '.join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+
+    def _minhash(self, text):
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in self._shingles(text)),
+                             dtype=np.uint64)
+        # One row per hash function, minimum over the shingles
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def signature(self, key, text):
+        """Return the signature of a text, reusing the stored one if the text is unchanged"""
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+        with self._lock:
+            cached = self._signatures.get(key)
+            if cached is not None and cached[0] == digest:
+                self._signatures.move_to_end(key)
+                self._reused += 1
+                return cached[1]
+
+        signature = self._minhash(text)
+        with self._lock:
+            self._signatures[key] = (digest, signature)
+            self._signatures.move_to_end(key)
+            while len(self._signatures) > self.max_entries:
+                self._signatures.popitem(last=False)
+            self._hashed += 1
+        return signature
+
+    def cluster(self, items):
+        """
+        Group near-duplicate texts
+
+        Args:
+            items (list): (key, text) pairs
+
+        Returns:
+            list: Cluster index for each item; the index is that of the
+                  cluster's first item, so representatives keep their order.
+                  Items with too little text are their own cluster.
+        """
+        # Empty or very short texts would all share the same few shingles and
+        # collapse into one cluster, so they're left out of the buckets
+        signatures = [self.signature(key, text) if len(self._shingles(text)) >= self.min_shingles else None
+                      for key, text in items]
+        parent = list(range(len(items)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                chunk = signature[band * self.rows:(band + 1) * self.rows]
+                for j in buckets.setdefault((band, chunk.tobytes()), []):
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j:
+                        continue
+                    # Banding finds candidates; the full signature confirms them
+                    if np.mean(signatures[i] == signatures[j]) >= self.threshold:
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+                buckets[(band, chunk.tobytes())].append(i)
+
+        return [find(i) for i in range(len(items))]
+
+    def get_stats(self):
+        """Return index size and how many signatures were computed or reused"""
+        with self._lock:
+            return {
+                'signatures': len(self._signatures),
+                'hashed': self._hashed,
+                'reused': self._reused,
+            }
+
+
+_TRUNCATION = re.compile(r"\s*\[\+\d+ chars\]\s*$")
+
+
+def article_text(article):
+    """Text used to fingerprint an article"""
+    # NewsAPI cuts 'content' short and appends a '[+1234 chars]' marker
+    content = _TRUNCATION.sub('', article.get('content') or '')
+    return ' '.join(filter(None, (article.get('title'), article.get('description'), content)))
+
+
+def cluster_articles(articles, index=None):
+    """
+    Cluster near-duplicate articles
+
+    Args:
+        articles (list): Article dicts with 'url', 'title', 'description'
+            and optionally 'content'
+        index (SignatureIndex): Index to use (the shared one by default)
+
+    Returns:
+        list: For each article, the index of its cluster's first article
+    """
+    if not articles:
+        return []
+    index = index or get_signature_index()
+
+    items = [(article.get('url') or str(i), article_text(article)) for i, article in enumerate(articles)]
+    clusters = index.cluster(items)
+
+    duplicates = len(clusters) - len(set(clusters))
+    if duplicates:
+        logger.info(f"Found {duplicates} near-duplicate articles in {len(articles)}")
+    return clusters
+
+
+# Shared index, so successive refreshes only hash new articles
+_signature_index = None
+_index_lock = threading.Lock()
+
+
+def get_signature_index():
+    """Return the process-wide signature index"""
+    global _signature_index
+    from config import NEWS_DEDUP_THRESHOLD, NEWS_DEDUP_INDEX_SIZE, NEWS_DEDUP_MIN_SHINGLES
+
+    with _index_lock:
+        if _signature_index is None:
+            _signature_index = SignatureIndex(threshold=NEWS_DEDUP_THRESHOLD,
+                                              max_entries=NEWS_DEDUP_INDEX_SIZE,
+                                              min_shingles=NEWS_DEDUP_MIN_SHINGLES)
+    return _signature_index
@@ -0,0 +1,421 @@
+# modules/news/headlines.py
+import base64
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from datetime import datetime, timezone
+
+from config import (NEWS_PIPELINE_DEADLINE, HEADLINE_PREFETCH_FETCH_WORKERS,
+                    HEADLINE_PREFETCH_SUMMARIZE_WORKERS)
+from .pipeline import iter_summaries, fallback_summary
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """Headlines for one (language, category), their summaries and freshness"""
+    __slots__ = ('articles', 'summaries', 'pending', 'count', 'fetched_at', 'last_access',
+                 'refreshing', 'loaded')
+
+    def __init__(self, count):
+        self.articles = []
+        self.summaries = {}  # url -> summary, computed lazily per page
+        self.pending = {}  # url -> Future for summaries being computed
+        self.count = count
+        self.fetched_at = 0.0
+        self.last_access = time.time()
+        self.refreshing = False
+        self.loaded = threading.Event()
+
+
+def encode_cursor(articles, offset):
+    """
+    Build an opaque cursor for the page starting at offset. It records the
+    URL of the article just before the page, so the cursor still points at
+    the right place after a refresh reorders or extends the headlines.
+    """
+    after = articles[offset - 1].get('url') if 0 < offset <= len(articles) else None
+    payload = json.dumps({'after': after, 'offset': offset}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, articles):
+    """Resolve a cursor to an offset in the current headlines (0 if invalid)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return 0
+
+    after = data.get('after')
+    if after:
+        for index, article in enumerate(articles):
+            if article.get('url') == after:
+                return index + 1
+    offset = data.get('offset')
+    return min(max(0, offset), len(articles)) if isinstance(offset, int) else 0
+
+
+def _summary_key(article):
+    """Near-duplicate articles are summarized once under their cluster's key"""
+    return article.get('cluster') or article.get('url')
+
+
+def _is_placeholder(articles):
+    """True for the 'Unable to fetch news' result returned when every provider failed"""
+    return not articles or all(a.get('source') == 'System' for a in articles)
+
+
+class HeadlineStore:
+    """
+    Stale-while-revalidate store of headlines keyed by (language, category),
+    with summaries computed lazily per page. Reads are served from memory
+    immediately, even when slightly stale, while a background thread
+    refreshes entries on a schedule. Entries that haven't been read for a
+    while are dropped, and the number of entries is bounded.
+
+    Args:
+        fetch (callable): fetch(language, category, count) -> list of articles
+        refresh_interval (float): Seconds after which an entry is refreshed
+        max_entries (int): Maximum number of (language, category) entries
+        idle_ttl (float): Seconds without reads after which an entry is dropped
+        default_count (int): Articles fetched per entry unless more are requested
+    """
+    def __init__(self, fetch, refresh_interval=300, max_entries=32, idle_ttl=3600, default_count=20):
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.default_count = default_count
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='headline-refresh')
+        # A single thread keeps speculative prefetching at low priority
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='headline-prefetch')
+        self._scheduler = None
+
+    def get(self, language, category, count=None):
+        """
+        Return headlines for a language and category
+
+        Returns:
+            tuple: (list of articles, freshness metadata dict)
+        """
+        self._ensure_scheduler()
+        count = max(count or 0, self.default_count)
+        key = (language, category)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            cold = entry is None
+            if cold:
+                entry = _Entry(count)
+                self._entries[key] = entry
+                self._evict()
+            self._entries.move_to_end(key)
+            entry.last_access = time.time()
+
+            if count > entry.count:
+                entry.count = count
+                entry.fetched_at = 0.0  # Refresh with the larger count
+            start_refresh = not entry.refreshing and (
+                cold or time.time() - entry.fetched_at > self.refresh_interval)
+            if start_refresh:
+                entry.refreshing = True
+
+        if start_refresh:
+            self._executor.submit(self._refresh, key, entry)
+
+        # Only the very first request for a key has to wait for the fetch
+        if not entry.loaded.is_set() and not entry.loaded.wait(NEWS_PIPELINE_DEADLINE):
+            logger.warning(f"Headlines for {language}/{category} not loaded in time")
+
+        return entry.articles, self._freshness(entry)
+
+    def _page(self, language, category, page_size, cursor, offset, count):
+        articles, freshness = self.get(language, category, count)
+        if count:
+            articles = articles[:count]
+        entry = self._entries.get((language, category))
+
+        if cursor:
+            start = decode_cursor(cursor, articles)
+        else:
+            # A page past the end starts over, as the page-number API always did
+            start = offset if 0 <= offset < len(articles) else 0
+        end = min(start + page_size, len(articles))
+        return articles, freshness, entry, start, end
+
+    def _page_info(self, articles, freshness, start, end):
+        return {
+            'total': len(articles),
+            'offset': start,
+            'next_cursor': encode_cursor(articles, end) if end < len(articles) else None,
+            'hasMore': end < len(articles),
+            'freshness': freshness,
+        }
+
+    def _prefetch(self, entry, articles, end, page_size, language):
+        # Speculatively summarize the next page while the user reads this one,
+        # with small pools of its own so it never competes with real pages
+        next_page = articles[end:end + page_size]
+        if entry is not None and next_page:
+            self._prefetcher.submit(self._summarize, entry, next_page, language,
+                                    fetch_workers=HEADLINE_PREFETCH_FETCH_WORKERS,
+                                    summarize_workers=HEADLINE_PREFETCH_SUMMARIZE_WORKERS)
+
+    def get_page(self, language, category, page_size, cursor=None, offset=0, count=None):
+        """
+        Return one page of headlines with summaries computed only for that
+        page. The following page is then summarized speculatively in the
+        background.
+
+        Args:
+            language (str): Language code
+            category (str): News category
+            page_size (int): Articles per page
+            cursor (str): Cursor returned as next_cursor by the previous page
+            offset (int): Start offset, used when no cursor is given
+            count (int): Number of headlines to page through
+
+        Returns:
+            dict: articles, total, offset, next_cursor, hasMore and freshness
+        """
+        articles, freshness, entry, start, end = self._page(language, category, page_size,
+                                                            cursor, offset, count)
+        page = articles[start:end]
+
+        summaries = self._summarize(entry, page, language) if entry is not None else {}
+        page_articles = [dict(a, summary=summaries.get(a.get('url')) or fallback_summary(a.get('description')))
+                         for a in page]
+
+        self._prefetch(entry, articles, end, page_size, language)
+        return dict(self._page_info(articles, freshness, start, end), articles=page_articles)
+
+    def stream_page(self, language, category, page_size, cursor=None, offset=0, count=None):
+        """
+        Stream one page of headlines: the article metadata first, then each
+        summary as soon as it is ready, then the totals. Takes the same
+        arguments as get_page.
+
+        Yields:
+            tuple: (event name, data dict) for the 'articles', 'summary'
+                   and 'done' events
+        """
+        started = time.perf_counter()
+
+        def elapsed_ms():
+            return round((time.perf_counter() - started) * 1000, 1)
+
+        articles, freshness, entry, start, end = self._page(language, category, page_size,
+                                                            cursor, offset, count)
+        page = articles[start:end]
+        first_article_ms = elapsed_ms()
+        yield 'articles', dict(self._page_info(articles, freshness, start, end),
+                               articles=[dict(a, index=i) for i, a in enumerate(page)],
+                               elapsed_ms=first_article_ms)
+
+        # Near-duplicates share a key, so one summary can complete several articles
+        by_key = {}
+        for i, article in enumerate(page):
+            by_key.setdefault(_summary_key(article), []).append(i)
+
+        summarized = 0
+        remaining = set(range(len(page)))
+        results = self._iter_summaries(entry, page, language) if entry is not None else ()
+        for key, summary in results:
+            if summary:
+                summarized += len(by_key.get(key, ()))
+            for i in by_key.get(key, ()):
+                remaining.discard(i)
+                yield 'summary', self._summary_event(page, i, summary, elapsed_ms())
+
+        for i in sorted(remaining):
+            yield 'summary', self._summary_event(page, i, None, elapsed_ms())
+
+        self._prefetch(entry, articles, end, page_size, language)
+        yield 'done', {
+            'articles': len(page),
+            'summarized': summarized,
+            'fallback': len(page) - summarized,
+            'time_to_first_article_ms': first_article_ms,
+            'total_ms': elapsed_ms(),
+        }
+
+    @staticmethod
+    def _summary_event(page, index, summary, elapsed_ms):
+        article = page[index]
+        return {
+            'index': index,
+            'url': article.get('url'),
+            'summary': summary or fallback_summary(article.get('description')),
+            'fallback': not summary,
+            'elapsed_ms': elapsed_ms,
+        }
+
+    def _summarize(self, entry, articles, language, **pool_sizes):
+        """
+        Summarize the articles that don't have a summary yet. pool_sizes
+        (fetch_workers, summarize_workers) are passed to iter_summaries.
+
+        Returns:
+            dict: url -> summary for the given articles
+        """
+        summaries = dict(self._iter_summaries(entry, articles, language, **pool_sizes))
+        return {a.get('url'): summaries.get(_summary_key(a)) for a in articles}
+
+    def _iter_summaries(self, entry, articles, language, **pool_sizes):
+        """
+        Yield (key, summary) for each story in the articles, in completion
+        order. Known summaries come first; stories that another request or
+        the prefetcher is already summarizing are waited on rather than
+        summarized twice, and near-duplicate articles share one key. The
+        summary is None for stories that weren't finished in time.
+        """
+        known = []
+        own = []
+        waiting = {}
+        seen = set()
+        with self._lock:
+            for article in articles:
+                key = _summary_key(article)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if key in entry.summaries:
+                    known.append((key, entry.summaries[key]))
+                elif key in entry.pending:
+                    waiting[entry.pending[key]] = key
+                else:
+                    future = Future()
+                    entry.pending[key] = future
+                    own.append((key, article, future))
+
+        try:
+            yield from known
+            for index, summary in iter_summaries([a for _, a, _ in own], language, **pool_sizes):
+                key, _, future = own[index]
+                self._resolve(entry, key, future, summary)
+                yield key, summary
+                for future in [f for f in waiting if f.done()]:
+                    yield waiting.pop(future), future.result()
+        except Exception as e:
+            logger.error(f"Error summarizing headline page: {str(e)}")
+        finally:
+            # Unfinished stories stay unsummarized so a later request can retry
+            for key, _, future in own:
+                if not future.done():
+                    self._resolve(entry, key, future, None)
+
+        try:
+            for future in as_completed(list(waiting), timeout=NEWS_PIPELINE_DEADLINE):
+                yield waiting.pop(future), future.result()
+        except FuturesTimeout:
+            pass
+        for key in waiting.values():
+            yield key, None
+
+    def _resolve(self, entry, key, future, summary):
+        with self._lock:
+            if summary:
+                entry.summaries[key] = summary
+            entry.pending.pop(key, None)
+        future.set_result(summary)
+
+    def _refresh(self, key, entry):
+        language, category = key
+        try:
+            logger.info(f"Refreshing headlines for {language}/{category}")
+            articles = self.fetch(language, category, entry.count)
+            # Keep serving the last good headlines when every provider failed
+            if not _is_placeholder(articles) or not entry.articles:
+                entry.articles = articles or []
+                entry.fetched_at = time.time()
+                # Keep summaries only for stories still in the list
+                keys = {_summary_key(a) for a in entry.articles}
+                with self._lock:
+                    entry.summaries = {k: v for k, v in entry.summaries.items() if k in keys}
+        except Exception as e:
+            logger.error(f"Headline refresh failed for {language}/{category}: {str(e)}")
+        finally:
+            entry.refreshing = False
+            entry.loaded.set()
+
+    def _freshness(self, entry):
+        age = time.time() - entry.fetched_at if entry.fetched_at else None
+        return {
+            'fetched_at': (datetime.fromtimestamp(entry.fetched_at, timezone.utc).isoformat()
+                           if entry.fetched_at else None),
+            'age_seconds': round(age, 1) if age is not None else None,
+            'stale': age is None or age > self.refresh_interval,
+            'refreshing': entry.refreshing,
+        }
+
+    def _evict(self):
+        # Called with the lock held
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            logger.info(f"Evicted headlines for {key[0]}/{key[1]}")
+
+    def _ensure_scheduler(self):
+        with self._lock:
+            if self._scheduler is None or not self._scheduler.is_alive():
+                self._scheduler = threading.Thread(target=self._schedule, name='headline-scheduler',
+                                                   daemon=True)
+                self._scheduler.start()
+
+    def _schedule(self):
+        """Refresh entries in the background before readers find them stale"""
+        while True:
+            time.sleep(max(1.0, self.refresh_interval / 4))
+            now = time.time()
+            due = []
+            with self._lock:
+                for key, entry in list(self._entries.items()):
+                    if now - entry.last_access > self.idle_ttl:
+                        del self._entries[key]
+                        continue
+                    if not entry.refreshing and now - entry.fetched_at > self.refresh_interval * 0.8:
+                        entry.refreshing = True
+                        due.append((key, entry))
+            for key, entry in due:
+                self._executor.submit(self._refresh, key, entry)
+
+    def get_stats(self):
+        """Return the cached keys with their freshness"""
+        with self._lock:
+            entries = list(self._entries.items())
+        return {f"{lang}/{cat}": dict(self._freshness(entry), articles=len(entry.articles))
+                for (lang, cat), entry in entries}
+
+
+# Shared store used by the news routes, created on first use
+_headline_store = None
+_store_lock = threading.Lock()
+
+
+def get_headline_store():
+    """Return the process-wide headline store"""
+    global _headline_store
+    from config import (HEADLINE_REFRESH_INTERVAL, HEADLINE_STORE_MAX_ENTRIES,
+                        HEADLINE_STORE_IDLE_TTL)
+    from .service2 import get_news_from_news_api
+
+    with _store_lock:
+        if _headline_store is None:
+            # Headlines are stored without summaries; pages summarize lazily
+            _headline_store = HeadlineStore(
+                lambda language, category, count: get_news_from_news_api(
+                    language, category, count, summarize=False),
+                refresh_interval=HEADLINE_REFRESH_INTERVAL,
+                max_entries=HEADLINE_STORE_MAX_ENTRIES,
+                idle_ttl=HEADLINE_STORE_IDLE_TTL
+            )
+    return _headline_store
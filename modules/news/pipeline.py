@@ -0,0 +1,177 @@
+# modules/news/pipeline.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from config import (NEWS_FETCH_WORKERS, NEWS_SUMMARIZE_WORKERS, NEWS_PER_HOST_LIMIT,
+                    NEWS_FETCH_RETRIES, NEWS_PIPELINE_DEADLINE)
+from modules.utils.web import fetch_article_text, fetch_article_text_async
+from modules.utils.shared import summarize_text, summarize_text_async
+
+# Configure logging
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def fallback_summary(description):
+    """Summary used when an article couldn't be summarized in time"""
+    return description[:200] + '...' if description else 'No description available'
+
+def iter_summaries(articles, language='en', max_length=150, deadline=None, fetch_workers=None,
+                   summarize_workers=None):
+    """
+    Fetch and summarize articles as a staged pipeline, yielding each
+    summary as soon as it is ready. Downloads run concurrently with a
+    per-host limit, and each extracted text goes to the summarizer as soon
+    as it arrives. Articles that aren't finished by the deadline are not
+    yielded.
+
+    Args:
+        articles (list): Dicts with 'url' and 'description' keys
+        language (str): Target language code
+        max_length (int): Maximum summary length
+        deadline (float): Seconds for the whole batch (default from config)
+        fetch_workers (int): Concurrent downloads (default from config)
+        summarize_workers (int): Concurrent summaries (default from config)
+
+    Yields:
+        tuple: (article index, summary or None) in completion order
+    """
+    deadline = NEWS_PIPELINE_DEADLINE if deadline is None else deadline
+    deadline_at = time.monotonic() + deadline
+    host_limits = {}
+
+    def fetch(url):
+        with host_limits[urlparse(url).netloc]:
+            if time.monotonic() >= deadline_at:
+                return None
+            return fetch_article_text(url, max_retries=NEWS_FETCH_RETRIES)
+
+    def summarize(text, description):
+        # Same order as before: full article first, then the description
+        for candidate in (text, description):
+            if candidate:
+                summary, _ = summarize_text(candidate, language, max_length)
+                if summary:
+                    return summary
+        return None
+
+    fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers or NEWS_FETCH_WORKERS,
+                                    thread_name_prefix='news-fetch')
+    summarize_pool = ThreadPoolExecutor(max_workers=summarize_workers or NEWS_SUMMARIZE_WORKERS,
+                                        thread_name_prefix='news-summarize')
+
+    pending = {}
+    for index, article in enumerate(articles):
+        url = article.get('url')
+        if url and url != '#':
+            # One semaphore per host caps concurrent downloads from the same site
+            host = urlparse(url).netloc
+            if host not in host_limits:
+                host_limits[host] = threading.BoundedSemaphore(NEWS_PER_HOST_LIMIT)
+            pending[fetch_pool.submit(fetch, url)] = ('fetch', index)
+        else:
+            pending[summarize_pool.submit(summarize, None, article.get('description'))] = ('summarize', index)
+
+    try:
+        while pending:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, index = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error in news pipeline ({stage}) for article {index}: {str(e)}")
+                    result = None
+
+                if stage == 'fetch':
+                    # Hand the text straight to the summarizer stage
+                    description = articles[index].get('description')
+                    pending[summarize_pool.submit(summarize, result, description)] = ('summarize', index)
+                else:
+                    yield index, result
+    finally:
+        if pending:
+            logger.warning(f"News pipeline stopped with {len(pending)} articles unfinished")
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        summarize_pool.shutdown(wait=False, cancel_futures=True)
+
+def summarize_articles(articles, language='en', max_length=150, deadline=None, with_fallback=True):
+    """
+    Fetch and summarize articles through the pipeline. Articles that aren't
+    finished by the deadline fall back to their NewsAPI description.
+
+    Args:
+        articles (list): Dicts with 'url' and 'description' keys
+        language (str): Target language code
+        max_length (int): Maximum summary length
+        deadline (float): Seconds for the whole batch (default from config)
+        with_fallback (bool): Fill unfinished articles with their description
+            instead of None
+
+    Returns:
+        list: One summary per article, in the same order
+    """
+    summaries = [None] * len(articles)
+    for index, summary in iter_summaries(articles, language, max_length, deadline):
+        summaries[index] = summary
+
+    if not with_fallback:
+        return summaries
+    return [summary or fallback_summary(article.get('description'))
+            for summary, article in zip(summaries, articles)]
+
+async def summarize_articles_async(articles, language='en', max_length=150, deadline=None, with_fallback=True):
+    """
+    Async version of summarize_articles: all downloads are tasks on one
+    event loop (still limited per host), and summarization runs in the
+    model executor. Takes the same arguments and returns the same list.
+    """
+    deadline = NEWS_PIPELINE_DEADLINE if deadline is None else deadline
+    host_limits = {}
+
+    async def process(article):
+        text = None
+        url = article.get('url')
+        if url and url != '#':
+            async with host_limits[urlparse(url).netloc]:
+                text = await fetch_article_text_async(url, max_retries=NEWS_FETCH_RETRIES)
+        # Same order as before: full article first, then the description
+        for candidate in (text, article.get('description')):
+            if candidate:
+                summary, _ = await summarize_text_async(candidate, language, max_length)
+                if summary:
+                    return summary
+        return None
+
+    tasks = []
+    for article in articles:
+        url = article.get('url')
+        if url and url != '#':
+            # One semaphore per host caps concurrent downloads from the same site
+            host_limits.setdefault(urlparse(url).netloc, asyncio.Semaphore(NEWS_PER_HOST_LIMIT))
+        tasks.append(asyncio.ensure_future(process(article)))
+
+    summaries = [None] * len(articles)
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        if pending:
+            logger.warning(f"News pipeline stopped with {len(pending)} articles unfinished")
+            for task in pending:
+                task.cancel()
+        for index, task in enumerate(tasks):
+            if task in done:
+                if task.exception():
+                    logger.error(f"Error in news pipeline for article {index}: {str(task.exception())}")
+                else:
+                    summaries[index] = task.result()
+
+    if not with_fallback:
+        return summaries
+    return [summary or fallback_summary(article.get('description'))
+            for summary, article in zip(summaries, articles)]
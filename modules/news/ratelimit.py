@@ -0,0 +1,308 @@
+# modules/news/ratelimit.py
+"""
+Shared rate limiting for NewsAPI calls.
+
+The NewsAPI quota belongs to the API key, not to a worker, so the token
+bucket lives in a SQLite file that every thread and gunicorn worker updates
+under a write lock. When the budget is spent or NewsAPI answers 429, callers
+get the last good response for the same request instead of sleeping in the
+request thread. Identical calls that are already in flight are coalesced, and
+a response younger than the minimum interval is reused without spending a
+token.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from modules.utils.http import get_http_client, get_async_http_client
+
+logger = logging.getLogger(__name__)
+
+# HTTP status returned by news_api_get when the budget is exhausted and nothing is cached
+RATE_LIMITED = 429
+
+
+class QuotaStore:
+    """
+    Token buckets and last good responses in a SQLite file shared across
+    processes
+
+    Args:
+        path (str): SQLite file
+        capacity (float): Maximum burst of calls
+        refill_per_second (float): Tokens added per second
+    """
+    def __init__(self, path, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode, so BEGIN IMMEDIATE below controls the transactions
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS buckets '
+            '(name TEXT PRIMARY KEY, tokens REAL, updated REAL, blocked_until REAL, '
+            'calls INTEGER, throttled INTEGER)'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body TEXT, fetched_at REAL)'
+        )
+
+    def _update(self, name, fn):
+        """Run fn(tokens, blocked_until, calls, throttled, now) under the cross-process write lock"""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = self._db.execute(
+                    'SELECT tokens, updated, blocked_until, calls, throttled FROM buckets WHERE name = ?',
+                    (name,)
+                ).fetchone()
+                if row is None:
+                    tokens, blocked_until, calls, throttled = self.capacity, 0.0, 0, 0
+                else:
+                    tokens, updated, blocked_until, calls, throttled = row
+                    tokens = min(self.capacity, tokens + (now - updated) * self.refill_per_second)
+
+                result, (tokens, blocked_until, calls, throttled) = fn(tokens, blocked_until, calls,
+                                                                       throttled, now)
+                self._db.execute(
+                    'INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)',
+                    (name, tokens, now, blocked_until, calls, throttled)
+                )
+                self._db.execute('COMMIT')
+                return result
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def acquire(self, name):
+        """Take one token; False if the bucket is empty or the provider asked us to back off"""
+        def take(tokens, blocked_until, calls, throttled, now):
+            if now < blocked_until or tokens < 1:
+                return False, (tokens, blocked_until, calls, throttled)
+            return True, (tokens - 1, blocked_until, calls + 1, throttled)
+        return self._update(name, take)
+
+    def penalize(self, name, retry_after):
+        """Empty the bucket and block calls for retry_after seconds after a 429"""
+        def block(tokens, blocked_until, calls, throttled, now):
+            return None, (0.0, max(blocked_until, now + retry_after), calls, throttled + 1)
+        self._update(name, block)
+
+    def status(self, name):
+        """Return the remaining budget of a bucket"""
+        def read(tokens, blocked_until, calls, throttled, now):
+            return {
+                'tokens': round(tokens, 2),
+                'capacity': self.capacity,
+                'refill_per_hour': round(self.refill_per_second * 3600, 2),
+                'blocked_for_seconds': round(max(0.0, blocked_until - now), 1),
+                'calls': calls,
+                'throttled': throttled,
+            }, (tokens, blocked_until, calls, throttled)
+        return self._update(name, read)
+
+    def get_response(self, key):
+        """Return (body, fetched_at) of the last good response for a request, or None"""
+        with self._lock:
+            row = self._db.execute('SELECT body, fetched_at FROM responses WHERE key = ?', (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def put_response(self, key, body, max_age):
+        """Store a good response and drop responses older than max_age seconds"""
+        now = time.time()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?)', (key, json.dumps(body), now))
+            self._db.execute('DELETE FROM responses WHERE fetched_at < ?', (now - max_age,))
+
+
+class NewsApiLimiter:
+    """
+    Rate-limited, coalescing NewsAPI client
+
+    Args:
+        store (QuotaStore): Shared token bucket and response store
+        bucket (str): Bucket name, one per API key
+        min_interval (float): Seconds during which a response is reused as is
+        stale_ttl (float): Seconds a response may be served once the budget is spent
+    """
+    def __init__(self, store, bucket='newsapi', min_interval=60, stale_ttl=24 * 3600):
+        self.store = store
+        self.bucket = bucket
+        self.min_interval = min_interval
+        self.stale_ttl = stale_ttl
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'fresh_hits': 0, 'coalesced': 0, 'stale_served': 0, 'rejected': 0}
+
+    @staticmethod
+    def request_key(url, params):
+        """Cache key for a request; the API key is left out"""
+        public = sorted((k, str(v)) for k, v in params.items() if k != 'apiKey')
+        return hashlib.sha256(json.dumps([url, public]).encode('utf-8')).hexdigest()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get(self, url, params, timeout=10):
+        """
+        GET a NewsAPI endpoint within the shared budget
+
+        Returns:
+            tuple: (status code, parsed JSON or None). 200 may come from the
+                   response store; RATE_LIMITED means the budget is spent and
+                   nothing usable is stored.
+
+        Raises:
+            httpx.HTTPError: On network errors
+        """
+        self._count('requests')
+        key = self.request_key(url, params)
+
+        future, leader = self._join(key)
+        if not leader:
+            # The same call is already running in this process; share its result
+            try:
+                result = future.result(timeout * 2)
+            except FutureTimeout:
+                result = None
+            return result or self._stale(key)
+
+        result = None
+        try:
+            cached, result = self._before_call(key)
+            if result is None:
+                response = get_http_client().get(url, params=params, timeout=timeout)
+                result = self._after_call(key, cached, response)
+            return result
+        finally:
+            self._finish(key, future, result)
+
+    async def get_async(self, url, params, timeout=10):
+        """
+        Async version of get() on the event loop's httpx.AsyncClient; shares
+        the budget, stored responses and in-flight calls with get()
+        """
+        self._count('requests')
+        key = self.request_key(url, params)
+
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                # Shielded: a timeout or a cancelled caller mustn't cancel the
+                # future the leader and any sync waiters share
+                result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout * 2)
+            except asyncio.TimeoutError:
+                result = None
+            return result or await asyncio.to_thread(self._stale, key)
+
+        result = None
+        try:
+            # The bucket transaction and the stored responses are SQLite,
+            # which blocks, so they run in a thread rather than on the loop
+            cached, result = await asyncio.to_thread(self._before_call, key)
+            if result is None:
+                response = await get_async_http_client().get(url, params=params, timeout=timeout)
+                result = await asyncio.to_thread(self._after_call, key, cached, response)
+            return result
+        finally:
+            self._finish(key, future, result)
+
+    def _join(self, key):
+        """Return (future, True) to make the call or (future, False) to wait for a running one"""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                return future, True
+        self._count('coalesced')
+        return future, False
+
+    def _finish(self, key, future, result):
+        with self._lock:
+            self._inflight.pop(key, None)
+        # None tells waiters to fall back to the stored response
+        if not future.done():
+            future.set_result(result)
+
+    def _before_call(self, key):
+        """Return (stored response, result) where result is set if no call should be made"""
+        cached = self.store.get_response(key)
+        if cached and time.time() - cached[1] < self.min_interval:
+            self._count('fresh_hits')
+            return cached, (200, cached[0])
+
+        if not self.store.acquire(self.bucket):
+            logger.warning("NewsAPI budget exhausted, answering from stored responses")
+            return cached, self._stale(key, cached)
+        return cached, None
+
+    def _after_call(self, key, cached, response):
+        """Turn a NewsAPI response into a result, storing good ones"""
+        if response.status_code == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            retry_after = float(retry_after) if retry_after.isdigit() else self.min_interval
+            logger.warning(f"Rate limited by NewsAPI, backing off for {retry_after:.0f}s")
+            self.store.penalize(self.bucket, retry_after)
+            return self._stale(key, cached)
+
+        if response.status_code != 200:
+            logger.error(f"NewsAPI error {response.status_code}: {response.text}")
+            return response.status_code, None
+
+        body = response.json()
+        self.store.put_response(key, body, self.stale_ttl)
+        return 200, body
+
+    def _stale(self, key, cached=None):
+        cached = cached or self.store.get_response(key)
+        if cached and time.time() - cached[1] < self.stale_ttl:
+            self._count('stale_served')
+            return 200, cached[0]
+        self._count('rejected')
+        return RATE_LIMITED, None
+
+    def get_stats(self):
+        """Return the shared budget and this process's counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['budget'] = self.store.status(self.bucket)
+        return stats
+
+
+# Shared limiter, created on first use
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_news_api_limiter():
+    """Return the process-wide NewsAPI limiter"""
+    global _limiter
+    from config import (NEWS_API_DAILY_QUOTA, NEWS_API_BURST, NEWS_API_MIN_INTERVAL,
+                        NEWS_API_STALE_TTL, NEWS_API_QUOTA_DB)
+
+    with _limiter_lock:
+        if _limiter is None:
+            store = QuotaStore(NEWS_API_QUOTA_DB, NEWS_API_BURST, NEWS_API_DAILY_QUOTA / 86400.0)
+            _limiter = NewsApiLimiter(store, min_interval=NEWS_API_MIN_INTERVAL,
+                                      stale_ttl=NEWS_API_STALE_TTL)
+    return _limiter
+
+
+def news_api_get(url, params, timeout=10):
+    """GET a NewsAPI endpoint through the shared limiter; see NewsApiLimiter.get"""
+    return get_news_api_limiter().get(url, params, timeout)
+
+
+async def news_api_get_async(url, params, timeout=10):
+    """Async GET of a NewsAPI endpoint through the shared limiter; see NewsApiLimiter.get"""
+    return await get_news_api_limiter().get_async(url, params, timeout)
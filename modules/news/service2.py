@@ -1,13 +1,18 @@
 # modules/news/service2.py
+import asyncio
 import http.client
 import json
 import logging
 import time
-import requests
+import httpx
 from datetime import datetime
-from config import NEWS_API_KEY, NEWS_API_PRIMARY, NEWS_API_BACKUP
+from config import NEWS_API_KEY, NEWS_API_PRIMARY, NEWS_API_BACKUP, NEWS_DEDUP_ENABLED
 from modules.utils.web import fetch_article_text
 from modules.utils.shared import summarize_text
+from .pipeline import summarize_articles, summarize_articles_async, fallback_summary
+from .dedup import cluster_articles
+from .ratelimit import news_api_get, news_api_get_async, RATE_LIMITED
+from .breaker import get_breaker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -33,164 +38,263 @@ def summarize_article(url, description, language='en', max_length=150):
     except Exception as e:
         logger.error(f"Error summarizing article {url}: {str(e)}")
     
-    return description[:200] + '...' if description else 'No description available'
+    return fallback_summary(description)
 
-def get_news_from_news_api(language='en', category='general', count=20, max_retries=3):
+def format_articles(articles, language='en', summarize=True):
+    """
+    Convert raw NewsAPI articles to the response format, fetching and
+    summarizing them concurrently through the news pipeline. Near-duplicate
+    copies of a story are summarized once and share the summary; each
+    article's 'cluster' is the URL of its cluster's first article. With
+    summarize=False only the headline fields are returned.
+    """
+    formatted_articles, clusters = _format_headlines(articles)
+    if not summarize or not formatted_articles:
+        return formatted_articles
+    
+    # Summarize one representative per cluster and share it with the copies
+    representatives = sorted(set(clusters))
+    summaries = summarize_articles([formatted_articles[i] for i in representatives], language)
+    _share_summaries(formatted_articles, clusters, representatives, summaries)
+    return formatted_articles
+
+async def format_articles_async(articles, language='en', summarize=True):
+    """
+    Async version of format_articles: the representatives are fetched on the
+    event loop and summarized in the model executor
+    """
+    formatted_articles, clusters = _format_headlines(articles)
+    if not summarize or not formatted_articles:
+        return formatted_articles
+    
+    representatives = sorted(set(clusters))
+    summaries = await summarize_articles_async([formatted_articles[i] for i in representatives], language)
+    _share_summaries(formatted_articles, clusters, representatives, summaries)
+    return formatted_articles
+
+def _format_headlines(articles):
+    """Return the headline fields of raw NewsAPI articles and each article's cluster root index"""
+    if not articles:
+        return [], []
+    
+    # Title, description and content snippet identify copies of the same story
+    clusters = cluster_articles(articles) if NEWS_DEDUP_ENABLED else list(range(len(articles)))
+    
+    formatted_articles = []
+    for article in articles:
+        formatted_articles.append({
+            'title': article.get('title', 'No title'),
+            'description': article.get('description', 'No description available'),
+            'url': article.get('url', '#'),
+            'source': article.get('source', {}).get('name', 'Unknown'),
+            'image': article.get('urlToImage', '/static/img/news-placeholder.jpg'),
+            'published_at': article.get('publishedAt', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        })
+    for article, root in zip(formatted_articles, clusters):
+        article['cluster'] = formatted_articles[root]['url']
+    return formatted_articles, clusters
+
+def _share_summaries(formatted_articles, clusters, representatives, summaries):
+    """Give every article the summary of its cluster's representative"""
+    cluster_summaries = dict(zip(representatives, summaries))
+    for article, root in zip(formatted_articles, clusters):
+        article['summary'] = cluster_summaries[root]
+    
+    logger.info(f"Processed {len(formatted_articles)} articles, summarized {len(representatives)} stories")
+
+# Request settings of each news provider; the key is also its breaker's name
+_PROVIDERS = {
+    'primary': {
+        'label': 'News API',
+        'url': "https://newsapi.org/v2/top-headlines",
+        'params': {},
+    },
+    'backup': {
+        'label': 'backup API',
+        'url': f"{NEWS_API_BACKUP['base_url']}/top-headlines",
+        'params': {'country': 'us'},
+    },
+}
+
+def get_news_from_news_api(language='en', category='general', count=20, max_retries=3, summarize=True):
     """
     Fetch news from News API with retry mechanism and summarization
+    (summarize=False returns headlines only). Fails over to the backup
+    straight away while the primary provider's circuit is open.
     """
-    retry_count = 0
+    articles = _fetch_from_provider('primary', language, category, count, max_retries, summarize)
+    if articles:
+        return articles
     
+    logger.error(f"Failed to fetch news after {max_retries} attempts")
+    return get_news_from_backup_api(language, category, count, summarize=summarize)
+
+def get_news_from_backup_api(language='en', category='general', count=20, max_retries=3, summarize=True):
+    """
+    Backup news API if the primary one fails. Returns the placeholder
+    straight away while the backup provider's circuit is open.
+    """
+    articles = _fetch_from_provider('backup', language, category, count, max_retries, summarize)
+    if articles:
+        return articles
+    
+    logger.error("Both primary and backup APIs failed")
+    return _unavailable_articles()
+
+async def get_news_from_news_api_async(language='en', category='general', count=20, max_retries=3, summarize=True):
+    """
+    Async version of get_news_from_news_api: NewsAPI is called with the
+    event loop's httpx.AsyncClient and the articles are summarized with
+    format_articles_async. Shares the budget and circuit breakers with the
+    sync version.
+    """
+    articles = await _fetch_from_provider_async('primary', language, category, count, max_retries, summarize)
+    if articles:
+        return articles
+    
+    logger.error(f"Failed to fetch news after {max_retries} attempts")
+    return await get_news_from_backup_api_async(language, category, count, summarize=summarize)
+
+async def get_news_from_backup_api_async(language='en', category='general', count=20, max_retries=3, summarize=True):
+    """Async version of get_news_from_backup_api"""
+    articles = await _fetch_from_provider_async('backup', language, category, count, max_retries, summarize)
+    if articles:
+        return articles
+    
+    logger.error("Both primary and backup APIs failed")
+    return _unavailable_articles()
+
+def _fetch_from_provider(provider, language, category, count, max_retries, summarize):
+    """
+    Retry loop against one news provider. Returns the formatted articles, or
+    None to move on to the next provider.
+    """
+    settings = _PROVIDERS[provider]
+    label = settings['label']
+    breaker = get_breaker(provider)
+    params = _provider_params(provider, language, category, count)
+    
+    retry_count = 0
     while retry_count < max_retries:
+        if not breaker.allow():
+            logger.warning(f"{label} circuit is open, failing over")
+            return None
+        # Gives back a half-open probe slot when the attempt recorded no outcome
         try:
-            url = f"https://newsapi.org/v2/top-headlines"
+            logger.info(f"Making request to {label}: {settings['url']}")
+            status, news_data = news_api_get(settings['url'], params, timeout=10)
             
-            params = {
-                'apiKey': NEWS_API_KEY,
-                'language': language,
-                'category': category,
-                'pageSize': count
-            }
-            
-            logger.info(f"Making request to News API: {url}")
-            response = requests.get(url, params=params, timeout=10)
-            
-            logger.info(f"News API response status: {response.status_code}")
-            
-            if response.status_code == 429:
-                logger.warning("Rate limited by News API")
-                retry_count += 1
-                time.sleep(retry_count * 2)
-                continue
-                
-            if response.status_code != 200:
-                logger.error(f"News API error: {response.text}")
+            outcome = _check_status(label, breaker, status)
+            if outcome == 'stop':
+                return None
+            if outcome == 'retry':
                 retry_count += 1
                 time.sleep(1)
                 continue
             
-            try:
-                news_data = response.json()
-                articles = news_data.get('articles', [])
-                
-                logger.info(f"Found {len(articles)} articles from News API")
-                
-                formatted_articles = []
-                for article in articles:
-                    # Get article details
-                    title = article.get('title', 'No title')
-                    description = article.get('description', 'No description available')
-                    url = article.get('url', '#')
-                    
-                    # Generate summary
-                    summary = summarize_article(url, description, language)
-                    
-                    formatted_articles.append({
-                        'title': title,
-                        'description': description,
-                        'summary': summary,
-                        'url': url,
-                        'source': article.get('source', {}).get('name', 'Unknown'),
-                        'image': article.get('urlToImage', '/static/img/news-placeholder.jpg'),
-                        'published_at': article.get('publishedAt', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                    })
-                    logger.info(f"Processed and summarized article: {title[:50]}...")
-                
-                if formatted_articles:
-                    logger.info(f"Returning {len(formatted_articles)} articles from News API")
-                    return formatted_articles
-                else:
-                    logger.warning("No articles extracted from response")
-                    retry_count += 1
-                    continue
-                    
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parse error: {str(e)}")
-                retry_count += 1
-                time.sleep(1)
-                continue
+            formatted_articles = format_articles(_response_articles(label, news_data), language, summarize)
+            if formatted_articles:
+                logger.info(f"Returning {len(formatted_articles)} articles from {label}")
+                return formatted_articles
+            logger.warning("No articles extracted from response")
+            retry_count += 1
                 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"News API request error: {str(e)}")
+        except (json.JSONDecodeError, httpx.HTTPError) as e:
+            _record_error(label, breaker, e)
             retry_count += 1
             time.sleep(1)
-            continue
+        
+        finally:
+            breaker.release()
     
-    logger.error(f"Failed to fetch news after {max_retries} attempts")
-    return get_news_from_backup_api(language, category, count)
+    return None
 
-def get_news_from_backup_api(language='en', category='general', count=20, max_retries=3):
-    """
-    Backup news API if the primary one fails
-    """
-    retry_count = 0
+async def _fetch_from_provider_async(provider, language, category, count, max_retries, summarize):
+    """Async version of _fetch_from_provider"""
+    settings = _PROVIDERS[provider]
+    label = settings['label']
+    breaker = get_breaker(provider)
+    params = _provider_params(provider, language, category, count)
     
+    retry_count = 0
     while retry_count < max_retries:
+        if not breaker.allow():
+            logger.warning(f"{label} circuit is open, failing over")
+            return None
+        # Also gives back the probe slot when the caller is cancelled mid-attempt
         try:
-            url = f"{NEWS_API_BACKUP['base_url']}/top-headlines"
+            logger.info(f"Making request to {label}: {settings['url']}")
+            status, news_data = await news_api_get_async(settings['url'], params, timeout=10)
             
-            params = {
-                'apiKey': NEWS_API_KEY,
-                'language': language,
-                'country': 'us',
-                'category': category,
-                'pageSize': count
-            }
-            
-            logger.info(f"Trying backup API: {url}")
-            response = requests.get(url, params=params, timeout=10)
-            
-            logger.info(f"Backup API response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error(f"Backup API error: {response.text}")
+            outcome = _check_status(label, breaker, status)
+            if outcome == 'stop':
+                return None
+            if outcome == 'retry':
                 retry_count += 1
-                time.sleep(1)
+                await asyncio.sleep(1)
                 continue
             
-            try:
-                news_data = response.json()
-                articles = news_data.get('articles', [])
-                
-                logger.info(f"Found {len(articles)} articles from backup API")
-                
-                formatted_articles = []
-                for article in articles:
-                    # Get article details
-                    title = article.get('title', 'No title')
-                    description = article.get('description', 'No description available')
-                    url = article.get('url', '#')
-                    
-                    # Generate summary
-                    summary = summarize_article(url, description, language)
-                    
-                    formatted_articles.append({
-                        'title': title,
-                        'description': description,
-                        'summary': summary,
-                        'url': url,
-                        'source': article.get('source', {}).get('name', 'Unknown'),
-                        'image': article.get('urlToImage', '/static/img/news-placeholder.jpg'),
-                        'published_at': article.get('publishedAt', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                    })
-                    logger.info(f"Processed and summarized backup article: {title[:50]}...")
-                
-                if formatted_articles:
-                    logger.info(f"Returning {len(formatted_articles)} articles from backup API")
-                    return formatted_articles
-                    
-            except json.JSONDecodeError as e:
-                logger.error(f"Backup API JSON parse error: {str(e)}")
-                retry_count += 1
-                continue
+            formatted_articles = await format_articles_async(_response_articles(label, news_data),
+                                                             language, summarize)
+            if formatted_articles:
+                logger.info(f"Returning {len(formatted_articles)} articles from {label}")
+                return formatted_articles
+            logger.warning("No articles extracted from response")
+            retry_count += 1
                 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Backup API request error: {str(e)}")
+        except (json.JSONDecodeError, httpx.HTTPError) as e:
+            _record_error(label, breaker, e)
             retry_count += 1
-            time.sleep(1)
-            continue
+            await asyncio.sleep(1)
+        
+        finally:
+            breaker.release()
     
-    logger.error("Both primary and backup APIs failed")
+    return None
+
+def _provider_params(provider, language, category, count):
+    """Query parameters of a top-headlines request to a provider"""
+    return dict(_PROVIDERS[provider]['params'], apiKey=NEWS_API_KEY, language=language,
+                category=category, pageSize=count)
+
+def _check_status(label, breaker, status):
+    """
+    Record a provider response on its breaker and say what to do next:
+    'ok' to use it, 'retry' to try again or 'stop' to move on to the next
+    provider
+    """
+    logger.info(f"{label} response status: {status}")
+    
+    # The shared limiter already answered from stored responses if it could,
+    # so there is nothing to wait for here
+    if status == RATE_LIMITED:
+        logger.warning(f"{label} budget exhausted and no stored response")
+        return 'stop'
+    
+    if status != 200:
+        breaker.record_failure(f"HTTP {status}")
+        return 'retry'
+    
+    breaker.record_success()
+    return 'ok'
+
+def _record_error(label, breaker, error):
+    """Record a failed request or an unreadable response on the provider's breaker"""
+    if isinstance(error, json.JSONDecodeError):
+        logger.error(f"{label} JSON parse error: {str(error)}")
+        breaker.record_failure('invalid JSON')
+    else:
+        logger.error(f"{label} request error: {str(error)}")
+        breaker.record_failure(type(error).__name__)
+
+def _response_articles(label, news_data):
+    """Raw articles of a successful provider response"""
+    articles = news_data.get('articles', [])
+    logger.info(f"Found {len(articles)} articles from {label}")
+    return articles
+
+def _unavailable_articles():
+    """Placeholder article shown when no news provider answered"""
     return [{
         'title': 'Unable to fetch news at this time',
         'description': 'Our news services are currently unavailable. Please try again later.',
@@ -218,14 +322,6 @@ def get_news(language='en', category='general', count=20):
     if not articles:
         logger.warning("Both primary and backup APIs failed to return articles")
         # Return a placeholder article
-        return [{
-            'title': 'Unable to fetch news at this time',
-            'description': 'Our news services are currently unavailable. Please try again later.',
-            'summary': 'Service unavailable',
-            'url': '#',
-            'source': 'System',
-            'image': '/static/img/news-placeholder.jpg',
-            'published_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }]
+        return _unavailable_articles()
         
     return articles
\ No newline at end of file
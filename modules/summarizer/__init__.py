@@ -1,17 +1,28 @@
 # modules/summarizer/__init__.py
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, Response, stream_with_context
+import json
 import time
-from config import SUPPORTED_LANGUAGES, NEWS_CATEGORIES
+import threading
+from config import (SUPPORTED_LANGUAGES, NEWS_CATEGORIES, INFERENCE_POOL_WORKERS, SUMMARY_LENGTH_LIMIT,
+                    SUMMARIZE_BATCH_MAX_CONCURRENT)
 
-from .model import load_t5_model, summarize_with_t5, summarize_with_gpt
+from .model import load_t5_model, summarize_with_t5, summarize_with_gpt, stream_with_t5
+from .policy import tier_decoding
 from modules.translation.service1 import translate_text
 from modules.audio.service3 import text_to_speech_openai
-from modules.utils.shared import summarize_text  # Import from shared utils
+from modules.utils.shared import summarize_text, summarize_texts, get_cached_summary, cache_summary  # Import from shared utils
+from modules.utils.shared import run_in_model_executor
+from modules.utils.http import run_on_io_loop
+from modules.utils.singleflight import get_single_flight, text_key
 
 class Summarizer:
     """Main summarizer class that handles text summarization"""
     def __init__(self):
-        self.model, self.tokenizer = load_t5_model()
+        # With the worker pool the model lives in the worker processes only
+        if INFERENCE_POOL_WORKERS > 0:
+            self.model, self.tokenizer = None, None
+        else:
+            self.model, self.tokenizer = load_t5_model()
         
     def summarize(self, text, language='en', max_length=150, min_length=50):
         """
@@ -41,6 +52,100 @@ class Summarizer:
 # Create blueprint
 summarizer_bp = Blueprint('summarizer', __name__, url_prefix='/summarize')
 
+def _clamp_lengths(max_length, min_length):
+    """Keep requested summary lengths within what the model is asked to generate"""
+    max_length = min(max(max_length, 10), SUMMARY_LENGTH_LIMIT)
+    min_length = max(min_length, 0)
+    
+    if min_length >= max_length:
+        min_length = max(10, max_length // 2)
+    
+    return max_length, min_length
+
+def _read_form_options():
+    """Read and validate language and summary length options from the form"""
+    language = request.form.get('language', 'en')
+    if language not in SUPPORTED_LANGUAGES:
+        language = 'en'
+        
+    max_length, min_length = _clamp_lengths(int(request.form.get('max_length', 150)),
+                                            int(request.form.get('min_length', 50)))
+    
+    return language, max_length, min_length
+
+def _read_decoding_options():
+    """Read the optional engine, quality tier and latency budget from the form"""
+    quality = request.form.get('quality') or None
+    budget = request.form.get('latency_budget_ms')
+    try:
+        latency_budget_ms = float(budget) if budget else None
+    except ValueError:
+        latency_budget_ms = None
+    engine = request.form.get('engine') or None
+    return {'quality': quality, 'latency_budget_ms': latency_budget_ms, 'engine': engine}
+
+def _read_form_input():
+    """
+    Extract the text to summarize from a URL, text or audio form submission
+    
+    Returns:
+        tuple: (original text, text to summarize)
+    
+    Raises:
+        ValueError: If the input is missing or can't be processed
+    """
+    input_type = request.form.get('input_type')
+    
+    if input_type not in ['url', 'text', 'audio']:
+        raise ValueError("Invalid input type. Please select URL, Text, or Audio.")
+    
+    if input_type == 'url':
+        from ..utils.web import fetch_article_text
+        url = request.form.get('url', '')
+        if not url.strip():
+            raise ValueError("URL is required.")
+            
+        article_text = fetch_article_text(url)
+        if not article_text:
+            raise ValueError("Failed to fetch content from URL.")
+            
+        return article_text, article_text
+        
+    if input_type == 'text':
+        from ..utils.text import process_text_input
+        text = request.form.get('text', '')
+        if not text.strip():
+            raise ValueError("Text input is required.")
+            
+        processed_text = process_text_input(text)
+        if not processed_text:
+            raise ValueError("Text is too short or invalid for summarization.")
+            
+        return text, processed_text
+    
+    from ..audio.service3 import transcribe_audio_with_whisper
+    import os
+    import uuid
+    from config import AUDIO_DIR
+    
+    if 'audio_file' not in request.files:
+        raise ValueError("No audio file uploaded.")
+        
+    audio_file = request.files['audio_file']
+    if audio_file.filename == '':
+        raise ValueError("No audio file selected.")
+        
+    temp_filename = f"temp_{uuid.uuid4().hex}.mp3"
+    temp_path = os.path.join(AUDIO_DIR, temp_filename)
+    audio_file.save(temp_path)
+    
+    transcribed_text = transcribe_audio_with_whisper(temp_path)
+    os.remove(temp_path)
+    if not transcribed_text:
+        raise ValueError("Failed to transcribe audio.")
+        
+    return transcribed_text, transcribed_text
+
 # Routes
 @summarizer_bp.route('/', methods=['GET', 'POST'])
 def summarize():
@@ -53,83 +158,22 @@ def summarize():
     audio_file = None
     original_text = None
     translated_text = None
+    language = 'en'
+    decoding = {}
     start_time = time.time()
     
     try:
-        input_type = request.form.get('input_type')
-        
-        if input_type not in ['url', 'text', 'audio']:
-            error = "Invalid input type. Please select URL, Text, or Audio."
-            raise ValueError(error)
-        
-        language = request.form.get('language', 'en')
-        if language not in SUPPORTED_LANGUAGES:
-            language = 'en'
-            
-        max_length = int(request.form.get('max_length', 150))
-        min_length = int(request.form.get('min_length', 50))
-        
-        if min_length >= max_length:
-            min_length = max(10, max_length // 2)
-        
-        # Process based on input type
-        if input_type == 'url':
-            from ..utils.web import fetch_article_text
-            url = request.form.get('url', '')
-            if not url.strip():
-                raise ValueError("URL is required.")
-                
-            article_text = fetch_article_text(url)
-            if not article_text:
-                raise ValueError("Failed to fetch content from URL.")
-                
-            original_text = article_text
-            text_for_processing = article_text
-            
-        elif input_type == 'text':
-            from ..utils.text import process_text_input
-            text = request.form.get('text', '')
-            if not text.strip():
-                raise ValueError("Text input is required.")
-                
-            processed_text = process_text_input(text)
-            if not processed_text:
-                raise ValueError("Text is too short or invalid for summarization.")
-                
-            original_text = text
-            text_for_processing = processed_text
-            
-        elif input_type == 'audio':
-            from ..audio.service3 import transcribe_audio_with_whisper
-            import os
-            import uuid
-            from config import AUDIO_DIR
-            
-            if 'audio_file' not in request.files:
-                raise ValueError("No audio file uploaded.")
-                
-            audio_file = request.files['audio_file']
-            if audio_file.filename == '':
-                raise ValueError("No audio file selected.")
-                
-            temp_filename = f"temp_{uuid.uuid4().hex}.mp3"
-            temp_path = os.path.join(AUDIO_DIR, temp_filename)
-            audio_file.save(temp_path)
-            
-            transcribed_text = transcribe_audio_with_whisper(temp_path)
-            if not transcribed_text:
-                raise ValueError("Failed to transcribe audio.")
-                
-            os.remove(temp_path)
-            original_text = transcribed_text
-            text_for_processing = transcribed_text
+        language, max_length, min_length = _read_form_options()
+        decoding = _read_decoding_options()
+        original_text, text_for_processing = _read_form_input()
         
         # Get summary
         summary, english_summary = summarize_text(
             text_for_processing, 
             language=language,
             max_length=max_length, 
-            min_length=min_length
+            min_length=min_length,
+            **decoding
         )
         
         if not summary:
@@ -137,8 +181,10 @@ def summarize():
             
         translated_text = english_summary
         
-        # Generate audio if summarization successful
-        audio_file = text_to_speech_openai(summary, language=language)
+        # Generate audio if summarization successful; identical summaries share one file
+        audio_file = get_single_flight('tts').do(
+            text_key(summary, language), text_to_speech_openai, summary, language=language
+        )
                 
     except ValueError as ve:
         error = str(ve)
@@ -156,7 +202,7 @@ def summarize():
         'audio_file': audio_file,
         'processing_time': processing_time,
         'language': SUPPORTED_LANGUAGES.get(language, language),
-        'engine': 'T5'
+        'engine': 'Extractive' if decoding.get('engine') == 'extractive' else 'T5'
     }
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -171,4 +217,285 @@ def summarize():
                          error=error, 
                          audio_file=audio_file if audio_file else None,
                          processing_time=processing_time,
-                         selected_language=language)
\ No newline at end of file
+                         selected_language=language)
+
+# Limits concurrent batch requests so a large batch can't crowd out interactive traffic
+_batch_slots = threading.BoundedSemaphore(SUMMARIZE_BATCH_MAX_CONCURRENT)
+
+def _read_batch_item(item):
+    """
+    Turn one batch item into ('text', text) or ('url', url)
+    
+    Raises:
+        ValueError: If the item is malformed
+    """
+    from config import SUMMARIZE_BATCH_MAX_TEXT_CHARS
+    from ..utils.web import validate_url
+    
+    if isinstance(item, str):
+        item = {'text': item}
+    if not isinstance(item, dict):
+        raise ValueError("Each item must be a string or an object with 'text' or 'url'.")
+    
+    if item.get('url'):
+        if not validate_url(item['url']):
+            raise ValueError("Invalid URL.")
+        return 'url', item['url']
+    
+    text = item.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("Item needs a non-empty 'text' or 'url'.")
+    if len(text) > SUMMARIZE_BATCH_MAX_TEXT_CHARS:
+        raise ValueError(f"Text is longer than {SUMMARIZE_BATCH_MAX_TEXT_CHARS} characters.")
+    return 'text', text
+
+@summarizer_bp.route('/batch', methods=['POST'])
+@run_on_io_loop
+async def summarize_batch():
+    """
+    Summarize many texts and/or URLs in one request.
+    
+    Expects JSON: {"items": ["text", {"text": ...}, {"url": ...}, ...],
+    "language", "max_length", "min_length", "quality"}. URLs are fetched
+    concurrently on the shared IO loop and the texts are summarized
+    with batched model calls in the model executor. Results come back in
+    item order, each with its own error if it failed.
+    """
+    import asyncio
+    from config import SUMMARIZE_BATCH_MAX_ITEMS, SUMMARIZE_BATCH_FETCH_WORKERS
+    from ..utils.web import fetch_article_text_async
+    from ..utils.text import process_text_input
+    
+    start_time = time.time()
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('items'), list):
+        return jsonify({'error': "Expected a JSON object with an 'items' array."}), 400
+    
+    items = payload['items']
+    if not items:
+        return jsonify({'error': 'No items to summarize.'}), 400
+    if len(items) > SUMMARIZE_BATCH_MAX_ITEMS:
+        return jsonify({'error': f"At most {SUMMARIZE_BATCH_MAX_ITEMS} items per request."}), 413
+    
+    language = payload.get('language', 'en')
+    if language not in SUPPORTED_LANGUAGES:
+        language = 'en'
+    try:
+        max_length = int(payload.get('max_length', 150))
+        min_length = int(payload.get('min_length', 50))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_length and min_length must be integers.'}), 400
+    max_length, min_length = _clamp_lengths(max_length, min_length)
+    quality = payload.get('quality') or None
+    
+    if not _batch_slots.acquire(blocking=False):
+        return jsonify({'error': 'Too many batch requests in progress. Please retry shortly.'}), 429
+    
+    try:
+        results = [{'index': i, 'success': False, 'summary': None, 'english_summary': None, 'url': None,
+                    'error': None}
+                   for i in range(len(items))]
+        sources = {}
+        for i, item in enumerate(items):
+            try:
+                sources[i] = _read_batch_item(item)
+            except ValueError as ve:
+                results[i]['error'] = str(ve)
+        
+        # Fetch all URLs concurrently
+        urls = {i: value for i, (kind, value) in sources.items() if kind == 'url'}
+        texts = {i: value for i, (kind, value) in sources.items() if kind == 'text'}
+        if urls:
+            fetch_slots = asyncio.Semaphore(SUMMARIZE_BATCH_FETCH_WORKERS)
+            
+            async def fetch(url):
+                async with fetch_slots:
+                    return await fetch_article_text_async(url)
+            
+            fetched = await asyncio.gather(*(fetch(url) for url in urls.values()))
+            for i, article_text in zip(urls, fetched):
+                results[i]['url'] = urls[i]
+                if article_text:
+                    texts[i] = article_text
+                else:
+                    results[i]['error'] = 'Failed to fetch content from URL.'
+        
+        ready = {}
+        for i, text in texts.items():
+            processed = process_text_input(text)
+            if processed:
+                ready[i] = processed
+            else:
+                results[i]['error'] = 'Text is too short or invalid for summarization.'
+        
+        indices = sorted(ready)
+        summaries = await run_in_model_executor(summarize_texts, [ready[i] for i in indices], language,
+                                                max_length, min_length, quality)
+        for i, (summary, english_summary) in zip(indices, summaries):
+            if summary:
+                results[i].update(success=True, summary=summary, english_summary=english_summary)
+            else:
+                results[i]['error'] = 'Failed to generate summary.'
+    finally:
+        _batch_slots.release()
+    
+    succeeded = sum(1 for r in results if r['success'])
+    return jsonify({
+        'results': results,
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'language': SUPPORTED_LANGUAGES.get(language, language),
+        'processing_time': round(time.time() - start_time, 2)
+    })
+
+def _sse(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@summarizer_bp.route('/stream', methods=['POST'])
+def summarize_stream():
+    """
+    Streaming variant of the summarizer route using server-sent events.
+    Emits 'token' events while the summary is generated, then 'summary',
+    'translation' (non-English only), 'audio' and a final 'done' event
+    carrying time_to_first_token_ms and total_ms.
+    """
+    start_time = time.time()
+    try:
+        language, max_length, min_length = _read_form_options()
+        original_text, text_for_processing = _read_form_input()
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    
+    def elapsed_ms():
+        return round((time.time() - start_time) * 1000, 1)
+    
+    def generate():
+        first_token_ms = None
+        yield _sse('start', {'elapsed_ms': elapsed_ms(), 'original_length': len(original_text)})
+        
+        try:
+            # Streaming decodes greedily, which is the 'fast' tier; a cached
+            # default-tier summary is at least as good, so it's tried first
+            streamed = tier_decoding(max_length, min_length, 'fast')
+            cached = (get_cached_summary(text_for_processing, language, max_length, min_length)
+                      or get_cached_summary(text_for_processing, language, max_length, min_length, streamed))
+            if cached:
+                summary, english_summary = cached
+                first_token_ms = elapsed_ms()
+                yield _sse('token', {'text': english_summary, 'elapsed_ms': first_token_ms})
+            else:
+                pieces = []
+                for piece in stream_with_t5(text_for_processing, max_length, min_length):
+                    if first_token_ms is None:
+                        first_token_ms = elapsed_ms()
+                    pieces.append(piece)
+                    yield _sse('token', {'text': piece, 'elapsed_ms': elapsed_ms()})
+                
+                english_summary = ''.join(pieces).strip()
+                summary = None
+                if not english_summary:
+                    # Model unavailable: fall back to the regular pipeline in one piece
+                    summary, english_summary = summarize_text(text_for_processing, language, max_length, min_length)
+                    first_token_ms = elapsed_ms()
+                    if not english_summary:
+                        yield _sse('error', {'error': 'Failed to generate summary.'})
+                        return
+                    yield _sse('token', {'text': english_summary, 'elapsed_ms': first_token_ms})
+            
+            yield _sse('summary', {'english_summary': english_summary, 'elapsed_ms': elapsed_ms()})
+            
+            if summary is None:
+                summary = english_summary
+                if language != 'en':
+                    summary = translate_text(english_summary, language) or english_summary
+                cache_summary(text_for_processing, language, max_length, min_length, summary, english_summary,
+                              streamed)
+            
+            if language != 'en':
+                yield _sse('translation', {
+                    'summary': summary,
+                    'language': SUPPORTED_LANGUAGES.get(language, language),
+                    'elapsed_ms': elapsed_ms()
+                })
+            
+            audio_file = text_to_speech_openai(summary, language=language)
+            yield _sse('audio', {'audio_file': audio_file, 'elapsed_ms': elapsed_ms()})
+        except Exception as e:
+            print(f"Streaming summarization error: {e}")
+            yield _sse('error', {'error': f"An error occurred: {str(e)}"})
+            return
+        
+        total_ms = elapsed_ms()
+        print(f"Streamed summary: first token {first_token_ms} ms, total {total_ms} ms")
+        yield _sse('done', {'time_to_first_token_ms': first_token_ms, 'total_ms': total_ms})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@summarizer_bp.route('/decoding')
+def decoding_stats():
+    """Report the decoding cost model and current batching load"""
+    from . import model
+    from .policy import cost_model
+    
+    engine = model.batching_engine
+    return jsonify({
+        'ms_per_token_by_beams': cost_model.snapshot(),
+        'batching': engine.get_stats() if engine is not None else None
+    })
+
+@summarizer_bp.route('/workers')
+def worker_stats():
+    """Report per-worker utilization of the inference pool"""
+    from . import workers
+    
+    pool = workers.inference_pool
+    if pool is None:
+        return jsonify({'enabled': False, 'workers': []})
+    return jsonify(dict(pool.get_stats(), enabled=True))
+
+@summarizer_bp.route('/hedging')
+def hedging_stats():
+    """Report hedged summarization counters"""
+    from config import HEDGE_ENABLED
+    from .hedging import get_hedged_summarizer
+    
+    if not HEDGE_ENABLED:
+        return jsonify({'enabled': False})
+    return jsonify(dict(get_hedged_summarizer().get_stats(), enabled=True))
+
+@summarizer_bp.route('/memory')
+def memory_usage():
+    """Report per-worker RSS and unique set size to verify model sharing"""
+    from .prefork import memory_report
+    return jsonify(memory_report())
+
+
+@summarizer_bp.route('/cache')
+def cache_stats():
+    """Report summary cache hit/miss counters"""
+    from modules.utils.cache import get_summary_cache
+    return jsonify(get_summary_cache().get_stats())
+
+@summarizer_bp.route('/http')
+def http_stats():
+    """Report connection reuse and DNS cache hits of the shared HTTP client and the article cache"""
+    from modules.utils.http import get_http_stats
+    from modules.utils.http_cache import get_http_cache
+    
+    cache = get_http_cache()
+    return jsonify(dict(get_http_stats(), response_cache=cache.get_stats() if cache else None))
+
+@summarizer_bp.route('/extraction')
+def extraction_stats():
+    """Report how often per-host extraction profiles were reused"""
+    from modules.utils.profiles import get_profile_store
+    return jsonify(get_profile_store().get_stats())
+
+@summarizer_bp.route('/coalescing')
+def coalescing_stats():
+    """Report how many fetch, summarize and audio calls joined an identical in-flight call"""
+    from modules.utils.singleflight import get_single_flight_stats
+    return jsonify(get_single_flight_stats())
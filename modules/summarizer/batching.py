@@ -0,0 +1,136 @@
+# modules/summarizer/batching.py
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A single summarize call waiting for its batch to run"""
+    __slots__ = ('text', 'options', 'event', 'result', 'error')
+
+    def __init__(self, text, options):
+        self.text = text
+        self.options = options
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+    @property
+    def key(self):
+        # Requests can only share a generate call if their options match
+        return tuple(sorted(self.options.items()))
+
+
+class BatchingEngine:
+    """
+    Collects concurrent summarize calls for a few milliseconds and runs them
+    as one padded batch through the model.
+
+    Args:
+        run_batch (callable): Function taking (texts, **options) and returning
+            a list of summaries in the same order
+        max_batch_size (int): Maximum number of texts per generate call
+        max_wait_ms (float): How long the first request in a batch may wait
+            for others to join
+    """
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=10):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats = {'requests': 0, 'batches': 0, 'errors': 0, 'largest_batch': 0}
+
+    def submit(self, text, timeout=None, **options):
+        """
+        Queue a text for summarization and block until its batch has run
+
+        Args:
+            text (str): Text to summarize
+            timeout (float): Seconds to wait for the result (None waits forever)
+            **options: Generation options such as max_length and min_length
+
+        Returns:
+            str: Generated summary or None if generation failed
+        """
+        self._ensure_worker()
+        pending = _PendingRequest(text, options)
+        self._queue.put(pending)
+
+        if not pending.event.wait(timeout):
+            logger.warning("Timed out waiting for batched summary")
+            return None
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def queue_depth(self):
+        """Number of requests waiting to be batched"""
+        return self._queue.qsize()
+
+    def get_stats(self):
+        """Return batching counters for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = self.queue_depth()
+        stats['average_batch_size'] = (
+            round(stats['requests'] / stats['batches'], 2) if stats['batches'] else 0
+        )
+        return stats
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='t5-batcher', daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        """Block for the first request, then gather more until the wait window closes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Group requests with identical generation options
+            groups = {}
+            for pending in batch:
+                groups.setdefault(pending.key, []).append(pending)
+
+            for group in groups.values():
+                self._run_group(group)
+
+    def _run_group(self, group):
+        options = group[0].options
+        try:
+            results = self.run_batch([p.text for p in group], **options)
+            for pending, result in zip(group, results):
+                pending.result = result
+        except Exception as e:
+            logger.error(f"Batched generation failed: {type(e).__name__}: {str(e)}")
+            for pending in group:
+                pending.error = e
+            with self._lock:
+                self._stats['errors'] += 1
+        finally:
+            with self._lock:
+                self._stats['requests'] += len(group)
+                self._stats['batches'] += 1
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], len(group))
+            for pending in group:
+                pending.event.set()
@@ -0,0 +1,161 @@
+# modules/summarizer/benchmark.py
+"""
+Compare T5 inference backends on the same texts.
+
+Each backend runs in its own process so resident memory is measured in
+isolation. Outputs are checked for parity against the PyTorch backend.
+
+Usage:
+    python -m modules.summarizer.benchmark [--texts FILE] [--backends torch,onnx,onnx-int8]
+"""
+import argparse
+import json
+import multiprocessing
+import statistics
+import time
+
+SAMPLE_TEXTS = [
+    "The city council approved a new budget on Tuesday that increases funding for public "
+    "transport and road repairs. Council members said the plan would reduce congestion in "
+    "the downtown area and improve bus reliability. Critics argued that the increase in "
+    "spending would require higher property taxes in the coming years, and several "
+    "residents spoke against the proposal during the public comment period.",
+    "Researchers have developed a battery that can be charged in under ten minutes while "
+    "retaining most of its capacity after thousands of cycles. The team said the design "
+    "uses a new electrode material that is cheaper to produce than existing alternatives. "
+    "They expect the technology to reach electric vehicles within five years, although "
+    "manufacturing at scale remains a challenge.",
+]
+
+
+def get_rss_mb(pid='self'):
+    """Return the resident set size of a process in megabytes"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    import resource
+    # ru_maxrss is the peak, in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# Model class each backend must load, so a fallback can't pass for the backend under test
+BACKEND_MODEL_CLASSES = {
+    'torch': 'T5ForConditionalGeneration',
+    'onnx': 'ORTModelForSeq2SeqLM',
+    'onnx-int8': 'ORTModelForSeq2SeqLM',
+}
+
+
+def _run_backend(backend, texts, max_length, min_length, results):
+    """Load one backend and time summarize_with_t5 over the texts (runs in a child process)"""
+    from modules.summarizer.model import load_t5_model, summarize_with_t5
+
+    rss_before = get_rss_mb()
+    start = time.perf_counter()
+    model, tokenizer = load_t5_model(backend)
+    load_time = time.perf_counter() - start
+    if model is None:
+        results[backend] = {'error': 'Model failed to load'}
+        return
+    model_class = type(model).__name__
+    if model_class != BACKEND_MODEL_CLASSES.get(backend):
+        results[backend] = {'error': f'Loaded {model_class} instead of the {backend} model'}
+        return
+
+    # Warm up so one-off graph setup isn't counted as latency
+    summarize_with_t5(texts[0], max_length, min_length, backend=backend)
+
+    summaries = []
+    latencies = []
+    for text in texts:
+        start = time.perf_counter()
+        summaries.append(summarize_with_t5(text, max_length, min_length, backend=backend))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    results[backend] = {
+        'summaries': summaries,
+        'load_seconds': round(load_time, 2),
+        'latency_ms_mean': round(statistics.mean(latencies), 1),
+        'latency_ms_p50': round(statistics.median(latencies), 1),
+        'latency_ms_max': round(max(latencies), 1),
+        'rss_mb': get_rss_mb(),
+        'model_rss_mb': round(get_rss_mb() - rss_before, 1),
+    }
+
+
+def token_overlap(reference, candidate):
+    """F1 overlap of whitespace tokens between two summaries"""
+    ref = (reference or '').lower().split()
+    cand = (candidate or '').lower().split()
+    if not ref or not cand:
+        return 0.0
+    common = sum(min(ref.count(t), cand.count(t)) for t in set(cand))
+    if common == 0:
+        return 0.0
+    precision = common / len(cand)
+    recall = common / len(ref)
+    return round(2 * precision * recall / (precision + recall), 3)
+
+
+def compare_backends(texts, backends=('torch', 'onnx', 'onnx-int8'), max_length=150, min_length=50):
+    """
+    Run each backend on the texts and check parity against PyTorch
+
+    Returns:
+        dict: Per-backend latency, memory and parity metrics
+    """
+    ctx = multiprocessing.get_context('spawn')
+    manager = ctx.Manager()
+    results = manager.dict()
+
+    for backend in backends:
+        proc = ctx.Process(target=_run_backend, args=(backend, texts, max_length, min_length, results))
+        proc.start()
+        proc.join()
+
+    report = {backend: dict(results.get(backend, {'error': 'Benchmark process failed'}))
+              for backend in backends}
+
+    reference = report.get('torch', {}).get('summaries')
+    for backend, data in report.items():
+        if not reference or 'summaries' not in data:
+            continue
+        pairs = list(zip(reference, data['summaries']))
+        data['parity_exact'] = round(sum(a == b for a, b in pairs) / len(pairs), 3)
+        data['parity_token_f1'] = round(statistics.mean(token_overlap(a, b) for a, b in pairs), 3)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark T5 inference backends')
+    parser.add_argument('--texts', help='File with one text per line (defaults to built-in samples)')
+    parser.add_argument('--backends', default='torch,onnx,onnx-int8')
+    parser.add_argument('--max-length', type=int, default=150)
+    parser.add_argument('--min-length', type=int, default=50)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts, encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    report = compare_backends(texts, args.backends.split(','), args.max_length, args.min_length)
+    for data in report.values():
+        data.pop('summaries', None)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+
+if __name__ == '__main__':
+    main()
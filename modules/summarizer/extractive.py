@@ -0,0 +1,131 @@
+# modules/summarizer/extractive.py
+"""
+Fast extractive summarization with NumPy.
+
+Sentences are scored by TF-IDF cosine similarity to the document centroid,
+computed over a sparse sentence-term matrix held as flat index arrays, so a
+100KB article is ranked in a few milliseconds without touching the model.
+"""
+import re
+import numpy as np
+
+from .longdoc import split_sentences
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'-]+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been
+before being below between both but by can could did do does doing down during each
+few for from further had has have having he her here hers him his how i if in into is
+it its itself just me more most my no nor not now of off on once only or other our
+out over own said same she should so some such than that the their them then there
+these they this those through to too under until up very was we were what when where
+which while who whom why will with would you your
+""".split())
+
+# Rough T5 sentencepiece tokens per whitespace word, used to honour token budgets
+TOKENS_PER_WORD = 1.3
+
+
+def score_sentences(sentences):
+    """
+    Score sentences by TF-IDF similarity to the document centroid
+
+    Args:
+        sentences (list): Sentence strings
+
+    Returns:
+        numpy.ndarray: One score per sentence
+    """
+    n = len(sentences)
+    vocab = {}
+    rows = []
+    cols = []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                cols.append(vocab.setdefault(word, len(vocab)))
+                rows.append(i)
+
+    if not cols:
+        return np.zeros(n)
+
+    # Collapse repeated (sentence, term) pairs into sparse term frequencies
+    v = len(vocab)
+    pairs, tf = np.unique(np.asarray(rows, dtype=np.int64) * v + np.asarray(cols, dtype=np.int64),
+                          return_counts=True)
+    r = pairs // v
+    c = pairs % v
+
+    df = np.bincount(c, minlength=v)
+    idf = np.log((1 + n) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(tf)) * idf[c]
+
+    # L2-normalise each sentence row
+    norms = np.sqrt(np.bincount(r, weights=weights * weights, minlength=n))
+    weights = weights / norms[r]
+
+    centroid = np.bincount(c, weights=weights, minlength=v)
+    centroid /= np.linalg.norm(centroid) or 1.0
+
+    scores = np.bincount(r, weights=weights * centroid[c], minlength=n)
+
+    # News puts the key facts first, so give leading sentences a mild boost
+    scores *= 1.0 + 0.5 / (1.0 + np.arange(n) / 5.0)
+    return scores
+
+
+def extract_salient(text, token_budget):
+    """
+    Keep the most salient sentences of a text up to a token budget,
+    in their original order
+
+    Args:
+        text (str): Text to compress
+        token_budget (int): Approximate number of model tokens to keep
+
+    Returns:
+        str: Compressed text
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return text
+
+    word_counts = np.array([len(s.split()) for s in sentences])
+    if word_counts.sum() * TOKENS_PER_WORD <= token_budget:
+        return text
+
+    scores = score_sentences(sentences)
+    # Fragments such as captions and bylines rarely make good summary sentences
+    scores[word_counts < 5] = -1.0
+
+    selected = []
+    used = 0.0
+    for i in np.argsort(-scores, kind='stable'):
+        cost = word_counts[i] * TOKENS_PER_WORD
+        # Skip sentences that don't fit, but always keep at least the best one
+        if selected and used + cost > token_budget:
+            continue
+        selected.append(i)
+        used += cost
+        if used >= token_budget:
+            break
+
+    return ' '.join(sentences[i] for i in sorted(selected))
+
+
+def summarize_extractive(text, max_length=150):
+    """
+    Standalone extractive summary for when the model is unavailable or the
+    latency budget is too tight for generation
+
+    Args:
+        text (str): Text to summarize
+        max_length (int): Maximum summary length in tokens
+
+    Returns:
+        str: Summary made of the highest-ranked sentences
+    """
+    if not text or not text.strip():
+        return None
+    return extract_salient(text.strip(), max_length)
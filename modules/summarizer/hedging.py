@@ -0,0 +1,201 @@
+# modules/summarizer/hedging.py
+"""
+Hedged summarization.
+
+T5 starts first. If it hasn't finished within a percentile of its recent
+latency, a secondary engine starts in parallel and the first good result
+wins. Secondary engines are looked up by name, so tests can register a
+local stub instead of calling a remote API.
+"""
+import importlib
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# Secondary engines by name: fn(text, max_length, min_length) -> summary or None
+_engines = {}
+
+
+def register_engine(name, fn):
+    """Register a summarization engine that can be used as the hedge"""
+    _engines[name] = fn
+
+
+def get_engine(name):
+    """
+    Look up a registered engine, or import one given as 'module:function'
+
+    Raises:
+        KeyError: If the engine is unknown
+    """
+    if name in _engines:
+        return _engines[name]
+    if ':' in name:
+        module_name, attr = name.split(':', 1)
+        fn = getattr(importlib.import_module(module_name), attr)
+        register_engine(name, fn)
+        return fn
+    raise KeyError(f"Unknown summarization engine: {name}")
+
+
+def _register_defaults():
+    from .model import summarize_with_gpt
+    from .extractive import summarize_extractive
+
+    # Engines registered earlier (e.g. test stubs) take precedence
+    _engines.setdefault('gpt', summarize_with_gpt)
+    _engines.setdefault('extractive', lambda text, max_length=150, min_length=50: summarize_extractive(text, max_length))
+
+
+class LatencyTracker:
+    """Keeps the most recent latencies and answers percentile queries"""
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms):
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def percentile(self, pct, min_samples=1):
+        """Return the pct-th percentile, or None with fewer than min_samples samples"""
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[index]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class HedgedSummarizer:
+    """
+    Races a secondary engine against slow primary calls
+
+    Args:
+        primary (callable): Primary engine, fn(text, max_length, min_length, **kwargs)
+        secondary (str): Name of the secondary engine
+        percentile (float): Primary latency percentile after which to hedge
+        min_samples (int): Samples needed before the percentile is trusted
+        default_delay_ms (float): Hedge delay used until enough samples exist
+        max_workers (int): Threads available for running engines
+    """
+    def __init__(self, primary, secondary='gpt', percentile=95, min_samples=20,
+                 default_delay_ms=5000, max_workers=16):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay_ms = default_delay_ms
+        self.tracker = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'hedged': 0, 'primary_wins': 0, 'secondary_wins': 0, 'failures': 0}
+
+    def hedge_delay_ms(self):
+        """Current delay before the secondary engine is started"""
+        delay = self.tracker.percentile(self.percentile, self.min_samples)
+        return self.default_delay_ms if delay is None else delay
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def summarize(self, text, max_length=150, min_length=50, **primary_kwargs):
+        """
+        Summarize with hedging
+
+        Returns:
+            tuple: (summary, engine name) where engine is 'primary' or the
+                   secondary engine's name; (None, None) if both failed
+        """
+        self._count('calls')
+        start = time.perf_counter()
+
+        def run_primary():
+            result = self.primary(text, max_length, min_length, **primary_kwargs)
+            # Only successful calls feed the latency distribution
+            if result:
+                self.tracker.record((time.perf_counter() - start) * 1000)
+            return result
+
+        primary = self._executor.submit(run_primary)
+        futures = {primary: 'primary'}
+
+        done, _ = wait([primary], timeout=self.hedge_delay_ms() / 1000.0)
+        if not done or not self._result(primary):
+            try:
+                secondary_fn = get_engine(self.secondary)
+            except (KeyError, ImportError, AttributeError) as e:
+                logger.error(f"Hedge engine unavailable: {str(e)}")
+                secondary_fn = None
+            if secondary_fn is not None:
+                self._count('hedged')
+                logger.info(f"Primary summarizer slow or failed, hedging with '{self.secondary}'")
+                futures[self._executor.submit(secondary_fn, text, max_length, min_length)] = self.secondary
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = self._result(future)
+                if result:
+                    # A running engine can't be interrupted; cancel() only stops
+                    # one that hasn't started, and the other result is discarded
+                    for other in pending:
+                        other.cancel()
+                    name = futures[future]
+                    self._count('primary_wins' if name == 'primary' else 'secondary_wins')
+                    return result, name
+
+        self._count('failures')
+        return None, None
+
+    @staticmethod
+    def _result(future):
+        try:
+            return future.result() if future.done() else None
+        except Exception as e:
+            logger.error(f"Summarization engine error: {type(e).__name__}: {str(e)}")
+            return None
+
+    def get_stats(self):
+        """Return hedging counters and the current hedge delay"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['secondary_engine'] = self.secondary
+        stats['hedge_delay_ms'] = round(self.hedge_delay_ms(), 1)
+        stats['latency_samples'] = len(self.tracker)
+        return stats
+
+
+# Shared hedged summarizer, created on first use when HEDGE_ENABLED
+hedged_summarizer = None
+_hedge_lock = threading.Lock()
+
+
+def get_hedged_summarizer():
+    """Return the shared hedged summarizer configured from config.py"""
+    global hedged_summarizer
+
+    with _hedge_lock:
+        if hedged_summarizer is None:
+            from config import (HEDGE_SECONDARY_ENGINE, HEDGE_PERCENTILE,
+                                HEDGE_MIN_SAMPLES, HEDGE_DEFAULT_DELAY_MS)
+            from .model import summarize_with_t5
+
+            _register_defaults()
+            hedged_summarizer = HedgedSummarizer(
+                summarize_with_t5,
+                secondary=HEDGE_SECONDARY_ENGINE,
+                percentile=HEDGE_PERCENTILE,
+                min_samples=HEDGE_MIN_SAMPLES,
+                default_delay_ms=HEDGE_DEFAULT_DELAY_MS
+            )
+    return hedged_summarizer
@@ -0,0 +1,139 @@
+# modules/summarizer/longdoc.py
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Split after sentence-ending punctuation followed by whitespace
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text):
+    """Split text into sentences on punctuation boundaries"""
+    return [s.strip() for s in _SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+def chunk_text(text, tokenizer, max_tokens=512, max_chunks=12):
+    """
+    Split text on sentence boundaries into chunks that fit a token budget.
+    Sentences are tokenized one at a time and splitting stops once
+    max_chunks chunks are full, so the tail of very long pages is never
+    tokenized at all.
+
+    Args:
+        text (str): Text to split
+        tokenizer: Tokenizer used to count tokens
+        max_tokens (int): Token budget per chunk
+        max_chunks (int): Maximum number of chunks to return
+
+    Returns:
+        list: Chunk strings in document order
+    """
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(' '.join(current))
+        current = []
+        current_tokens = 0
+
+    for sentence in split_sentences(text):
+        tokens = tokenizer.tokenize(sentence)
+
+        # A single sentence longer than the budget is hard-split by tokens
+        pieces = [(sentence, len(tokens))]
+        if len(tokens) > max_tokens:
+            pieces = [(tokenizer.convert_tokens_to_string(tokens[i:i + max_tokens]),
+                       len(tokens[i:i + max_tokens]))
+                      for i in range(0, len(tokens), max_tokens)]
+
+        for piece, piece_tokens in pieces:
+            if current and current_tokens + piece_tokens > max_tokens:
+                flush()
+                if len(chunks) >= max_chunks:
+                    return chunks
+            current.append(piece)
+            current_tokens += piece_tokens
+
+    if len(chunks) < max_chunks:
+        flush()
+    return chunks
+
+
+def reduce_long_document(text, max_length=150, min_length=50, max_chunks=None, max_depth=None,
+                         **generate_options):
+    """
+    Map step of long-document summarization. Chunks are summarized together
+    as one batch, and the partial summaries are concatenated. While they still
+    span more than one chunk, they are summarized again, up to max_depth levels.
+
+    Args:
+        text (str): Text to reduce
+        max_length (int): Maximum length of each partial summary
+        min_length (int): Minimum length of the final summary
+        max_chunks (int): Cap on chunks for this request (default from config)
+        max_depth (int): Maximum number of map levels (default from config)
+        **generate_options: Decoding options for the partial summaries
+            (num_beams, length_penalty, early_stopping)
+
+    Returns:
+        str: Reduced text for the final summary, or None on failure
+    """
+    from config import LONG_DOC_CHUNK_TOKENS, LONG_DOC_MAX_CHUNKS, LONG_DOC_MAX_DEPTH
+    from .model import load_t5_model, summarize_batch_with_t5
+
+    model, tokenizer = load_t5_model()
+    if model is None or tokenizer is None:
+        return None
+
+    max_chunks = max_chunks or LONG_DOC_MAX_CHUNKS
+    max_depth = max_depth or LONG_DOC_MAX_DEPTH
+
+    chunks = chunk_text(text, tokenizer, LONG_DOC_CHUNK_TOKENS, max_chunks)
+    if not chunks:
+        return None
+
+    depth = 0
+    while len(chunks) > 1 and depth < max_depth:
+        depth += 1
+        logger.info(f"Summarizing {len(chunks)} chunks (level {depth}/{max_depth})")
+
+        # Partial summaries only need to carry the gist of their chunk
+        partial_min = min(min_length, max_length // 2)
+        partials = summarize_batch_with_t5(chunks, max_length, partial_min, **generate_options)
+        combined = ' '.join(p for p in partials if p)
+        if not combined:
+            return None
+
+        chunks = chunk_text(combined, tokenizer, LONG_DOC_CHUNK_TOKENS, max_chunks)
+
+    # Anything still over budget after max_depth is truncated by the final call
+    return ' '.join(chunks)
+
+
+def summarize_long_document(text, max_length=150, min_length=50, max_chunks=None, max_depth=None,
+                            **generate_options):
+    """
+    Map-reduce summarization for texts longer than the model input window
+
+    Args:
+        text (str): Text to summarize
+        max_length (int): Maximum length of the final summary
+        min_length (int): Minimum length of the final summary
+        max_chunks (int): Cap on chunks for this request (default from config)
+        max_depth (int): Maximum number of map levels (default from config)
+        **generate_options: Decoding options for every generate call
+            (num_beams, length_penalty, early_stopping)
+
+    Returns:
+        str: Generated summary or None if the model is unavailable
+    """
+    from .model import summarize_batch_with_t5
+
+    reduced = reduce_long_document(text, max_length, min_length, max_chunks, max_depth, **generate_options)
+    if not reduced:
+        return None
+    return summarize_batch_with_t5([reduced], max_length, min_length, **generate_options)[0]
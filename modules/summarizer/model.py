@@ -1,5 +1,7 @@
 # modules/summarizer/model.py
 import importlib.util
+import threading
+import time
 
 # Check if torch and transformers are available
 torch_available = importlib.util.find_spec("torch") is not None
@@ -8,65 +10,296 @@ transformers_available = importlib.util.find_spec("transformers") is not None
 # Global variables for model and tokenizer
 t5_tokenizer = None
 t5_model = None
+t5_backend = None
 
-def load_t5_model():
-    """Load T5 model and tokenizer on demand"""
-    global t5_tokenizer, t5_model
+# Shared micro-batching engine, created on first use
+batching_engine = None
+_engine_lock = threading.Lock()
+
+def load_t5_model(backend=None):
+    """
+    Load T5 model and tokenizer on demand
+    
+    Args:
+        backend (str): 'torch', 'onnx' or 'onnx-int8' instead of T5_BACKEND;
+            a model already loaded with another backend is replaced
+    """
+    global t5_tokenizer, t5_model, t5_backend
     
     if not torch_available or not transformers_available:
         print("Warning: Required libraries (torch or transformers) not available")
         return None, None
         
-    if t5_tokenizer is None or t5_model is None:
+    if t5_tokenizer is None or t5_model is None or (backend and backend != t5_backend):
         try:
             import torch
             from transformers import T5ForConditionalGeneration, T5Tokenizer
-            from config import T5_MODEL_NAME
+            from config import T5_MODEL_NAME, T5_BACKEND, T5_SHARED_WEIGHTS
             
-            print("Loading T5 model and tokenizer...")
+            backend = backend or T5_BACKEND
+            print(f"Loading T5 model and tokenizer ({backend} backend)...")
             t5_tokenizer = T5Tokenizer.from_pretrained(T5_MODEL_NAME)
-            t5_model = T5ForConditionalGeneration.from_pretrained(T5_MODEL_NAME)
-            device = 'cuda' if torch.cuda.is_available() else 'cpu'
-            t5_model = t5_model.to(device)
+            
+            if backend in ('onnx', 'onnx-int8'):
+                from .onnx_backend import onnx_available, load_onnx_t5_model
+                if not onnx_available:
+                    raise RuntimeError("optimum[onnxruntime] is required for the ONNX backend")
+                t5_model = load_onnx_t5_model(T5_MODEL_NAME, quantize=backend == 'onnx-int8')
+                device = 'cpu'
+            elif T5_SHARED_WEIGHTS:
+                from .prefork import load_mmap_t5_model
+                t5_model = load_mmap_t5_model(T5_MODEL_NAME)
+                device = 'cpu'
+            else:
+                t5_model = T5ForConditionalGeneration.from_pretrained(T5_MODEL_NAME)
+                device = 'cuda' if torch.cuda.is_available() else 'cpu'
+                t5_model = t5_model.to(device)
+            t5_backend = backend
             print(f"T5 model loaded on {device}")
         except Exception as e:
             print(f"Failed to load T5 model: {e}")
+            t5_tokenizer, t5_model, t5_backend = None, None, None
             return None, None
             
     return t5_model, t5_tokenizer
 
-def summarize_with_t5(text, max_length=150, min_length=50):
-    """Summarize text using T5 model"""
-    try:
-        model, tokenizer = load_t5_model()
-        
-        if model is None or tokenizer is None:
-            print("T5 model not available, falling back to alternative method")
-            return None
-            
-        import torch
-            
-        input_text = "summarize: " + text
-        inputs = tokenizer.encode(input_text, return_tensors="pt", truncation=True, max_length=1024)
-        
-        if torch.cuda.is_available():
-            inputs = inputs.to('cuda')
+def summarize_batch_with_t5(texts, max_length=150, min_length=50, num_beams=4,
+                            length_penalty=2.0, early_stopping=True):
+    """Summarize several texts with a single padded T5 generate call"""
+    model, tokenizer = load_t5_model()
+    
+    if model is None or tokenizer is None:
+        return [None] * len(texts)
         
+    import torch
+    from config import T5_MAX_INPUT_TOKENS
+    
+    # Anything past this many characters would be truncated anyway, so
+    # don't pay to tokenize it
+    char_limit = T5_MAX_INPUT_TOKENS * 8
+    input_texts = ["summarize: " + text[:char_limit] for text in texts]
+    inputs = tokenizer(input_texts, return_tensors="pt", padding=True, truncation=True, max_length=T5_MAX_INPUT_TOKENS)
+    
+    inputs = inputs.to(model.device)
+    
+    start = time.perf_counter()
+    with torch.no_grad():
         summary_ids = model.generate(
-            inputs, 
+            inputs['input_ids'],
+            attention_mask=inputs['attention_mask'],
             max_length=max_length,
             min_length=min_length,
-            length_penalty=2.0,
-            num_beams=4,
-            early_stopping=True
+            length_penalty=length_penalty,
+            num_beams=num_beams,
+            early_stopping=early_stopping
         )
+    
+    from .policy import cost_model
+    cost_model.record(num_beams, max_length, (time.perf_counter() - start) * 1000)
+    
+    return tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+
+def get_batching_engine():
+    """Return the shared micro-batching engine, creating it on first use"""
+    global batching_engine
+    
+    with _engine_lock:
+        if batching_engine is None:
+            from config import T5_BATCH_MAX_SIZE, T5_BATCH_MAX_WAIT_MS
+            from .batching import BatchingEngine
+            
+            batching_engine = BatchingEngine(
+                summarize_batch_with_t5,
+                max_batch_size=T5_BATCH_MAX_SIZE,
+                max_wait_ms=T5_BATCH_MAX_WAIT_MS
+            )
+    return batching_engine
+
+def _precompress(text, max_chunks=None):
+    """Keep only the most salient sentences of inputs too long to summarize whole"""
+    from config import EXTRACTIVE_PRECOMPRESS_TOKENS, LONG_DOC_ENABLED, LONG_DOC_MAX_CHUNKS, LONG_DOC_CHUNK_TOKENS
+    
+    budget = EXTRACTIVE_PRECOMPRESS_TOKENS
+    if budget and LONG_DOC_ENABLED:
+        # Map-reduce already covers max_chunks windows; only cut what it would drop
+        budget = max(budget, (max_chunks or LONG_DOC_MAX_CHUNKS) * LONG_DOC_CHUNK_TOKENS)
+    
+    # Cheap character check first; most inputs are well under the budget
+    if not budget or len(text) <= budget * 4:
+        return text
+    
+    from .extractive import extract_salient
+    return extract_salient(text, budget)
+
+def summarize_with_t5(text, max_length=150, min_length=50, max_chunks=None,
+                      quality=None, latency_budget_ms=None, decoding=None, backend=None):
+    """
+    Summarize text using T5 model, switching to map-reduce for long documents.
+    Beam count and output length come from the decoding policy, which takes
+    the quality tier, the latency budget and the current load into account,
+    unless the caller already chose them and passes them as decoding.
+    With a backend the text is summarized in this process on that backend,
+    bypassing the worker pool and the batching engine (used by the benchmark).
+    """
+    try:
+        from config import T5_BATCHING_ENABLED, T5_MAX_INPUT_TOKENS, LONG_DOC_ENABLED, INFERENCE_POOL_TIMEOUT
+        from .extractive import summarize_extractive
+        from .policy import choose_decoding
+        from .workers import get_inference_pool
+        
+        # With the worker pool enabled the model lives in the workers, not here
+        pool = get_inference_pool() if torch_available and transformers_available and not backend else None
+        if pool is None:
+            model, tokenizer = load_t5_model(backend)
+            
+            if model is None or tokenizer is None:
+                print("T5 model not available, falling back to alternative method")
+                return None
+        
+        options = decoding or choose_decoding(max_length, min_length, quality, latency_budget_ms)
+        if options is None:
+            print("Latency budget too tight for generation, using extractive summary")
+            return summarize_extractive(text, max_length)
+        
+        text = _precompress(text, max_chunks)
         
-        summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        return summary
+        # Texts that still can't fit the input window are chunked instead of truncated
+        long_document = LONG_DOC_ENABLED and len(text) > T5_MAX_INPUT_TOKENS * 4
+        
+        if pool is not None:
+            if long_document:
+                return pool.submit(text, INFERENCE_POOL_TIMEOUT, long_document=True,
+                                   max_chunks=max_chunks, **options)
+            return pool.submit(text, INFERENCE_POOL_TIMEOUT, **options)
+        
+        if long_document:
+            from .longdoc import summarize_long_document
+            return summarize_long_document(text, max_chunks=max_chunks, **options)
+        
+        if T5_BATCHING_ENABLED and not backend:
+            return get_batching_engine().submit(text, **options)
+        
+        return summarize_batch_with_t5([text], **options)[0]
     except Exception as e:
         print(f"T5 summarization error: {e}")
         return None
 
+def summarize_many_with_t5(texts, max_length=150, min_length=50, quality=None, decoding=None):
+    """
+    Summarize many texts with batched generate calls of at most
+    T5_BATCH_MAX_SIZE texts each. Long documents still take the map-reduce
+    path one by one. decoding overrides the options the policy would choose.
+    
+    Returns:
+        list: One summary (or None) per text, in the same order
+    """
+    results = [None] * len(texts)
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        from config import T5_BATCH_MAX_SIZE, T5_MAX_INPUT_TOKENS, LONG_DOC_ENABLED, INFERENCE_POOL_TIMEOUT
+        from .policy import choose_decoding
+        from .workers import get_inference_pool
+        
+        pool = get_inference_pool() if torch_available and transformers_available else None
+        if pool is None:
+            model, tokenizer = load_t5_model()
+            
+            if model is None or tokenizer is None:
+                print("T5 model not available, falling back to alternative method")
+                return results
+        
+        # Without a latency budget the policy always returns decoding options
+        options = decoding or choose_decoding(max_length, min_length, quality)
+        
+        texts = [_precompress(text) for text in texts]
+        short = []
+        for i, text in enumerate(texts):
+            if LONG_DOC_ENABLED and len(text) > T5_MAX_INPUT_TOKENS * 4:
+                results[i] = summarize_with_t5(text, max_length, min_length, decoding=options)
+            else:
+                short.append(i)
+        
+        if pool is not None:
+            # Queue everything at once so the workers can drain it into batches
+            with ThreadPoolExecutor(max_workers=min(len(short), T5_BATCH_MAX_SIZE) or 1) as executor:
+                summaries = executor.map(lambda i: pool.submit(texts[i], INFERENCE_POOL_TIMEOUT, **options), short)
+                for i, summary in zip(short, summaries):
+                    results[i] = summary
+            return results
+        
+        for start in range(0, len(short), T5_BATCH_MAX_SIZE):
+            chunk = short[start:start + T5_BATCH_MAX_SIZE]
+            for i, summary in zip(chunk, summarize_batch_with_t5([texts[i] for i in chunk], **options)):
+                results[i] = summary
+    except Exception as e:
+        print(f"T5 batch summarization error: {e}")
+    return results
+
+def stream_with_t5(text, max_length=150, min_length=50):
+    """
+    Summarize text with greedy decoding, yielding decoded text as tokens are generated
+    
+    Yields:
+        str: Newly decoded text pieces
+    """
+    from .policy import tier_decoding
+    from .workers import get_inference_pool
+    
+    # With the worker pool the model lives in the workers, which can't stream;
+    # their greedy ('fast' tier) summary is yielded as a single piece
+    if torch_available and transformers_available and get_inference_pool() is not None:
+        summary = summarize_with_t5(text, max_length, min_length,
+                                    decoding=tier_decoding(max_length, min_length, 'fast'))
+        if summary:
+            yield summary
+        return
+    
+    model, tokenizer = load_t5_model()
+    
+    if model is None or tokenizer is None:
+        return
+        
+    import torch
+    from transformers import TextIteratorStreamer
+    from config import T5_MAX_INPUT_TOKENS, LONG_DOC_ENABLED
+    
+    text = _precompress(text)
+    
+    # Long documents are reduced first; only the final summary is streamed
+    if LONG_DOC_ENABLED and len(text) > T5_MAX_INPUT_TOKENS * 4:
+        from .longdoc import reduce_long_document
+        text = reduce_long_document(text, max_length, min_length) or text
+    
+    input_text = "summarize: " + text[:T5_MAX_INPUT_TOKENS * 8]
+    inputs = tokenizer(input_text, return_tensors="pt", truncation=True, max_length=T5_MAX_INPUT_TOKENS)
+    inputs = inputs.to(model.device)
+    
+    # Beam search can't emit tokens before it finishes, so streaming is greedy
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True)
+    
+    def generate():
+        try:
+            with torch.no_grad():
+                model.generate(
+                    inputs['input_ids'],
+                    attention_mask=inputs['attention_mask'],
+                    max_length=max_length,
+                    min_length=min_length,
+                    num_beams=1,
+                    streamer=streamer
+                )
+        except Exception as e:
+            print(f"T5 streaming error: {e}")
+            # Unblock the consumer if generate failed before finishing
+            streamer.end()
+    
+    thread = threading.Thread(target=generate, daemon=True)
+    thread.start()
+    for piece in streamer:
+        if piece:
+            yield piece
+    thread.join()
+
 def summarize_with_gpt(text, max_length=150, min_length=50):
     """Fallback summarization using GPT"""
     try:
@@ -0,0 +1,91 @@
+# modules/summarizer/onnx_backend.py
+import importlib.util
+import os
+
+# ONNX Runtime support comes from optimum, which is optional
+onnx_available = (importlib.util.find_spec("optimum") is not None
+                  and importlib.util.find_spec("onnxruntime") is not None)
+
+# File names written by the optimum seq2seq exporter
+ONNX_FILE_NAMES = ['encoder_model.onnx', 'decoder_model.onnx', 'decoder_with_past_model.onnx']
+
+
+def _export_dir(model_name):
+    from config import ONNX_MODEL_DIR
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace('/', '_'))
+
+
+def export_t5_to_onnx(model_name):
+    """
+    Export the T5 encoder/decoder to ONNX once and reuse the files afterwards
+
+    Args:
+        model_name (str): Hugging Face model name
+
+    Returns:
+        str: Directory containing the exported ONNX model
+    """
+    export_dir = _export_dir(model_name)
+    if os.path.exists(os.path.join(export_dir, ONNX_FILE_NAMES[0])):
+        return export_dir
+
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    print(f"Exporting {model_name} to ONNX in {export_dir}...")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+    model.save_pretrained(export_dir)
+    return export_dir
+
+
+def quantize_onnx_model(export_dir):
+    """
+    Apply dynamic int8 quantization to an exported ONNX model once
+
+    Args:
+        export_dir (str): Directory produced by export_t5_to_onnx
+
+    Returns:
+        str: Directory containing the quantized model
+    """
+    quantized_dir = export_dir + '-int8'
+    if os.path.exists(os.path.join(quantized_dir, 'encoder_model_quantized.onnx')):
+        return quantized_dir
+
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    print(f"Quantizing ONNX model to int8 in {quantized_dir}...")
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for file_name in ONNX_FILE_NAMES:
+        if not os.path.exists(os.path.join(export_dir, file_name)):
+            continue
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+        quantizer.quantize(save_dir=quantized_dir, quantization_config=qconfig)
+    return quantized_dir
+
+
+def load_onnx_t5_model(model_name, quantize=False):
+    """
+    Load T5 for generation through ONNX Runtime. The returned model exposes
+    the same generate() interface as the PyTorch model.
+
+    Args:
+        model_name (str): Hugging Face model name
+        quantize (bool): Use dynamic int8 quantized weights
+
+    Returns:
+        ORTModelForSeq2SeqLM: Model running on the CPU execution provider
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    model_dir = export_t5_to_onnx(model_name)
+    if not quantize:
+        return ORTModelForSeq2SeqLM.from_pretrained(model_dir)
+
+    quantized_dir = quantize_onnx_model(model_dir)
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        quantized_dir,
+        encoder_file_name='encoder_model_quantized.onnx',
+        decoder_file_name='decoder_model_quantized.onnx',
+        decoder_with_past_file_name='decoder_with_past_model_quantized.onnx'
+    )
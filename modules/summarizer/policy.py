@@ -0,0 +1,124 @@
+# modules/summarizer/policy.py
+import threading
+from config import (DECODING_DEFAULT_MS_PER_TOKEN, DECODING_DEFAULT_QUALITY,
+                    DECODING_LOAD_STEP_DOWN, T5_BATCH_MAX_SIZE)
+
+# Decoding settings per quality tier, best first
+QUALITY_TIERS = {
+    'high': {'num_beams': 4, 'length_penalty': 2.0, 'early_stopping': True},
+    'balanced': {'num_beams': 2, 'length_penalty': 2.0, 'early_stopping': True},
+    'fast': {'num_beams': 1, 'length_penalty': 1.0, 'early_stopping': False},
+}
+TIER_ORDER = ['high', 'balanced', 'fast']
+
+
+class CostModel:
+    """
+    Tracks the measured cost of recent generate calls as an exponentially
+    weighted average of milliseconds per output position for each beam count.
+
+    Args:
+        default_ms_per_token (float): Prior used before any call is measured
+        alpha (float): Weight of the newest measurement
+    """
+    def __init__(self, default_ms_per_token=8.0, alpha=0.2):
+        self.default_ms_per_token = default_ms_per_token
+        self.alpha = alpha
+        self._ms_per_token = {}
+        self._lock = threading.Lock()
+
+    def record(self, num_beams, max_length, elapsed_ms):
+        """Record one generate call that produced up to max_length positions"""
+        sample = elapsed_ms / max(1, max_length)
+        with self._lock:
+            current = self._ms_per_token.get(num_beams)
+            self._ms_per_token[num_beams] = (
+                sample if current is None else self.alpha * sample + (1 - self.alpha) * current
+            )
+
+    def estimate_ms(self, num_beams, max_length):
+        """Estimate the latency of a generate call in milliseconds"""
+        with self._lock:
+            per_token = self._ms_per_token.get(num_beams)
+            if per_token is None and self._ms_per_token:
+                # Scale from the closest measured beam count
+                measured = min(self._ms_per_token, key=lambda b: abs(b - num_beams))
+                per_token = self._ms_per_token[measured] * num_beams / measured
+        if per_token is None:
+            per_token = self.default_ms_per_token * num_beams
+        return per_token * max_length
+
+    def snapshot(self):
+        """Return the current milliseconds-per-token estimate for each beam count"""
+        with self._lock:
+            return {str(beams): round(ms, 2) for beams, ms in sorted(self._ms_per_token.items())}
+
+
+def _queue_depth():
+    """Requests waiting for the batching engine or the worker pool, if started"""
+    from . import model, workers
+    depth = 0
+    if model.batching_engine is not None:
+        depth += model.batching_engine.queue_depth()
+    if workers.inference_pool is not None:
+        depth += workers.inference_pool.queue_depth()
+    return depth
+
+
+def tier_decoding(max_length=150, min_length=50, quality=None):
+    """Generate options of a quality tier at the full requested length, ignoring load and budget"""
+    if quality not in QUALITY_TIERS:
+        quality = DECODING_DEFAULT_QUALITY
+    return dict(QUALITY_TIERS[quality], max_length=max_length, min_length=min(min_length, max_length))
+
+
+def decoding_id(options):
+    """Short stable identifier of a set of generate options, for cache keys"""
+    return (f"b{options['num_beams']}:lp{options['length_penalty']}:es{int(options['early_stopping'])}"
+            f":{options['max_length']}-{options['min_length']}")
+
+
+def choose_decoding(max_length=150, min_length=50, quality=None, latency_budget_ms=None):
+    """
+    Pick generate options for a request from its quality tier, latency
+    budget and the current load
+
+    Args:
+        max_length (int): Requested maximum summary length
+        min_length (int): Requested minimum summary length
+        quality (str): 'high', 'balanced' or 'fast' (default from config)
+        latency_budget_ms (float): Deadline for the generate call, if any
+
+    Returns:
+        dict: Options for model.generate (max_length, min_length, num_beams,
+              length_penalty, early_stopping), or None if even the cheapest
+              decoding is expected to miss the latency budget
+    """
+    if quality not in QUALITY_TIERS:
+        quality = DECODING_DEFAULT_QUALITY
+    tier_index = TIER_ORDER.index(quality)
+
+    # Step down one tier for every DECODING_LOAD_STEP_DOWN queued requests
+    depth = _queue_depth()
+    if DECODING_LOAD_STEP_DOWN:
+        tier_index = min(len(TIER_ORDER) - 1, tier_index + depth // DECODING_LOAD_STEP_DOWN)
+
+    if not latency_budget_ms:
+        return tier_decoding(max_length, min_length, TIER_ORDER[tier_index])
+
+    # Try the allowed tier, then cheaper tiers, then shorter outputs until the estimate fits
+    lengths = [max_length, max(min_length, (max_length * 3) // 4), max(min_length, max_length // 2)]
+    for length in lengths:
+        for tier in TIER_ORDER[tier_index:]:
+            beams = QUALITY_TIERS[tier]['num_beams']
+            per_call = cost_model.estimate_ms(beams, length)
+            # Queued requests ahead of us run in batches before ours
+            wait = per_call * (depth // max(1, T5_BATCH_MAX_SIZE))
+            if per_call + wait <= latency_budget_ms:
+                return tier_decoding(length, min_length, tier)
+
+    return None
+
+
+# Shared cost model fed by every generate call
+cost_model = CostModel(DECODING_DEFAULT_MS_PER_TOKEN)
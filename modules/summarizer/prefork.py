@@ -0,0 +1,146 @@
+# modules/summarizer/prefork.py
+"""
+Pre-fork model sharing.
+
+The master process loads T5 once from a memory-mapped weights file and
+freezes it before forking workers. Workers then read the same physical
+pages copy-on-write instead of each holding a private copy.
+"""
+import gc
+import os
+
+# Set in the master by prepare_for_fork() and inherited by forked workers
+master_pid = None
+
+
+def _weights_path(model_name):
+    from config import SHARED_WEIGHTS_DIR
+    return os.path.join(SHARED_WEIGHTS_DIR, model_name.replace('/', '_') + '.pt')
+
+
+def load_mmap_t5_model(model_name):
+    """
+    Load T5 with its weights memory-mapped from disk.
+    The weights file is written once from the pretrained checkpoint. After
+    that, parameters point straight into the mapped file, so they live in
+    the page cache and every process that maps the file shares them.
+
+    Args:
+        model_name (str): Hugging Face model name
+
+    Returns:
+        T5ForConditionalGeneration: Frozen model in eval mode
+    """
+    import torch
+    from transformers import T5Config, T5ForConditionalGeneration
+
+    path = _weights_path(model_name)
+    if not os.path.exists(path):
+        print(f"Writing shared weights file {path}...")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pretrained = T5ForConditionalGeneration.from_pretrained(model_name)
+        tmp_path = path + '.tmp'
+        torch.save(pretrained.state_dict(), tmp_path)
+        os.replace(tmp_path, path)
+        del pretrained
+
+    config = T5Config.from_pretrained(model_name)
+    model = T5ForConditionalGeneration(config)
+    state_dict = torch.load(path, mmap=True, weights_only=True, map_location='cpu')
+    # assign=True keeps the mmap-backed tensors instead of copying into fresh ones
+    model.load_state_dict(state_dict, assign=True)
+    model.tie_weights()
+    return freeze_model(model)
+
+
+def freeze_model(model):
+    """Put a model in read-only inference mode so nothing writes to its weights"""
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad_(False)
+    return model
+
+
+def prepare_for_fork():
+    """
+    Load and freeze the model in the master process before workers fork.
+    gc.freeze() moves every existing object to the permanent generation so
+    collections in the workers don't touch (and copy) the parent's pages.
+    """
+    global master_pid
+    from .model import load_t5_model
+
+    master_pid = os.getpid()
+    model, _ = load_t5_model()
+    if model is not None and hasattr(model, 'parameters'):
+        freeze_model(model)
+    gc.collect()
+    gc.freeze()
+
+
+def _read_smaps_rollup(pid):
+    """Return memory counters in kB from /proc/<pid>/smaps_rollup"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                    values[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        return None
+    return values
+
+
+def _child_pids(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def process_memory(pid):
+    """
+    Return RSS, PSS and unique set size (USS) of a process in megabytes.
+    USS is the memory that would be freed if the process exited, so it
+    stays small for workers that share the master's weights.
+    """
+    values = _read_smaps_rollup(pid)
+    if values is None:
+        return None
+
+    def mb(*keys):
+        return round(sum(values.get(k, 0) for k in keys) / 1024, 1)
+
+    return {
+        'pid': pid,
+        'rss_mb': mb('Rss'),
+        'pss_mb': mb('Pss'),
+        'uss_mb': mb('Private_Clean', 'Private_Dirty'),
+        'shared_mb': mb('Shared_Clean', 'Shared_Dirty'),
+    }
+
+
+def memory_report():
+    """
+    Report memory for the master and all of its workers
+
+    Returns:
+        dict: Master and per-worker memory, plus totals
+    """
+    # Not running under a pre-forking server: report this process only
+    if master_pid is None or master_pid == os.getpid():
+        master = None
+        workers = [m for m in [process_memory(os.getpid())] if m]
+    else:
+        master = process_memory(master_pid)
+        workers = [m for m in (process_memory(pid) for pid in _child_pids(master_pid)) if m]
+
+    return {
+        'master': master,
+        'current_pid': os.getpid(),
+        'workers': workers,
+        'total_rss_mb': round(sum(w['rss_mb'] for w in workers), 1),
+        'total_uss_mb': round(sum(w['uss_mb'] for w in workers), 1),
+    }
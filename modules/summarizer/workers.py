@@ -0,0 +1,259 @@
+# modules/summarizer/workers.py
+"""
+Multi-process inference worker pool.
+
+Each worker process is pinned to its own slice of CPU cores and sets its
+own torch thread count, so concurrent requests no longer oversubscribe the
+machine. Requests reach the workers over a bounded local queue.
+"""
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def _core_slices(num_workers):
+    """Split the cores this process may use into one contiguous slice per worker"""
+    try:
+        cores = sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = list(range(os.cpu_count() or 1))
+
+    per_worker = max(1, len(cores) // num_workers)
+    slices = []
+    for i in range(num_workers):
+        start = (i * per_worker) % len(cores)
+        slices.append(cores[start:start + per_worker] or cores)
+    return slices
+
+
+def _worker_main(index, cores, num_threads, max_batch_size, requests, results, busy, served):
+    """
+    Worker process: load the model once, then serve batches from the request
+    queue. Requests go straight to summarize_batch_with_t5 and
+    summarize_long_document, never through the pool or the in-process
+    batcher, and the thread count is set on torch directly.
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError as e:
+            logger.warning(f"Worker {index} could not pin to cores {cores}: {str(e)}")
+
+    import torch
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from modules.summarizer.model import load_t5_model, summarize_batch_with_t5
+    from modules.summarizer.longdoc import summarize_long_document
+
+    load_t5_model()
+
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+
+        # Drain whatever else is already queued into the same batch
+        batch = [item]
+        while len(batch) < max_batch_size:
+            try:
+                item = requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                requests.put(None)
+                break
+            batch.append(item)
+
+        groups = {}
+        for req_id, text, options in batch:
+            groups.setdefault(tuple(sorted(options.items())), []).append((req_id, text))
+
+        for key, group in groups.items():
+            options = dict(key)
+            start = time.perf_counter()
+            # (num_beams, max_length, elapsed ms) of a single generate call, for
+            # the parent's cost model; map-reduce runs several calls and isn't timed
+            timing = None
+            try:
+                if options.pop('long_document', False):
+                    summaries = [summarize_long_document(text, **options) for _, text in group]
+                else:
+                    summaries = summarize_batch_with_t5([text for _, text in group], **options)
+                    timing = (options.get('num_beams', 4), options.get('max_length', 150),
+                              (time.perf_counter() - start) * 1000)
+                outcome = [(req_id, summary, None) for (req_id, _), summary in zip(group, summaries)]
+            except Exception as e:
+                outcome = [(req_id, None, f"{type(e).__name__}: {str(e)}") for req_id, _ in group]
+
+            # The timing travels with the group's first result only, so it's recorded once
+            outcome = [result + (timing if i == 0 else None,) for i, result in enumerate(outcome)]
+
+            with busy.get_lock():
+                busy[index] += time.perf_counter() - start
+            with served.get_lock():
+                served[index] += len(group)
+            for result in outcome:
+                results.put(result)
+
+
+class InferencePool:
+    """
+    Pool of inference processes fed from a bounded queue
+
+    Args:
+        num_workers (int): Number of worker processes
+        threads_per_worker (int): torch threads per worker (0 splits the cores evenly)
+        queue_depth (int): Maximum number of queued requests before new ones are rejected
+        max_batch_size (int): Maximum texts a worker runs in one generate call
+    """
+    def __init__(self, num_workers, threads_per_worker=0, queue_depth=64, max_batch_size=8):
+        ctx = multiprocessing.get_context('spawn')
+        self.num_workers = num_workers
+        self._requests = ctx.Queue(maxsize=queue_depth)
+        self._results = ctx.Queue()
+        self._busy = ctx.Array('d', num_workers)
+        self._served = ctx.Array('l', num_workers)
+        self._ids = itertools.count()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._rejected = 0
+        self._started = time.time()
+
+        self._slices = _core_slices(num_workers)
+        self._processes = []
+        for i, cores in enumerate(self._slices):
+            threads = threads_per_worker or len(cores)
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(i, cores, threads, max_batch_size, self._requests, self._results,
+                      self._busy, self._served),
+                name=f't5-worker-{i}',
+                daemon=True
+            )
+            proc.start()
+            self._processes.append(proc)
+
+        self._collector = threading.Thread(target=self._collect, name='t5-pool-results', daemon=True)
+        self._collector.start()
+
+    def submit(self, text, timeout=None, **options):
+        """
+        Send a text to the pool and wait for its summary
+
+        Returns:
+            str: Generated summary, or None if the queue is full, the request
+                 timed out or the worker failed
+        """
+        req_id = next(self._ids)
+        event = threading.Event()
+        holder = {}
+        with self._lock:
+            self._pending[req_id] = (event, holder)
+
+        try:
+            self._requests.put_nowait((req_id, text, options))
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(req_id, None)
+                self._rejected += 1
+            logger.warning("Inference pool queue is full, rejecting request")
+            return None
+
+        if not event.wait(timeout):
+            with self._lock:
+                self._pending.pop(req_id, None)
+            logger.warning("Timed out waiting for inference pool")
+            return None
+        if holder.get('error'):
+            logger.error(f"Inference worker error: {holder['error']}")
+        return holder.get('summary')
+
+    def _collect(self):
+        from .policy import cost_model
+
+        while True:
+            req_id, summary, error, timing = self._results.get()
+            # Generate calls run in the workers, so their cost model never
+            # reaches the decoding policy in this process; feed it here
+            if timing is not None:
+                cost_model.record(*timing)
+            with self._lock:
+                pending = self._pending.pop(req_id, None)
+            if pending is not None:
+                event, holder = pending
+                holder['summary'] = summary
+                holder['error'] = error
+                event.set()
+
+    def queue_depth(self):
+        """Approximate number of queued requests"""
+        try:
+            return self._requests.qsize()
+        except NotImplementedError:
+            return len(self._pending)
+
+    def get_stats(self):
+        """Return per-worker utilization so the pool can be sized for a machine"""
+        elapsed = max(1e-9, time.time() - self._started)
+        workers = []
+        for i, proc in enumerate(self._processes):
+            workers.append({
+                'pid': proc.pid,
+                'alive': proc.is_alive(),
+                'cores': self._slices[i],
+                'served': self._served[i],
+                'busy_seconds': round(self._busy[i], 2),
+                'utilization': round(self._busy[i] / elapsed, 3),
+            })
+        with self._lock:
+            in_flight = len(self._pending)
+        return {
+            'workers': workers,
+            'queue_depth': self.queue_depth(),
+            'in_flight': in_flight,
+            'rejected': self._rejected,
+            'uptime_seconds': round(elapsed, 1),
+        }
+
+    def shutdown(self):
+        """Ask every worker to exit and wait for them"""
+        for proc in self._processes:
+            if proc.is_alive():
+                try:
+                    self._requests.put(None, timeout=1)
+                except queue.Full:
+                    proc.terminate()
+        for proc in self._processes:
+            proc.join(timeout=10)
+
+
+# Shared pool, started on first use when INFERENCE_POOL_WORKERS > 0
+inference_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_inference_pool():
+    """Return the shared inference pool, or None if the pool is disabled"""
+    global inference_pool
+    from config import (INFERENCE_POOL_WORKERS, INFERENCE_POOL_THREADS,
+                        INFERENCE_POOL_QUEUE_DEPTH, T5_BATCH_MAX_SIZE)
+
+    if INFERENCE_POOL_WORKERS <= 0:
+        return None
+
+    with _pool_lock:
+        if inference_pool is None:
+            inference_pool = InferencePool(
+                INFERENCE_POOL_WORKERS,
+                threads_per_worker=INFERENCE_POOL_THREADS,
+                queue_depth=INFERENCE_POOL_QUEUE_DEPTH,
+                max_batch_size=T5_BATCH_MAX_SIZE
+            )
+    return inference_pool
@@ -1,6 +1,13 @@
 # modules/translation/service.py
+import asyncio
+import html
+import re
 from mtranslate import translate
 
+# Endpoint and result markup used by mtranslate, for the async client below
+TRANSLATE_URL = "https://translate.google.com/m"
+RESULT_PATTERN = re.compile(r'(?s)class="(?:t0|result-container)">(.*?)<')
+
 def translate_text(text, target_lang, src_lang='auto'):
     """Translate text using Google Translate"""
     try:
@@ -22,6 +29,35 @@ def translate_text(text, target_lang, src_lang='auto'):
         print(f"Translation error: {e}")
         return None
 
+async def translate_text_async(text, target_lang, src_lang='auto'):
+    """Translate text using Google Translate on the event loop's httpx.AsyncClient"""
+    from modules.utils.http import get_async_http_client
+    
+    try:
+        if not text or not text.strip():
+            return None
+        
+        # Split long text into chunks, translated concurrently
+        max_chunk_length = 4000
+        chunks = [text[i:i+max_chunk_length] for i in range(0, len(text), max_chunk_length)]
+        
+        async def translate_chunk(chunk):
+            response = await get_async_http_client().get(
+                TRANSLATE_URL,
+                params={'tl': target_lang, 'sl': src_lang, 'q': chunk},
+                headers={'User-Agent': 'Mozilla/4.0 (compatible; MSIE 6.0; Windows NT 5.1; SV1)'}
+            )
+            response.raise_for_status()
+            match = RESULT_PATTERN.search(response.text)
+            return html.unescape(match.group(1)) if match else ''
+        
+        translated_chunks = [c for c in await asyncio.gather(*map(translate_chunk, chunks)) if c]
+        
+        return ' '.join(translated_chunks) if translated_chunks else None
+    except Exception as e:
+        print(f"Translation error: {e}")
+        return None
+
 def detect_language(text):
     """Detect the language of a text"""
     try:
@@ -0,0 +1,154 @@
+# modules/utils/cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different copies of a text share a key"""
+    return ' '.join(text.split())
+
+
+def make_summary_key(text, language, max_length, min_length, model_id, decoding_id=''):
+    """Content-addressed cache key for a summarization request and the decoding that answered it"""
+    digest = hashlib.sha256()
+    for part in (normalize_text(text), language, str(max_length), str(min_length), model_id, decoding_id):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """
+    Two-tier cache for summaries: an in-memory LRU bounded by bytes and an
+    optional SQLite file that survives restarts. Entries expire after ttl
+    seconds in both tiers.
+
+    Args:
+        max_bytes (int): Memory budget for cached values
+        ttl (float): Seconds before an entry expires
+        disk_path (str): SQLite file for the persistent tier (None disables it)
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=6 * 3600, disk_path=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+        self._db = None
+
+        if disk_path:
+            try:
+                os.makedirs(os.path.dirname(disk_path), exist_ok=True)
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute(
+                    'CREATE TABLE IF NOT EXISTS summaries '
+                    '(key TEXT PRIMARY KEY, summary TEXT, english_summary TEXT, created REAL)'
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Summary cache disk tier unavailable: {str(e)}")
+                self._db = None
+
+    @staticmethod
+    def _size(key, value):
+        return len(key) + sum(len(v.encode('utf-8')) for v in value if v)
+
+    def get(self, key):
+        """
+        Look up a cached (summary, english_summary) pair
+
+        Returns:
+            tuple: Cached value or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                self._remove(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT summary, english_summary, created FROM summaries WHERE key = ?', (key,)
+                ).fetchone()
+                if row and now - row[2] <= self.ttl:
+                    value = (row[0], row[1])
+                    self._store(key, value, row[2])
+                    self._stats['disk_hits'] += 1
+                    return value
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        """Cache a (summary, english_summary) pair in both tiers"""
+        created = time.time()
+        with self._lock:
+            self._store(key, value, created)
+            self._stats['sets'] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)',
+                        (key, value[0], value[1], created)
+                    )
+                    self._db.execute('DELETE FROM summaries WHERE created < ?', (created - self.ttl,))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to write summary cache entry: {str(e)}")
+
+    def _store(self, key, value, created):
+        if key in self._entries:
+            self._remove(key)
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, created)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= self._size(key, value)
+
+    def get_stats(self):
+        """Return hit/miss counters and memory usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0
+        stats['disk_enabled'] = self._db is not None
+        return stats
+
+
+# Shared cache used by summarize_text, created on first use
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Return the process-wide summary cache"""
+    global _summary_cache
+
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            from config import SUMMARY_CACHE_MAX_BYTES, SUMMARY_CACHE_TTL, SUMMARY_CACHE_DB
+            _summary_cache = SummaryCache(SUMMARY_CACHE_MAX_BYTES, SUMMARY_CACHE_TTL, SUMMARY_CACHE_DB)
+    return _summary_cache
@@ -0,0 +1,469 @@
+# modules/utils/extract.py
+"""
+Article text extraction.
+
+Two engines turn a fetched HTML page into article text:
+
+- 'bs4': the original BeautifulSoup strategy chain (article tag, class
+  hints, main content tags, body)
+- 'lxml': parses with lxml and scores candidate blocks in a single pass over
+  the paragraphs, by text density, link density and class/id hints, then
+  returns the best block together with siblings that score well
+
+The engine is chosen with ARTICLE_EXTRACTOR in config.py. Given the host a
+page came from, both engines first try the strategy or selector that worked
+for that site before (see modules/utils/profiles.py).
+
+Usage:
+    python -m modules.utils.extract DIR [--output FILE]
+
+DIR holds saved pages as NAME.html, optionally with the expected text as
+NAME.txt, and the engines are compared on speed and text quality.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import time
+from .profiles import get_profile_store
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('lxml', 'bs4')
+
+# Elements that never hold article text
+JUNK_TAGS = ('script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'meta', 'noscript',
+             'form', 'button', 'svg')
+
+# Elements whose text counts towards their ancestors' score
+PARAGRAPH_TAGS = ('p', 'pre', 'blockquote', 'li', 'h2', 'h3', 'td')
+
+# Tags a learned selector may name
+SELECTOR_TAG = re.compile(r'[a-z][a-z0-9]*')
+
+POSITIVE_HINTS = re.compile(r'article|content|post|entry|story|text|body|main', re.I)
+NEGATIVE_HINTS = re.compile(r'comment|footer|sidebar|nav|menu|promo|related|share|social|sponsor'
+                            r'|advert|\bad\b|banner|subscribe|newsletter|cookie|popup|widget', re.I)
+
+
+def _class_weight(element):
+    hints = ' '.join(filter(None, (element.get('class'), element.get('id'))))
+    if not hints:
+        return 0.0
+    weight = 0.0
+    if POSITIVE_HINTS.search(hints):
+        weight += 25.0
+    if NEGATIVE_HINTS.search(hints):
+        weight -= 25.0
+    return weight
+
+
+def extract_with_lxml(html, host=None):
+    """
+    Extract article text by scoring candidate blocks in one pass
+
+    Each paragraph adds a score, from its length and comma count, to its
+    parent and (half) to its grandparent. A candidate's final score is
+    discounted by the share of its text that sits inside links and adjusted
+    by class/id hints.
+
+    Returns:
+        str: Text of the best block, or None
+    """
+    import lxml.etree
+    import lxml.html
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        root = lxml.html.document_fromstring(html.encode('utf-8'),
+                                             parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except lxml.etree.ParserError as e:
+        logger.warning(f"lxml could not parse page: {str(e)}")
+        return None
+
+    return _extract_from_tree(root, host)
+
+
+def _extract_from_tree(root, host=None):
+    """
+    Score the blocks of a parsed lxml.html document and return the article
+    text. With a host, its learned selector is tried before scoring.
+    """
+    import lxml.etree
+    from config import EXTRACTION_MIN_CHARS
+
+    # Removing boilerplate subtrees runs in C and keeps them out of the walk below
+    lxml.etree.strip_elements(root, *JUNK_TAGS, lxml.etree.Comment, with_tail=False)
+
+    store = get_profile_store() if host else None
+    selector = store.get(host, 'lxml') if store else None
+    if selector:
+        text = _select_lxml(root, selector)
+        if text and len(text) >= EXTRACTION_MIN_CHARS:
+            logger.info(f"Content extracted with learned selector '{selector}' for {host}")
+            store.hit(host)
+            return text
+        store.miss(host)
+
+    scores = {}
+    text_lengths = {}
+    link_lengths = {}
+    for paragraph in root.iter(*PARAGRAPH_TAGS):
+        text = paragraph.text_content().strip()
+        length = len(text)
+        if length < 25:
+            continue
+        link_length = sum(len(a.text_content()) for a in paragraph.iter('a'))
+        score = 1.0 + text.count(',') + min(length / 100.0, 3.0)
+
+        for element, share in ((paragraph.getparent(), 1.0), (_grandparent(paragraph), 0.5)):
+            if element is None:
+                continue
+            if element not in scores:
+                scores[element] = _class_weight(element)
+                text_lengths[element] = 0
+                link_lengths[element] = 0
+            scores[element] += score * share
+            text_lengths[element] += length
+            link_lengths[element] += link_length
+
+    # Blocks made mostly of links (menus, related stories) lose their score
+    for element in scores:
+        scores[element] *= 1.0 - link_lengths[element] / max(1, text_lengths[element])
+
+    best = max(scores, key=scores.get, default=None)
+    if best is None or scores[best] <= 0:
+        body = root.find('body')
+        blocks = [body if body is not None else root]
+    else:
+        # Articles split over sibling blocks: keep siblings that score well too
+        threshold = max(10.0, scores[best] * 0.2)
+        parent = best.getparent()
+        siblings = list(parent) if parent is not None else [best]
+        blocks = [el for el in siblings if el is best or scores.get(el, 0.0) >= threshold]
+
+    text = _block_text(blocks)
+    # Only a single block can be found again by its selector on the next page
+    if store and text and len(text) >= EXTRACTION_MIN_CHARS and blocks == [best]:
+        selector = _selector_for(best)
+        if selector:
+            store.learn(host, 'lxml', selector)
+    return text or None
+
+
+def _block_text(blocks):
+    return '\n'.join(t.strip() for block in blocks for t in block.itertext() if t.strip())
+
+
+def _selector_for(element):
+    """Describe element as 'tag#id', 'tag.class list' or a semantic tag, or None"""
+    tag = element.tag
+    if not isinstance(tag, str) or not SELECTOR_TAG.fullmatch(tag):
+        return None
+    if element.get('id'):
+        return f"{tag}#{element.get('id')}"
+    if element.get('class') and element.get('class').split():
+        return f"{tag}.{' '.join(element.get('class').split())}"
+    if tag in ('article', 'main'):
+        return tag
+    return None
+
+
+def _select_lxml(root, selector):
+    """Return the text of the first element matching a _selector_for() selector"""
+    match = re.match(r'([a-z0-9]+)(?:([#.])(.+))?$', selector)
+    if not match:
+        return None
+    tag, kind, value = match.groups()
+    if kind == '#':
+        elements = root.xpath(f'//{tag}[@id=$value]', value=value)
+    elif kind == '.':
+        elements = root.xpath(f'//{tag}[normalize-space(@class)=$value]', value=value)
+    else:
+        elements = root.xpath(f'//{tag}')
+    return _block_text(elements[:1]) if elements else None
+
+
+def _grandparent(element):
+    parent = element.getparent()
+    return parent.getparent() if parent is not None else None
+
+
+# The BeautifulSoup strategies, in the order they are tried
+BS4_CLASS_HINTS = ('content', 'article', 'post', 'entry', 'story', 'text', 'body')
+BS4_STRATEGIES = ('article',) + tuple(f'class:{hint}' for hint in BS4_CLASS_HINTS) + ('main', 'body')
+
+
+def _bs4_strategy(soup, strategy):
+    """Run one BeautifulSoup strategy and return its text or None"""
+    if strategy == 'article':
+        # Look for article tag
+        element = soup.find('article')
+    elif strategy.startswith('class:'):
+        # Common article content classes
+        class_hint = strategy[len('class:'):]
+        elements = soup.find_all(class_=lambda c: c and class_hint.lower() in c.lower())
+        return max([e.get_text(separator='\n', strip=True) for e in elements], key=len, default=None)
+    elif strategy == 'main':
+        # Look for main content tags
+        element = soup.find('main') or soup.find(id='content') or soup.find(id='main')
+    else:
+        # Fallback to body
+        element = soup.body
+    return element.get_text(separator='\n', strip=True) if element else None
+
+
+def extract_with_bs4(html, host=None):
+    """
+    Extract article text with the original BeautifulSoup strategy chain.
+    With a host, its learned strategy is tried before the chain.
+
+    Returns:
+        str: Extracted text, or None
+    """
+    from bs4 import BeautifulSoup
+    from config import EXTRACTION_MIN_CHARS
+
+    # Parse HTML with BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove unwanted elements
+    for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'meta', 'noscript']):
+        element.decompose()
+
+    store = get_profile_store() if host else None
+    learned = store.get(host, 'bs4') if store else None
+    if learned in BS4_STRATEGIES:
+        content = _bs4_strategy(soup, learned)
+        if content and len(content) >= EXTRACTION_MIN_CHARS:
+            logger.info(f"Content extracted with learned strategy '{learned}' for {host}")
+            store.hit(host)
+            return content
+        store.miss(host)
+
+    # Try the selection strategies in order until one finds content
+    for strategy in BS4_STRATEGIES:
+        if strategy == learned:
+            continue
+        content = _bs4_strategy(soup, strategy)
+        if content:
+            logger.info(f"Content extracted with strategy '{strategy}'")
+            if store and len(content) >= EXTRACTION_MIN_CHARS:
+                store.learn(host, 'bs4', strategy)
+            return content
+    return None
+
+
+def extract_article_text(html, engine=None, host=None):
+    """
+    Extract article text from an HTML page
+
+    Args:
+        html (str): Page source
+        engine (str): 'lxml' or 'bs4' (default from ARTICLE_EXTRACTOR)
+        host (str): Site the page came from, to use and update its extraction profile
+
+    Returns:
+        str: Extracted text, or None
+    """
+    if engine is None:
+        from config import ARTICLE_EXTRACTOR
+        engine = ARTICLE_EXTRACTOR
+
+    if engine == 'lxml':
+        try:
+            content = extract_with_lxml(html, host)
+            if content:
+                return content
+        except ImportError:
+            logger.warning("lxml not available, using the BeautifulSoup extractor")
+        # Pages lxml can't make sense of still get the original chain
+    return extract_with_bs4(html, host)
+
+
+def _pull_parser(encoding):
+    import lxml.etree
+    import lxml.html
+
+    parser = lxml.etree.HTMLPullParser(events=('end',), tag=PARAGRAPH_TAGS, encoding=encoding,
+                                       remove_comments=True)
+    # Build lxml.html elements, as document_fromstring does
+    parser.set_element_class_lookup(lxml.html.HtmlElementClassLookup())
+    return parser
+
+
+class StreamingExtractor:
+    """
+    Incremental article extraction for pages read in chunks
+
+    With the lxml engine the page is parsed as chunks arrive, and feed()
+    reports when the paragraphs seen so far hold enough text to stop
+    downloading. The bs4 engine only buffers the chunks.
+
+    Args:
+        engine (str): 'lxml' or 'bs4' (default from ARTICLE_EXTRACTOR)
+        encoding (str): Charset from the response headers, if any
+        enough_chars (int): Paragraph text after which feed() returns True
+            (default from ARTICLE_EARLY_STOP_CHARS; 0 never stops early)
+        host (str): Site the page comes from, for its extraction profile
+    """
+    def __init__(self, engine=None, encoding=None, enough_chars=None, host=None):
+        from config import ARTICLE_EXTRACTOR, ARTICLE_EARLY_STOP_CHARS
+
+        self.engine = engine or ARTICLE_EXTRACTOR
+        self.encoding = encoding
+        self.enough_chars = ARTICLE_EARLY_STOP_CHARS if enough_chars is None else enough_chars
+        self.host = host
+        self.bytes_read = 0
+        self.paragraph_chars = 0
+        self._chunks = []
+        self._parser = None
+
+        if self.engine == 'lxml':
+            try:
+                self._parser = _pull_parser(encoding)
+            except ImportError:
+                logger.warning("lxml not available, using the BeautifulSoup extractor")
+                self.engine = 'bs4'
+            except LookupError:
+                # Unknown charset in the headers; let the parser sniff it instead
+                self._parser = _pull_parser(None)
+
+    def feed(self, chunk):
+        """
+        Add a chunk of the page
+
+        Returns:
+            bool: True once enough article text has arrived to stop reading
+        """
+        self.bytes_read += len(chunk)
+        if self._parser is None:
+            self._chunks.append(chunk)
+            return False
+
+        self._parser.feed(chunk)
+        for _, element in self._parser.read_events():
+            self.paragraph_chars += len(element.text_content().strip())
+        return bool(self.enough_chars) and self.paragraph_chars >= self.enough_chars
+
+    def result(self):
+        """Finish parsing and return the extracted text, or None"""
+        if self._parser is None:
+            html = b''.join(self._chunks).decode(self.encoding or 'utf-8', errors='replace')
+            self._chunks = []
+            return extract_with_bs4(html, self.host)
+
+        import lxml.etree
+        import lxml.html
+        try:
+            root = self._parser.close()
+        except lxml.etree.XMLSyntaxError as e:
+            logger.warning(f"lxml could not parse page: {str(e)}")
+            return None
+        if root is None:
+            return None
+        content = _extract_from_tree(root, self.host)
+        if content:
+            return content
+        # Pages lxml can't make sense of still get the original chain
+        return extract_with_bs4(lxml.html.tostring(root, encoding='unicode'), self.host)
+
+
+def _token_f1(reference, candidate):
+    """F1 overlap of whitespace tokens between two texts"""
+    ref = (reference or '').lower().split()
+    cand = (candidate or '').lower().split()
+    if not ref or not cand:
+        return 0.0
+    ref_counts = {}
+    for token in ref:
+        ref_counts[token] = ref_counts.get(token, 0) + 1
+    common = 0
+    for token in cand:
+        if ref_counts.get(token):
+            ref_counts[token] -= 1
+            common += 1
+    if common == 0:
+        return 0.0
+    precision = common / len(cand)
+    recall = common / len(ref)
+    return 2 * precision * recall / (precision + recall)
+
+
+def compare_extractors(documents, engines=ENGINES, repeat=3):
+    """
+    Compare extraction engines on saved pages
+
+    Args:
+        documents (list): (name, html, expected text or None) tuples
+        engines (tuple): Engines to compare
+        repeat (int): Timing repetitions per page
+
+    Returns:
+        dict: Per-engine timing, text length and token F1 against the
+              expected text (or against the first engine when none is given)
+    """
+    outputs = {engine: [] for engine in engines}
+    report = {}
+    for engine in engines:
+        timings = []
+        for _, html, _ in documents:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                text = extract_article_text(html, engine)
+            timings.append((time.perf_counter() - start) * 1000 / repeat)
+            outputs[engine].append(text or '')
+        report[engine] = {
+            'mean_ms': round(statistics.mean(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'mean_chars': round(statistics.mean(len(t) for t in outputs[engine])),
+        }
+
+    for engine in engines:
+        scores = []
+        for (_, _, expected), text, baseline in zip(documents, outputs[engine], outputs[engines[0]]):
+            scores.append(_token_f1(expected if expected else baseline, text))
+        key = 'token_f1' if any(expected for _, _, expected in documents) else f'agreement_with_{engines[0]}'
+        report[engine][key] = round(statistics.mean(scores), 3)
+    return report
+
+
+def load_corpus(directory):
+    """Load NAME.html pages and optional NAME.txt expected texts from a directory"""
+    documents = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.html'):
+            continue
+        name = filename[:-5]
+        with open(os.path.join(directory, filename), encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        expected = None
+        expected_path = os.path.join(directory, name + '.txt')
+        if os.path.exists(expected_path):
+            with open(expected_path, encoding='utf-8') as f:
+                expected = f.read()
+        documents.append((name, html, expected))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare article extraction engines')
+    parser.add_argument('corpus', help='Directory of NAME.html pages with optional NAME.txt expected text')
+    parser.add_argument('--engines', default=','.join(ENGINES))
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    report = compare_extractors(load_corpus(args.corpus), tuple(args.engines.split(',')))
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+
+if __name__ == '__main__':
+    main()
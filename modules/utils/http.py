@@ -0,0 +1,308 @@
+# modules/utils/http.py
+"""
+Shared HTTP clients.
+
+One httpx client per process keeps connections alive per host and reuses
+them across articles, retries and API calls. Async connections belong to the
+event loop that opened them, and Flask runs every async view on a fresh loop,
+so async views are run on one long-lived IO loop thread instead (see
+run_on_io_loop) and share that loop's single pooled AsyncClient. HTTP/2 is
+used when the h2 package is installed, the total number of connections is
+bounded, and resolved addresses are cached so repeated fetches from the same
+site skip DNS. A request trace counts new connections against requests, so
+pool reuse can be checked in production.
+"""
+import asyncio
+import functools
+import importlib.util
+import ipaddress
+import logging
+import socket
+import threading
+import time
+import weakref
+from collections import OrderedDict
+import httpx
+import httpcore
+
+logger = logging.getLogger(__name__)
+
+http2_available = importlib.util.find_spec("h2") is not None
+
+
+class DnsCache:
+    """
+    Cache of resolved host addresses
+
+    Args:
+        ttl (float): Seconds an address is reused
+        max_entries (int): Maximum number of cached hosts
+    """
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_ip(host):
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def lookup(self, host, port):
+        """Return a cached address or None"""
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry and time.time() - entry[1] < self.ttl:
+                self._entries.move_to_end((host, port))
+                self.hits += 1
+                return entry[0]
+            return None
+
+    def resolve(self, host, port):
+        """Return an address for host, resolving it if it isn't cached"""
+        if self.is_ip(host):
+            return host
+        address = self.lookup(host, port)
+        if address:
+            return address
+
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        address = infos[0][4][0]
+        with self._lock:
+            self.misses += 1
+            self._entries[(host, port)] = (address, time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return address
+
+    def forget(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+class _CachingBackend(httpcore.NetworkBackend):
+    """Sync network backend that connects to cached addresses"""
+    def __init__(self, dns, backend=None):
+        self._dns = dns
+        self._backend = backend or httpcore.SyncBackend()
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = self._dns.resolve(host, port)
+        try:
+            return self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+        except httpcore.ConnectError:
+            if address == host:
+                raise
+            # The cached address may be stale; resolve again on the next attempt
+            self._dns.forget(host, port)
+            raise
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds):
+        self._backend.sleep(seconds)
+
+
+class _AsyncCachingBackend(httpcore.AsyncNetworkBackend):
+    """Async network backend that connects to cached addresses"""
+    def __init__(self, dns, backend=None):
+        self._dns = dns
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = host if self._dns.is_ip(host) else self._dns.lookup(host, port)
+        if address is None:
+            import anyio
+            address = await anyio.to_thread.run_sync(self._dns.resolve, host, port)
+        try:
+            return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+        except httpcore.ConnectError:
+            if address != host:
+                self._dns.forget(host, port)
+            raise
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+
+class PoolStats:
+    """Counts requests and new connections per host from httpx request traces"""
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _bump(self, host, key):
+        with self._lock:
+            counts = self._hosts.setdefault(host, {'requests': 0, 'connections': 0, 'http2': 0})
+            counts[key] += 1
+
+    def tracer(self, host):
+        """Return a trace callback for one request to host"""
+        def trace(event, info):
+            if event == 'connection.connect_tcp.complete':
+                self._bump(host, 'connections')
+            elif event == 'http2.send_request_headers.started':
+                self._bump(host, 'http2')
+        return trace
+
+    def async_tracer(self, host):
+        """Return the trace callback for an async request, which httpcore awaits"""
+        trace_sync = self.tracer(host)
+
+        async def trace(event, info):
+            trace_sync(event, info)
+        return trace
+
+    def record_request(self, host):
+        self._bump(host, 'requests')
+
+    def snapshot(self):
+        """Return totals and per-host counts with the connection reuse ratio"""
+        with self._lock:
+            hosts = {host: dict(counts) for host, counts in self._hosts.items()}
+        requests = sum(c['requests'] for c in hosts.values())
+        connections = sum(c['connections'] for c in hosts.values())
+        for counts in hosts.values():
+            counts['reuse_ratio'] = (round(1 - counts['connections'] / counts['requests'], 3)
+                                     if counts['requests'] else 0.0)
+        return {
+            'requests': requests,
+            'connections_opened': connections,
+            'reuse_ratio': round(1 - connections / requests, 3) if requests else 0.0,
+            'hosts': hosts,
+        }
+
+
+_dns_cache = None
+_pool_stats = PoolStats()
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_io_loop = None
+_client_lock = threading.Lock()
+
+
+def _settings():
+    from config import (HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY,
+                        HTTP_TIMEOUT, HTTP_DNS_TTL)
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = DnsCache(ttl=HTTP_DNS_TTL)
+    limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                          max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                          keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+    return limits, httpx.Timeout(HTTP_TIMEOUT)
+
+
+def _on_request(request):
+    host = request.url.host
+    _pool_stats.record_request(host)
+    request.extensions['trace'] = _pool_stats.tracer(host)
+
+
+async def _on_async_request(request):
+    host = request.url.host
+    _pool_stats.record_request(host)
+    request.extensions['trace'] = _pool_stats.async_tracer(host)
+
+
+def _use_dns_cache(transport, backend):
+    """Route a transport's new connections through the caching network backend"""
+    # httpx has no public hook for name resolution, so the httpcore pool's
+    # backend is swapped; requirements.txt pins the versions this is known to work with
+    pool = getattr(transport, '_pool', None)
+    if pool is None or not hasattr(pool, '_network_backend'):
+        logger.warning("Unsupported httpx/httpcore version, connecting without the DNS cache")
+        return
+    pool._network_backend = backend
+
+
+def get_http_client():
+    """Return the process-wide pooled httpx client"""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            limits, timeout = _settings()
+            transport = httpx.HTTPTransport(http2=http2_available, limits=limits)
+            _use_dns_cache(transport, _CachingBackend(_dns_cache))
+            _client = httpx.Client(transport=transport, timeout=timeout, follow_redirects=True,
+                                   event_hooks={'request': [_on_request]})
+            logger.info(f"Created shared HTTP client (HTTP/2 {'on' if http2_available else 'off'})")
+    return _client
+
+
+def get_async_http_client():
+    """
+    Return the pooled httpx.AsyncClient of the running event loop, with the
+    same limits and DNS cache as the sync client
+
+    Async connections belong to the loop that opened them, so each loop gets
+    its own client. Views decorated with run_on_io_loop all share the IO
+    loop's client; code that runs a short-lived loop of its own should call
+    close_async_http_client before the loop finishes.
+    """
+    loop = asyncio.get_running_loop()
+
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            limits, timeout = _settings()
+            transport = httpx.AsyncHTTPTransport(http2=http2_available, limits=limits)
+            _use_dns_cache(transport, _AsyncCachingBackend(_dns_cache))
+            client = httpx.AsyncClient(transport=transport, timeout=timeout, follow_redirects=True,
+                                       event_hooks={'request': [_on_async_request]})
+            _async_clients[loop] = client
+    return client
+
+
+async def close_async_http_client():
+    """Close the running loop's client; call before a short-lived loop finishes"""
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def get_io_loop():
+    """Return the long-lived event loop async views run on, starting its thread on first use"""
+    global _io_loop
+
+    with _client_lock:
+        if _io_loop is None:
+            _io_loop = asyncio.new_event_loop()
+            threading.Thread(target=_io_loop.run_forever, name='http-io-loop', daemon=True).start()
+    return _io_loop
+
+
+def run_on_io_loop(view):
+    """
+    Decorate an async Flask view so its body runs on the shared IO loop,
+    where connections of the async client survive between requests. Flask's
+    per-request loop only waits for the result.
+    """
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        # The task copies this thread's context, so request and current_app still work
+        future = asyncio.run_coroutine_threadsafe(view(*args, **kwargs), get_io_loop())
+        return await asyncio.wrap_future(future)
+    return wrapper
+
+
+def get_http_stats():
+    """Return connection reuse and DNS cache statistics"""
+    stats = _pool_stats.snapshot()
+    stats['http2_available'] = http2_available
+    stats['dns_cache'] = ({'hits': _dns_cache.hits, 'misses': _dns_cache.misses}
+                          if _dns_cache is not None else None)
+    return stats
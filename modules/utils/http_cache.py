@@ -0,0 +1,210 @@
+# modules/utils/http_cache.py
+"""
+Disk cache for fetched articles.
+
+Responses are stored per canonical URL together with the text extracted
+from them, in a SQLite file shared by all workers. A fresh entry is answered
+without touching the network; a stale one is revalidated with a conditional
+GET (If-None-Match / If-Modified-Since), so an unchanged article costs a 304
+instead of a download. Freshness follows the server's Cache-Control and
+Expires headers, clamped to configured bounds, and the file is kept under a
+size budget by dropping the least recently used entries.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def freshness_lifetime(headers, default_ttl, min_ttl, max_ttl):
+    """
+    Seconds a response may be reused without revalidation
+
+    Returns:
+        float: Lifetime clamped to [min_ttl, max_ttl], 0 for no-cache, or
+               None when the response must not be stored
+    """
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control:
+        return None
+    if 'no-cache' in cache_control:
+        return 0
+
+    match = re.search(r's-maxage=(\d+)', cache_control) or re.search(r'max-age=(\d+)', cache_control)
+    if match:
+        ttl = int(match.group(1))
+    elif headers.get('Expires'):
+        try:
+            ttl = parsedate_to_datetime(headers['Expires']).timestamp() - time.time()
+        except (TypeError, ValueError):
+            # Invalid dates such as "0" mean already expired
+            ttl = 0
+    else:
+        ttl = default_ttl
+    return min(max(ttl, min_ttl), max_ttl)
+
+
+class HttpCache:
+    """
+    Size-bounded SQLite store of article responses and their extracted text
+
+    Args:
+        path (str): SQLite file
+        max_bytes (int): Budget for stored bodies and texts
+        default_ttl (float): Lifetime of responses without cache headers
+        min_ttl (float): Lower bound on the lifetime servers ask for
+        max_ttl (float): Upper bound on the lifetime servers ask for
+    """
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, default_ttl=600, min_ttl=60, max_ttl=24 * 3600):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._stats = {'fresh_hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0, 'evictions': 0,
+                       'bytes_saved': 0}
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, text TEXT, '
+            'size INTEGER, body_size INTEGER, fetched_at REAL, expires_at REAL, accessed REAL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._db.commit()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def get(self, key):
+        """
+        Look up a URL
+
+        Returns:
+            dict: Entry with 'text', 'etag', 'last_modified' and 'fresh', or None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, last_modified, text, expires_at, body_size FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row:
+                self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+                self._db.commit()
+        if row is None:
+            self._count('misses')
+            return None
+        etag, last_modified, text, expires_at, body_size = row
+        fresh = now < expires_at
+        if fresh:
+            self._count('fresh_hits')
+            self._count('bytes_saved', body_size)
+        return {'etag': etag, 'last_modified': last_modified, 'text': text, 'fresh': fresh,
+                'body_size': body_size}
+
+    def conditional_headers(self, entry):
+        """Request headers that revalidate a stale entry"""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_body(self, key):
+        """Return the stored raw body of a URL, or None"""
+        with self._lock:
+            row = self._db.execute('SELECT body FROM responses WHERE key = ?', (key,)).fetchone()
+        return zlib.decompress(row[0]) if row and row[0] else None
+
+    def refresh(self, key, headers, entry):
+        """Extend an entry after the server answered 304 Not Modified"""
+        ttl = freshness_lifetime(headers, self.default_ttl, self.min_ttl, self.max_ttl)
+        now = time.time()
+        with self._lock:
+            if ttl is None:
+                self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            else:
+                self._db.execute(
+                    'UPDATE responses SET fetched_at = ?, expires_at = ?, accessed = ?, '
+                    'etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?',
+                    (now, now + ttl, now, headers.get('ETag'), headers.get('Last-Modified'), key)
+                )
+            self._db.commit()
+        self._count('revalidated')
+        self._count('bytes_saved', entry['body_size'])
+
+    def put(self, key, headers, body, text):
+        """Store a response and the text extracted from it, if the server allows it"""
+        ttl = freshness_lifetime(headers, self.default_ttl, self.min_ttl, self.max_ttl)
+        if ttl is None:
+            return
+        stored_body = zlib.compress(body) if body else None
+        size = len(stored_body or b'') + len((text or '').encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, headers.get('ETag'), headers.get('Last-Modified'), stored_body, text, size,
+                 len(body or b''), now, now + ttl, now)
+            )
+            self._db.commit()
+            self._stats['stored'] += 1
+            self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._db.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            evicted += 1
+        self._db.commit()
+        self._stats['evictions'] += evicted
+
+    def get_stats(self):
+        """Return hit counters and the stored size"""
+        with self._lock:
+            stats = dict(self._stats)
+            entries, total = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        stats['entries'] = entries
+        stats['bytes'] = total
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+
+# Shared cache, created on first use
+_http_cache = None
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """Return the process-wide article response cache, or None when disabled"""
+    global _http_cache
+    from config import (HTTP_CACHE_ENABLED, HTTP_CACHE_DB, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_DEFAULT_TTL,
+                        HTTP_CACHE_MIN_TTL, HTTP_CACHE_MAX_TTL)
+
+    if not HTTP_CACHE_ENABLED:
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            try:
+                _http_cache = HttpCache(HTTP_CACHE_DB, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_DEFAULT_TTL,
+                                        HTTP_CACHE_MIN_TTL, HTTP_CACHE_MAX_TTL)
+            except sqlite3.Error as e:
+                logger.error(f"Article response cache unavailable: {str(e)}")
+                return None
+    return _http_cache
@@ -0,0 +1,156 @@
+# modules/utils/profiles.py
+"""
+Per-host extraction profiles.
+
+Pages from one news site share a template, so the strategy or selector that
+found the article on one page nearly always finds it on the next. The store
+remembers, per host, which one produced good text; the extractors try it
+first and only run their full search when it misses. Profiles are saved to
+a JSON file so they survive restarts.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def host_key(url_or_host):
+    """Normalize a URL or host name to a profile key"""
+    from urllib.parse import urlparse
+
+    host = urlparse(url_or_host).hostname if '//' in url_or_host else url_or_host
+    host = (host or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class ExtractionProfileStore:
+    """
+    Host -> (engine, selector) profiles persisted as JSON
+
+    Args:
+        path (str): JSON file (None keeps profiles in memory only)
+        max_hosts (int): Maximum number of profiles, least recently used dropped first
+        max_misses (int): Consecutive misses after which a profile is forgotten
+        save_interval (float): Minimum seconds between writes of the file
+    """
+    def __init__(self, path=None, max_hosts=5000, max_misses=3, save_interval=30):
+        self.path = path
+        self.max_hosts = max_hosts
+        self.max_misses = max_misses
+        self.save_interval = save_interval
+        self._profiles = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'learned': 0, 'forgotten': 0}
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self._profiles = json.load(f)
+                logger.info(f"Loaded {len(self._profiles)} extraction profiles")
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load extraction profiles: {str(e)}")
+
+    def get(self, host, engine):
+        """Return the selector learned for host with engine, or None"""
+        with self._lock:
+            profile = self._profiles.get(host)
+        if profile and profile['engine'] == engine:
+            return profile['selector']
+        return None
+
+    def hit(self, host):
+        """The learned selector produced good text again"""
+        with self._lock:
+            profile = self._profiles.get(host)
+            if profile:
+                profile['hits'] += 1
+                profile['misses'] = 0
+                profile['used'] = time.time()
+            self._stats['hits'] += 1
+            self._dirty = True
+        self._maybe_save()
+
+    def miss(self, host):
+        """The learned selector didn't produce good text"""
+        with self._lock:
+            self._stats['misses'] += 1
+            profile = self._profiles.get(host)
+            if profile:
+                profile['misses'] += 1
+                if profile['misses'] >= self.max_misses:
+                    # The site probably changed its template; learn it again
+                    del self._profiles[host]
+                    self._stats['forgotten'] += 1
+                self._dirty = True
+        self._maybe_save()
+
+    def learn(self, host, engine, selector):
+        """Record the selector that produced good text for host"""
+        with self._lock:
+            profile = self._profiles.get(host)
+            if profile and profile['engine'] == engine and profile['selector'] == selector:
+                profile['used'] = time.time()
+                return
+            self._profiles[host] = {'engine': engine, 'selector': selector, 'hits': 0, 'misses': 0,
+                                    'used': time.time()}
+            self._stats['learned'] += 1
+            if len(self._profiles) > self.max_hosts:
+                oldest = min(self._profiles, key=lambda h: self._profiles[h]['used'])
+                del self._profiles[oldest]
+            self._dirty = True
+        self._maybe_save()
+
+    def _maybe_save(self):
+        if time.time() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def save(self):
+        """Write the profiles to disk if they changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._profiles)
+            self._dirty = False
+            self._saved_at = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Write then rename, so other workers never read a half-written file
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Could not save extraction profiles: {str(e)}")
+
+    def get_stats(self):
+        """Return counters and the number of known hosts"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hosts'] = len(self._profiles)
+        return stats
+
+
+# Shared store, created on first use
+_profile_store = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    """Return the process-wide extraction profile store"""
+    global _profile_store
+
+    with _profile_store_lock:
+        if _profile_store is None:
+            from config import EXTRACTION_PROFILES_PATH, EXTRACTION_PROFILE_MAX_MISSES
+            _profile_store = ExtractionProfileStore(EXTRACTION_PROFILES_PATH,
+                                                    max_misses=EXTRACTION_PROFILE_MAX_MISSES)
+            atexit.register(_profile_store.save)
+    return _profile_store
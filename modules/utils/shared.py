@@ -1,22 +1,44 @@
 # modules/utils/shared.py
-from modules.summarizer.model import summarize_with_t5, summarize_with_gpt
-from modules.translation.service1 import translate_text
+from modules.summarizer.model import summarize_with_t5, summarize_with_gpt, summarize_many_with_t5
+from modules.summarizer.extractive import summarize_extractive
+from modules.summarizer.policy import choose_decoding, decoding_id, tier_decoding
+from modules.summarizer.hedging import get_hedged_summarizer
+from modules.translation.service1 import translate_text, translate_text_async
+from modules.utils.cache import get_summary_cache, make_summary_key
+from modules.utils.singleflight import get_single_flight, text_key
+import asyncio
+import functools
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def summarize_text(text, language='en', max_length=150, min_length=50):
+def _model_identity():
+    """Identify the model configuration so cached summaries don't outlive a model change"""
+    from config import T5_MODEL_NAME, T5_BACKEND
+    return f"{T5_MODEL_NAME}:{T5_BACKEND}"
+
+def summarize_text(text, language='en', max_length=150, min_length=50, quality=None,
+                   latency_budget_ms=None, engine=None):
     """
-    Unified text summarization function that handles translation
+    Unified text summarization function that handles translation.
+    Results are cached by content hash, language, lengths, model and the
+    decoding that produced them, so a request is only answered from the cache
+    with output of its own quality tier. Concurrent calls with the same text
+    and options share one computation.
     
     Args:
         text (str): Text to summarize
         language (str): Target language code
         max_length (int): Maximum length of summary
         min_length (int): Minimum length of summary
+        quality (str): Decoding quality tier ('high', 'balanced' or 'fast')
+        latency_budget_ms (float): Latency budget for the model call
+        engine (str): 'extractive' to skip the neural models entirely
         
     Returns:
         tuple: (summary in target language, summary in English)
@@ -35,18 +57,235 @@ def summarize_text(text, language='en', max_length=150, min_length=50):
             translated = translate_text(text.strip(), language)
             return translated or text.strip(), text.strip()
     
-    # First try T5 model for summarization
-    logger.info(f"Attempting to summarize text ({len(text)} chars) with T5")
+    # Extractive requests never reach the model, so model summaries aren't theirs to reuse
+    if engine != 'extractive':
+        cached = get_cached_summary(text, language, max_length, min_length,
+                                    tier_decoding(max_length, min_length, quality))
+        if cached:
+            logger.info("Returning cached summary")
+            return cached
+    
+    key = text_key(text, language, max_length, min_length, quality, latency_budget_ms, engine)
+    return get_single_flight('summarize').do(
+        key, _summarize_and_cache,
+        text, language, max_length, min_length, quality, latency_budget_ms, engine
+    )
+
+def _summarize_and_cache(text, language, max_length, min_length, quality, latency_budget_ms, engine):
+    """Summarize a cache miss and store the result; returns (summary, english_summary)"""
+    summary, english_summary, decoding = _summarize_uncached(
+        text, language, max_length, min_length, quality, latency_budget_ms, engine
+    )
+    
+    # Only cache T5 output, not the other engines or a failed translation,
+    # and only under the decoding that produced it: output stepped down for
+    # load or a latency budget is never served to requests for a better tier
+    if decoding:
+        cache_summary(text, language, max_length, min_length, summary, english_summary, decoding)
+    return summary, english_summary
+
+# Threads for model work started from async code, so it never runs on the event loop
+_model_executor = None
+_model_executor_lock = threading.Lock()
+
+def get_model_executor():
+    """Return the executor that runs summarization for async callers"""
+    global _model_executor
+    from config import ASYNC_MODEL_WORKERS
+    
+    with _model_executor_lock:
+        if _model_executor is None:
+            _model_executor = ThreadPoolExecutor(max_workers=ASYNC_MODEL_WORKERS, thread_name_prefix='model')
+    return _model_executor
+
+async def run_in_model_executor(fn, *args, **kwargs):
+    """Await fn(*args, **kwargs) run in the model executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_model_executor(), functools.partial(fn, *args, **kwargs))
+
+async def summarize_text_async(text, language='en', max_length=150, min_length=50, quality=None,
+                               latency_budget_ms=None, engine=None):
+    """
+    Async version of summarize_text. The English summary is produced in the
+    model executor and translated on the event loop with the async client;
+    the cache and in-flight coalescing are shared with summarize_text.
+    
+    Returns:
+        tuple: (summary in target language, summary in English)
+    """
+    if not text or not text.strip():
+        logger.warning("Empty text provided for summarization")
+        return None, None
+    
+    if len(text.strip()) < 100:
+        logger.warning(f"Text too short for summarization: {len(text.strip())} chars")
+        if language == 'en':
+            return text.strip(), text.strip()
+        translated = await translate_text_async(text.strip(), language)
+        return translated or text.strip(), text.strip()
+    
+    if language == 'en':
+        return await run_in_model_executor(summarize_text, text, 'en', max_length, min_length,
+                                           quality, latency_budget_ms, engine)
+    
+    if engine != 'extractive':
+        # The summary cache is SQLite, so it's read in a thread rather than on the loop
+        cached = await asyncio.to_thread(get_cached_summary, text, language, max_length, min_length,
+                                         tier_decoding(max_length, min_length, quality))
+        if cached:
+            logger.info("Returning cached summary")
+            return cached
+    
+    key = text_key(text, language, max_length, min_length, quality, latency_budget_ms, engine)
+    return await get_single_flight('summarize').do_async(
+        key, _summarize_and_translate_async,
+        text, language, max_length, min_length, quality, latency_budget_ms, engine
+    )
+
+async def _summarize_and_translate_async(text, language, max_length, min_length, quality, latency_budget_ms, engine):
+    """Summarize in English in the executor, then translate without blocking the loop"""
+    _, english_summary = await run_in_model_executor(summarize_text, text, 'en', max_length, min_length,
+                                                     quality, latency_budget_ms, engine)
+    if not english_summary:
+        return None, None
+    
+    logger.info(f"Translating summary to {language}")
+    summary = await translate_text_async(english_summary, language)
+    if not summary:
+        logger.warning(f"Translation to {language} failed, returning English summary")
+        return english_summary, english_summary
+    
+    # The English summary is only cached when it came from a model at the requested tier
+    requested = tier_decoding(max_length, min_length, quality)
+    if engine != 'extractive' and await asyncio.to_thread(get_cached_summary, text, 'en',
+                                                          max_length, min_length, requested):
+        await asyncio.to_thread(cache_summary, text, language, max_length, min_length,
+                                summary, english_summary, requested)
+    return summary, english_summary
+
+def summarize_texts(texts, language='en', max_length=150, min_length=50, quality=None):
+    """
+    Summarize many texts at once. Cache hits are answered directly and the
+    misses go to T5 as batched model calls; texts T5 couldn't summarize take
+    the regular summarize_text path with its fallbacks.
+    
+    Args:
+        texts (list): Texts to summarize
+        language (str): Target language code
+        max_length (int): Maximum length of each summary
+        min_length (int): Minimum length of each summary
+        quality (str): Decoding quality tier ('high', 'balanced' or 'fast')
+        
+    Returns:
+        list: (summary, english_summary) per text, in the same order
+    """
+    results = [(None, None)] * len(texts)
+    misses = {}
+    requested = tier_decoding(max_length, min_length, quality)
+    for i, text in enumerate(texts):
+        if not text or len(text.strip()) < 100:
+            # Empty and very short texts are handled by summarize_text as usual
+            results[i] = summarize_text(text, language, max_length, min_length)
+            continue
+        cached = get_cached_summary(text, language, max_length, min_length, requested)
+        if cached:
+            results[i] = cached
+        else:
+            # Identical texts in one batch are summarized once
+            misses.setdefault(text, []).append(i)
+    
+    if not misses:
+        return results
+    
+    logger.info(f"Batch summarizing {len(misses)} texts ({len(texts) - len(misses)} cached or short)")
+    pending = list(misses)
+    # Without a latency budget the policy always returns decoding options
+    decoding = choose_decoding(max_length, min_length, quality)
+    summaries = summarize_many_with_t5(pending, max_length, min_length, decoding=decoding)
+    for text, english_summary in zip(pending, summaries):
+        if english_summary:
+            summary, english_summary = _translate_summary(english_summary, language)
+            # A failed translation returns English, which shouldn't be cached for this language
+            if language == 'en' or summary != english_summary:
+                cache_summary(text, language, max_length, min_length, summary, english_summary, decoding)
+        else:
+            summary, english_summary = summarize_text(text, language, max_length, min_length, quality)
+        for i in misses[text]:
+            results[i] = (summary, english_summary)
+    return results
+
+def get_cached_summary(text, language='en', max_length=150, min_length=50, decoding=None):
+    """
+    Return a cached (summary, english_summary) pair or None. decoding is the
+    generate options the caller wants (default: the default tier's).
+    """
+    from config import SUMMARY_CACHE_ENABLED
+    
+    if not SUMMARY_CACHE_ENABLED:
+        return None
+    decoding = decoding or tier_decoding(max_length, min_length)
+    key = make_summary_key(text, language, max_length, min_length, _model_identity(), decoding_id(decoding))
+    return get_summary_cache().get(key)
+
+def cache_summary(text, language, max_length, min_length, summary, english_summary, decoding=None):
+    """Store a summary produced with the given generate options (default: the default tier's)"""
+    from config import SUMMARY_CACHE_ENABLED
+    
+    if not SUMMARY_CACHE_ENABLED or not summary:
+        return
+    decoding = decoding or tier_decoding(max_length, min_length)
+    key = make_summary_key(text, language, max_length, min_length, _model_identity(), decoding_id(decoding))
+    get_summary_cache().set(key, (summary, english_summary))
+
+def _summarize_uncached(text, language, max_length, min_length, quality=None,
+                        latency_budget_ms=None, engine=None):
+    """
+    Run summarization and translation, returning (summary, english_summary,
+    decoding) where decoding is the generate options the summary should be
+    cached under, or None when it must not be cached
+    """
+    # Decide the decoding once, so the options used and the cache key agree
+    decoding = None
+    if engine != 'extractive':
+        decoding = choose_decoding(max_length, min_length, quality, latency_budget_ms)
+        # Use the extractive engine when not even greedy decoding fits the budget
+        if decoding is None:
+            engine = 'extractive'
+    
+    if engine == 'extractive':
+        logger.info(f"Summarizing text ({len(text)} chars) with the extractive engine")
+        english_summary = summarize_extractive(text, max_length)
+        # Keep extractive output out of the cache so model requests don't get it
+        return _translate_summary(english_summary, language) + (None,)
+    
+    from config import HEDGE_ENABLED
+    
+    # Cache entries are keyed by T5's decoding options, so only T5 output is
+    # cached; GPT, a winning secondary engine and the extractive fallback aren't
     english_summary = None
-    try:
-        english_summary = summarize_with_t5(text, max_length, min_length)
+    cacheable = False
+    if HEDGE_ENABLED:
+        # Race the secondary engine against slow T5 calls instead of waiting
+        logger.info(f"Summarizing text ({len(text)} chars) with hedged T5")
+        english_summary, winner = get_hedged_summarizer().summarize(
+            text, max_length, min_length, decoding=decoding
+        )
         if english_summary:
-            logger.info("Successfully summarized with T5 model")
-    except Exception as e:
-        logger.error(f"Error in T5 summarization: {str(e)}")
+            logger.info(f"Hedged summarization won by {winner}")
+        cacheable = bool(english_summary) and winner == 'primary'
+    else:
+        # First try T5 model for summarization
+        logger.info(f"Attempting to summarize text ({len(text)} chars) with T5")
+        try:
+            english_summary = summarize_with_t5(text, max_length, min_length, decoding=decoding)
+            if english_summary:
+                logger.info("Successfully summarized with T5 model")
+                cacheable = True
+        except Exception as e:
+            logger.error(f"Error in T5 summarization: {str(e)}")
     
-    # If T5 fails, fall back to GPT
-    if not english_summary:
+    # If T5 fails, fall back to GPT (already raced when hedging)
+    if not english_summary and not HEDGE_ENABLED:
         logger.info("T5 summarization failed, falling back to GPT")
         try:
             english_summary = summarize_with_gpt(text, max_length, min_length)
@@ -55,16 +294,20 @@ def summarize_text(text, language='en', max_length=150, min_length=50):
         except Exception as e:
             logger.error(f"Error in GPT summarization: {str(e)}")
     
-    # If both summarizers fail, create a basic summary
+    # If both summarizers fail, fall back to extractive summarization
     if not english_summary:
-        logger.warning("Both summarizers failed, creating basic summary")
-        # Create a simple summary by taking the first few sentences
-        sentences = text.split('.')
-        if len(sentences) > 3:
-            english_summary = '. '.join(sentences[:3]) + '.'
-        else:
-            english_summary = text[:max_length] + ('...' if len(text) > max_length else '')
+        logger.warning("Both summarizers failed, creating extractive summary")
+        english_summary = summarize_extractive(text, max_length)
     
+    summary, english_summary = _translate_summary(english_summary, language)
+    
+    # A failed translation returns English, which shouldn't be cached for this language
+    if language != 'en' and summary == english_summary:
+        cacheable = False
+    return summary, english_summary, decoding if cacheable else None
+
+def _translate_summary(english_summary, language):
+    """Translate an English summary, returning (summary, english_summary)"""
     # Return English summary directly if language is English
     if language == 'en':
         logger.info(f"Returning English summary (Length: {len(english_summary)} chars)")
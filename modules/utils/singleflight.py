@@ -0,0 +1,152 @@
+# modules/utils/singleflight.py
+"""
+In-flight request coalescing.
+
+When a story trends, many requests for the same article arrive together.
+A single-flight group runs one computation per key at a time: the first
+caller does the work and concurrent callers with the same key wait for it
+and share its result (or its exception). Nothing is kept once the
+computation finishes; the caches handle reuse after that. Sync and async
+callers share the same groups.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+def url_key(url, *options):
+    """Coalescing key for work on a URL; links that differ only in tracking parameters share it"""
+    from .web import canonicalize_url
+    return '|'.join(['url', canonicalize_url(url)] + [str(o) for o in options])
+
+
+def text_key(text, *options):
+    """Coalescing key for work on a text, by content hash"""
+    from .cache import normalize_text
+    digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return '|'.join(['text', digest] + [str(o) for o in options])
+
+
+def _resolve(future, result=None, error=None):
+    """Complete a shared future unless it already is (a cancelled waiter may have done so)"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time
+
+    Args:
+        name (str): Group name, used in logs and stats
+    """
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executed': 0, 'coalesced': 0}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Return fn(*args, **kwargs), sharing the result with concurrent callers
+        that use the same key
+
+        Raises:
+            Exception: Whatever fn raised, in the caller and in every waiter
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            _resolve(future, result)
+            return result
+        except BaseException as e:
+            _resolve(future, error=e)
+            raise
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """
+        Async version of do(): awaits fn(*args, **kwargs), a coroutine
+        function, or joins the computation already running for key (sync or
+        async, on any thread or loop)
+        """
+        future, leader = self._join(key)
+        if not leader:
+            # Shielded, so a cancelled waiter doesn't cancel the shared future
+            return await asyncio.shield(asyncio.wrap_future(future))
+
+        # The computation runs as its own task, so cancelling the leader (a
+        # client that went away) doesn't cancel it for the callers sharing it
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        task.add_done_callback(lambda done: self._settle(key, future, done))
+        return await asyncio.shield(task)
+
+    def _settle(self, key, future, task):
+        """Hand a finished computation task's outcome to the waiters"""
+        try:
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                _resolve(future, error=task.exception())
+            else:
+                _resolve(future, task.result())
+        finally:
+            self._finish(key)
+
+    def _join(self, key):
+        """Return (future, True) for a new computation or (future, False) to wait on a running one"""
+        with self._lock:
+            self._stats['calls'] += 1
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self._stats['executed'] += 1
+                return future, True
+            self._stats['coalesced'] += 1
+        logger.info(f"Joining in-flight {self.name} computation")
+        return future, False
+
+    def _finish(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def get_stats(self):
+        """Return call counts and the share of calls that joined another one"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['inflight'] = len(self._inflight)
+        stats['coalesced_rate'] = round(stats['coalesced'] / stats['calls'], 3) if stats['calls'] else 0.0
+        return stats
+
+
+# One group per kind of work, created on first use
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name):
+    """Return the shared single-flight group for a kind of work"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def get_single_flight_stats():
+    """Return the stats of every single-flight group"""
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.get_stats() for name, group in groups.items()}
@@ -1,10 +1,16 @@
 # modules/utils/web.py
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import httpx
 import logging
+import re
 import time
 import random
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from .http import get_http_client, get_async_http_client
+from .http_cache import get_http_cache
+from .singleflight import get_single_flight, url_key
+from .profiles import host_key
+from .extract import StreamingExtractor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -20,6 +26,37 @@ USER_AGENTS = [
     'Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.0 Mobile/15E148 Safari/604.1'
 ]
 
+# Content types worth parsing for article text; anything else (PDFs, images,
+# downloads) is rejected before the body is read
+ARTICLE_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'application/xml', 'text/xml', 'text/plain')
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = ('fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ocid', 'cmpid', '_ga')
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so that links to the same article share a cache key.
+    
+    The scheme and host are lowercased, default ports and fragments dropped,
+    tracking parameters removed and the remaining query parameters sorted.
+    
+    Args:
+        url (str): URL to normalize
+        
+    Returns:
+        str: Canonical URL
+    """
+    parts = urlparse(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunparse((scheme, host, parts.path or '/', parts.params, urlencode(query), ''))
+
 def validate_url(url):
     """
     Validate if a URL is properly formatted
@@ -40,6 +77,10 @@ def fetch_article_text(url, max_retries=3):
     """
     Fetch and extract main text content from a news article URL.
     
+    Articles are served from the response cache while fresh and revalidated
+    with a conditional GET once stale. Concurrent fetches of the same
+    article (tracking parameters aside) share one download.
+    
     Args:
         url (str): The URL of the news article to fetch.
         max_retries (int): Maximum number of retry attempts
@@ -50,114 +91,251 @@ def fetch_article_text(url, max_retries=3):
     if not validate_url(url):
         logger.error(f"Invalid URL format: {url}")
         return None
+    
+    return get_single_flight('fetch').do(url_key(url), _fetch_article_text, url, max_retries)
+
+def _fetch_article_text(url, max_retries):
+    """Fetch an article through the response cache; see fetch_article_text"""
+    cache, cache_key, entry = _cached_article(url)
+    if entry and entry['fresh']:
+        logger.info(f"Serving cached article for: {url}")
+        return entry['text']
         
     retry_count = 0
     while retry_count < max_retries:
         try:
-            # Rotate user agents to avoid being blocked
-            headers = {
-                'User-Agent': random.choice(USER_AGENTS),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Referer': 'https://www.google.com/',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Cache-Control': 'max-age=0',
-            }
+            headers = _article_headers(cache, entry)
             
             logger.info(f"Attempting to fetch article from: {url} (Attempt {retry_count + 1}/{max_retries})")
-            response = requests.get(url, headers=headers, timeout=15)
-            
-            if response.status_code == 403 or response.status_code == 429:
-                logger.warning(f"Access denied (status code: {response.status_code}). Retrying with different user agent.")
-                retry_count += 1
-                time.sleep(2 * retry_count)  # Exponential backoff
-                continue
+            # The shared client keeps connections to the host alive across fetches and retries
+            with get_http_client().stream('GET', url, headers=headers, timeout=15) as response:
+                if response.status_code == 403 or response.status_code == 429:
+                    logger.warning(f"Access denied (status code: {response.status_code}). Retrying with different user agent.")
+                    retry_count += 1
+                    time.sleep(2 * retry_count)  # Exponential backoff
+                    continue
                 
-            response.raise_for_status()
-            
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside', 'iframe', 'meta', 'noscript']):
-                element.decompose()
-            
-            # Try multiple selection strategies to find content
-            content = None
-            
-            # Strategy 1: Look for article tag
-            article = soup.find('article')
-            if article:
-                content = article.get_text(separator='\n', strip=True)
-                logger.info("Content extracted from article tag")
-            
-            # Strategy 2: Common article content classes
-            if not content:
-                for class_hint in ['content', 'article', 'post', 'entry', 'story', 'text', 'body']:
-                    elements = soup.find_all(class_=lambda c: c and class_hint.lower() in c.lower())
-                    if elements:
-                        content = max([e.get_text(separator='\n', strip=True) for e in elements], 
-                                    key=len, default=None)
-                        if content:
-                            logger.info(f"Content extracted from class containing '{class_hint}'")
-                            break
-            
-            # Strategy 3: Look for main content tags
-            if not content:
-                main_content = soup.find('main') or soup.find(id='content') or soup.find(id='main')
-                if main_content:
-                    content = main_content.get_text(separator='\n', strip=True)
-                    logger.info("Content extracted from main content tag")
-            
-            # Strategy 4: Fallback to body
-            if not content:
-                if soup.body:
-                    content = soup.body.get_text(separator='\n', strip=True)
-                    logger.info("Content extracted from body tag")
-            
-            # Clean up text
-            if content:
-                import re
-                # Remove excessive whitespace
-                content = re.sub(r'\s+', ' ', content)
-                # Remove excessive newlines
-                content = re.sub(r'\n{2,}', '\n\n', content)
-                # If content is too short, consider it unsuccessful
-                if len(content) < 500:
-                    logger.warning(f"Extracted content too short ({len(content)} chars). Might be incomplete.")
-                    if retry_count < max_retries - 1:
-                        retry_count += 1
-                        time.sleep(2)
-                        continue
+                if response.status_code == 304 and entry:
+                    return _not_modified(url, cache, cache_key, entry, response.headers)
+                    
+                response.raise_for_status()
                 
-                return content
+                if not _is_article_response(url, response):
+                    return None
+                
+                content, body = read_article(response, host_key(url), keep_body=cache is not None)
             
-            logger.warning("No content could be extracted from the page")
-            return None
+            return _store_article(cache, cache_key, response.headers, body, content)
             
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Connection error for {url}: {e}")
+        except Exception as e:
             retry_count += 1
-            time.sleep(2 * retry_count)  # Exponential backoff
+            delay = _retry_delay(url, e, retry_count)
+            if delay is None:
+                return None
+            time.sleep(delay)
+    
+    logger.error(f"Failed to fetch article after {max_retries} attempts: {url}")
+    return None
+
+async def fetch_article_text_async(url, max_retries=3):
+    """
+    Async version of fetch_article_text, on the event loop's httpx.AsyncClient.
+    
+    Shares the response cache, extraction profiles and in-flight coalescing
+    with the sync version, so a sync and an async fetch of the same article
+    download it once.
+    
+    Args:
+        url (str): The URL of the news article to fetch.
+        max_retries (int): Maximum number of retry attempts
+        
+    Returns:
+        str: The extracted text content of the article or None if extraction failed.
+    """
+    if not validate_url(url):
+        logger.error(f"Invalid URL format: {url}")
+        return None
+    
+    return await get_single_flight('fetch').do_async(url_key(url), _fetch_article_text_async, url, max_retries)
+
+async def _fetch_article_text_async(url, max_retries):
+    """
+    Fetch an article through the response cache without blocking the loop:
+    the SQLite cache and the HTML parsing run in worker threads
+    """
+    cache, cache_key, entry = await asyncio.to_thread(_cached_article, url)
+    if entry and entry['fresh']:
+        logger.info(f"Serving cached article for: {url}")
+        return entry['text']
+    
+    retry_count = 0
+    while retry_count < max_retries:
+        try:
+            headers = _article_headers(cache, entry)
             
-        except requests.exceptions.Timeout as e:
-            logger.error(f"Request timed out for {url}: {e}")
-            retry_count += 1
-            time.sleep(2 * retry_count)
+            logger.info(f"Attempting to fetch article from: {url} (Attempt {retry_count + 1}/{max_retries})")
+            async with get_async_http_client().stream('GET', url, headers=headers, timeout=15) as response:
+                if response.status_code == 403 or response.status_code == 429:
+                    logger.warning(f"Access denied (status code: {response.status_code}). Retrying with different user agent.")
+                    retry_count += 1
+                    await asyncio.sleep(2 * retry_count)  # Exponential backoff
+                    continue
+                
+                if response.status_code == 304 and entry:
+                    return await asyncio.to_thread(_not_modified, url, cache, cache_key, entry, response.headers)
+                
+                response.raise_for_status()
+                
+                if not _is_article_response(url, response):
+                    return None
+                
+                content, body = await read_article_async(response, host_key(url), keep_body=cache is not None)
             
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error for {url}: {e}")
-            # Don't retry for 404 errors
-            if '404' in str(e):
-                return None
-            retry_count += 1
-            time.sleep(2 * retry_count)
+            return await asyncio.to_thread(_store_article, cache, cache_key, response.headers, body, content)
             
         except Exception as e:
-            logger.error(f"Error fetching article from {url}: {type(e).__name__}: {str(e)}")
             retry_count += 1
-            time.sleep(1)
+            delay = _retry_delay(url, e, retry_count)
+            if delay is None:
+                return None
+            await asyncio.sleep(delay)
     
     logger.error(f"Failed to fetch article after {max_retries} attempts: {url}")
-    return None
\ No newline at end of file
+    return None
+
+# Steps shared by the sync and async fetches. The cache and extraction ones
+# block (SQLite, lxml), so the async fetch runs them with asyncio.to_thread.
+
+def _cached_article(url):
+    """Return (cache, cache key, cache entry) for a URL; cache and entry may be None"""
+    cache = get_http_cache()
+    cache_key = canonicalize_url(url)
+    return cache, cache_key, cache.get(cache_key) if cache else None
+
+def _not_modified(url, cache, cache_key, entry, headers):
+    """Answer a 304 from the cache entry and extend its lifetime"""
+    logger.info(f"Article not modified, using cached text: {url}")
+    cache.refresh(cache_key, headers, entry)
+    if entry['text'] is None:
+        # Nothing was extracted last time; try again on the stored page
+        return _clean_text(_extract_body(cache.get_body(cache_key), host_key(url)))
+    return entry['text']
+
+def _is_article_response(url, response):
+    """False for responses that aren't pages worth extracting (PDFs, images, downloads)"""
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+    if content_type and content_type not in ARTICLE_CONTENT_TYPES:
+        logger.warning(f"Not an article page ({content_type}): {url}")
+        return False
+    return True
+
+def _store_article(cache, cache_key, headers, body, content):
+    """Clean extracted text, store the response in the cache and return the text or None"""
+    content = _clean_text(content)
+    if cache:
+        cache.put(cache_key, headers, body, content)
+    if content:
+        return content
+    
+    logger.warning("No content could be extracted from the page")
+    return None
+
+def _retry_delay(url, error, attempt):
+    """Log a failed fetch attempt; return the seconds to wait before retrying, or None to give up"""
+    if isinstance(error, httpx.HTTPStatusError):
+        logger.error(f"HTTP error for {url}: {error}")
+        # Don't retry for 404 errors
+        if error.response.status_code == 404:
+            return None
+        return 2 * attempt
+    if isinstance(error, (httpx.ConnectError, httpx.TimeoutException)):
+        logger.error(f"{type(error).__name__} for {url}: {error}")
+        return 2 * attempt  # Exponential backoff
+    logger.error(f"Error fetching article from {url}: {type(error).__name__}: {str(error)}")
+    return 1
+
+def _article_headers(cache, entry):
+    """Request headers for an article fetch, conditional when a cached copy exists"""
+    # Rotate user agents to avoid being blocked
+    headers = {
+        'User-Agent': random.choice(USER_AGENTS),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Referer': 'https://www.google.com/',
+        'Upgrade-Insecure-Requests': '1',
+    }
+    if entry:
+        headers.update(cache.conditional_headers(entry))
+    return headers
+
+def _clean_text(content):
+    """Collapse the whitespace of extracted text and warn when it is short"""
+    from config import EXTRACTION_MIN_CHARS
+    
+    if not content:
+        return None
+    # Remove excessive whitespace
+    content = re.sub(r'\s+', ' ', content)
+    # Remove excessive newlines
+    content = re.sub(r'\n{2,}', '\n\n', content)
+    # The same page would extract the same way again, so short text isn't retried
+    if len(content) < EXTRACTION_MIN_CHARS:
+        logger.warning(f"Extracted content too short ({len(content)} chars). Might be incomplete.")
+    return content
+
+def _extract_body(body, host=None):
+    """Extract article text from a stored page body"""
+    if not body:
+        return None
+    extractor = StreamingExtractor(host=host, enough_chars=0)
+    extractor.feed(body)
+    return extractor.result()
+
+def read_article(response, host=None, keep_body=False):
+    """
+    Read a streamed article response and extract its text.
+    
+    The body is parsed as it arrives and reading stops at ARTICLE_MAX_BYTES,
+    or as soon as enough article text has been seen, so memory per request
+    stays bounded whatever the page size.
+    
+    Args:
+        response (httpx.Response): Open streaming response
+        host (str): Profile key of the site, see modules/utils/profiles.py
+        keep_body (bool): Also return the bytes read, for the response cache
+        
+    Returns:
+        tuple: (extracted text or None, bytes read or None)
+    """
+    from config import ARTICLE_MAX_BYTES, ARTICLE_CHUNK_BYTES
+    
+    extractor = StreamingExtractor(encoding=response.charset_encoding, host=host)
+    chunks = []
+    for chunk in response.iter_bytes(ARTICLE_CHUNK_BYTES):
+        if keep_body:
+            chunks.append(chunk)
+        if extractor.feed(chunk):
+            logger.info(f"Enough article text after {extractor.bytes_read} bytes, stopping download")
+            break
+        if extractor.bytes_read >= ARTICLE_MAX_BYTES:
+            logger.warning(f"Page exceeds {ARTICLE_MAX_BYTES} bytes, extracting from what was read")
+            break
+    return extractor.result(), b''.join(chunks) if keep_body else None
+
+async def read_article_async(response, host=None, keep_body=False):
+    """Async version of read_article for a streaming httpx.AsyncClient response"""
+    from config import ARTICLE_MAX_BYTES, ARTICLE_CHUNK_BYTES
+    
+    extractor = StreamingExtractor(encoding=response.charset_encoding, host=host)
+    chunks = []
+    async for chunk in response.aiter_bytes(ARTICLE_CHUNK_BYTES):
+        if keep_body:
+            chunks.append(chunk)
+        # Parsing is CPU work, so it runs off the event loop
+        if await asyncio.to_thread(extractor.feed, chunk):
+            logger.info(f"Enough article text after {extractor.bytes_read} bytes, stopping download")
+            break
+        if extractor.bytes_read >= ARTICLE_MAX_BYTES:
+            logger.warning(f"Page exceeds {ARTICLE_MAX_BYTES} bytes, extracting from what was read")
+            break
+    return await asyncio.to_thread(extractor.result), b''.join(chunks) if keep_body else None
@@ -19,14 +19,15 @@ async function fetchNews(category = null) {
             </div>
         `;
         
-        // Make API request without category parameter
-        const response = await fetch(`/news/get_articles?count=20&language=en`);
+        // Stream without category parameter: the articles arrive as the first
+        // NDJSON line, before any summary is ready
+        const response = await fetch(`/news/stream?count=20&language=en`);
         
         if (!response.ok) {
             throw new Error(`HTTP error! Status: ${response.status}`);
         }
         
-        const data = await response.json();
+        const data = await readArticlesEvent(response);
         
         if (data.articles && data.articles.length > 0) {
             displayNews(data.articles);
@@ -39,6 +40,40 @@ async function fetchNews(category = null) {
     }
 }
     
+    // Read the NDJSON stream line by line until the articles event; this
+    // section shows no summaries, so the rest of the stream isn't needed
+    async function readArticlesEvent(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        try {
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) {
+                    break;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                for (const line of lines.filter(line => line.trim())) {
+                    const data = JSON.parse(line);
+                    if (data.event === 'articles') {
+                        return data;
+                    } else if (data.event === 'error') {
+                        throw new Error(data.error);
+                    }
+                }
+            }
+            const data = buffer.trim() ? JSON.parse(buffer) : {};
+            if (data.event === 'error') {
+                throw new Error(data.error);
+            }
+            return data;
+        } finally {
+            reader.cancel();
+        }
+    }
+    
     // Function to display news articles
     function displayNews(articles) {
         // Clear the container
@@ -0,0 +1,56 @@
+# tests/test_breaker.py
+"""
+News provider circuit breaker: enough failures open it, the cool-down lets
+a probe through (half-open) and a successful probe closes it again.
+"""
+import modules.summarizer  # noqa: F401  (modules.news imports it first in the app)
+from modules.news import breaker as breaker_module
+from modules.news.breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_open_half_open_close(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, 'time', clock.time)
+    breaker = CircuitBreaker('test', failure_rate=0.5, window=4, min_calls=2, open_seconds=30)
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure('HTTP 500')
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    # After the cool-down one probe goes through; others wait for its outcome
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+    stats = breaker.get_stats()
+    assert [(t['from'], t['to']) for t in stats['transitions']] == [
+        (CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+    assert stats['rejected'] == 2
+
+
+def test_failed_probe_reopens(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breaker_module.time, 'time', clock.time)
+    breaker = CircuitBreaker('test', min_calls=1, open_seconds=30)
+
+    breaker.record_failure('timeout')
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure('timeout')
+    assert breaker.state == OPEN
+    assert not breaker.allow()
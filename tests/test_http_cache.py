@@ -0,0 +1,86 @@
+# tests/test_http_cache.py
+"""
+Conditional GET of cached articles: a 200 with an ETag is stored, and once
+the entry is stale the next fetch revalidates it and a 304 is answered from
+the cache.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from modules.utils import profiles, web
+from modules.utils.http_cache import HttpCache
+
+URL = 'https://news.example.com/story?utm_source=feed'
+ETAG = '"v1"'
+ARTICLE = '<html><body><article>' + '<p>The council approved the new budget today. </p>' * 20 + '</article></body></html>'
+EMPTY_PAGE = '<html><body><nav>Home</nav></body></html>'
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Serve page bodies from a mock transport, recording the requests"""
+    state = {'body': ARTICLE, 'requests': []}
+
+    def handler(request):
+        state['requests'].append(request)
+        if request.headers.get('If-None-Match') == ETAG:
+            return httpx.Response(304, headers={'ETag': ETAG, 'Cache-Control': 'no-cache'})
+        # no-cache stores the page but makes every later fetch revalidate
+        return httpx.Response(200, text=state['body'],
+                              headers={'Content-Type': 'text/html; charset=utf-8', 'ETag': ETAG,
+                                       'Cache-Control': 'no-cache'})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    cache = HttpCache(str(tmp_path / 'http' / 'responses.sqlite'))
+    monkeypatch.setattr(web, 'get_http_client', lambda: client)
+    monkeypatch.setattr(web, 'get_http_cache', lambda: cache)
+    monkeypatch.setattr(profiles, '_profile_store', profiles.ExtractionProfileStore())
+    state['cache'] = cache
+    yield state
+    client.close()
+
+
+def test_revalidates_with_etag_and_serves_304_from_cache(server):
+    first = web.fetch_article_text(URL, max_retries=1)
+    assert first and 'council approved the new budget' in first
+    assert 'If-None-Match' not in server['requests'][0].headers
+
+    second = web.fetch_article_text(URL, max_retries=1)
+    assert second == first
+    assert server['requests'][1].headers['If-None-Match'] == ETAG
+
+    stats = server['cache'].get_stats()
+    assert stats['stored'] == 1
+    assert stats['revalidated'] == 1
+    assert stats['bytes_saved'] == len(ARTICLE.encode('utf-8'))
+
+
+def test_304_for_page_without_text_extracts_stored_body(server):
+    server['body'] = EMPTY_PAGE
+    assert web.fetch_article_text(URL, max_retries=1) is None
+
+    # The stored body is parsed again instead of downloading it; an error
+    # there would show up as a retry
+    assert web.fetch_article_text(URL, max_retries=2) is None
+    assert len(server['requests']) == 2
+    assert server['requests'][1].headers['If-None-Match'] == ETAG
+    assert server['cache'].get_stats()['revalidated'] == 1
+
+
+def test_async_fetch_shares_the_cache(server, monkeypatch):
+    async def handler(request):
+        server['requests'].append(request)
+        return httpx.Response(304, headers={'ETag': ETAG, 'Cache-Control': 'no-cache'})
+
+    first = web.fetch_article_text(URL, max_retries=1)
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            monkeypatch.setattr(web, 'get_async_http_client', lambda: client)
+            return await web.fetch_article_text_async(URL, max_retries=1)
+
+    assert asyncio.run(fetch()) == first
+    assert server['requests'][1].headers['If-None-Match'] == ETAG
+    assert server['cache'].get_stats()['revalidated'] == 1
@@ -0,0 +1,62 @@
+# tests/test_ratelimit.py
+"""
+NewsAPI limiter: identical calls in flight are coalesced across sync and
+async callers, and an async waiter that gives up doesn't cancel the call for
+the others.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import modules.summarizer  # noqa: F401  (modules.news imports it first in the app)
+from modules.news import ratelimit
+from modules.news.ratelimit import NewsApiLimiter, QuotaStore
+
+URL = 'https://newsapi.org/v2/top-headlines'
+PARAMS = {'language': 'en', 'category': 'general'}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """A limiter whose NewsAPI answers only once 'release' is set"""
+    state = {'calls': 0, 'release': threading.Event(), 'started': threading.Event()}
+
+    def handler(request):
+        state['calls'] += 1
+        state['started'].set()
+        state['release'].wait(5)
+        return httpx.Response(200, json={'articles': [{'title': 'A'}]})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(ratelimit, 'get_http_client', lambda: client)
+    store = QuotaStore(str(tmp_path / 'quota.sqlite'), capacity=10, refill_per_second=1)
+    state['limiter'] = NewsApiLimiter(store, min_interval=60, stale_ttl=3600)
+    yield state
+    client.close()
+
+
+def test_timed_out_async_waiter_leaves_the_shared_call_alone(api):
+    limiter = api['limiter']
+    results = {}
+
+    def call(name):
+        results[name] = limiter.get(URL, PARAMS, timeout=5)
+
+    leader = threading.Thread(target=call, args=('leader',))
+    leader.start()
+    assert api['started'].wait(5)
+    follower = threading.Thread(target=call, args=('sync follower',))
+    follower.start()
+
+    # An async waiter that times out gets the stored fallback (nothing yet)
+    assert asyncio.run(limiter.get_async(URL, PARAMS, timeout=0.05)) == (ratelimit.RATE_LIMITED, None)
+
+    api['release'].set()
+    leader.join(5)
+    follower.join(5)
+    assert results['leader'] == (200, {'articles': [{'title': 'A'}]})
+    assert results['sync follower'] == results['leader']
+    assert api['calls'] == 1
+    assert limiter.get_stats()['coalesced'] == 2
@@ -0,0 +1,89 @@
+# tests/test_singleflight.py
+"""
+In-flight coalescing: concurrent callers with the same key share one
+computation, and a waiter that goes away doesn't break the key for others.
+"""
+import asyncio
+import threading
+
+from modules.utils.singleflight import SingleFlight
+
+
+def test_cancelled_follower_does_not_poison_the_key():
+    group = SingleFlight('test')
+    runs = []
+
+    async def work(value):
+        runs.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+
+    async def scenario():
+        leader = asyncio.create_task(group.do_async('k', work, 1))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(group.do_async('k', work, 1))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        assert await leader == 2
+        assert follower.cancelled()
+
+        # The next call for the key runs again instead of getting CancelledError
+        assert await group.do_async('k', work, 3) == 6
+
+    asyncio.run(scenario())
+    assert runs == [1, 3]
+    assert group.get_stats()['inflight'] == 0
+    assert group.do('k', lambda: 'sync') == 'sync'
+
+
+def test_leader_failure_is_shared_with_followers():
+    group = SingleFlight('test')
+    runs = []
+
+    async def fail():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        raise ValueError('provider down')
+
+    async def scenario():
+        calls = [group.do_async('k', fail) for _ in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert runs == [1]
+    assert all(isinstance(e, ValueError) and str(e) == 'provider down' for e in errors)
+    assert group.get_stats()['coalesced'] == 2
+    assert group.get_stats()['inflight'] == 0
+
+
+def test_sync_and_async_callers_join_one_future():
+    group = SingleFlight('test')
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append('sync')
+        started.set()
+        release.wait(5)
+        return 'shared'
+
+    result = {}
+    leader = threading.Thread(target=lambda: result.update(sync=group.do('k', work)))
+    leader.start()
+    assert started.wait(5)
+
+    async def never_runs():
+        runs.append('async')
+        return 'own'
+
+    async def follower():
+        waiter = asyncio.create_task(group.do_async('k', never_runs))
+        await asyncio.sleep(0.01)
+        release.set()
+        return await waiter
+
+    assert asyncio.run(follower()) == 'shared'
+    leader.join(5)
+    assert result['sync'] == 'shared'
+    assert runs == ['sync']